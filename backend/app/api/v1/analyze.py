@@ -1,7 +1,14 @@
 from fastapi import APIRouter, HTTPException
-from app.model.emotion_model import predict
+from app.model.bucketing import get_length_stats
+from app.model.cascade import get_cascade_stats
+from app.model.executor import InferenceQueueFull
+from app.model.inference import predict_async
+from app.model.prediction_cache import get_prediction_cache
+from app.model.sharing import process_memory
+from app.model.warmup import ModelNotReady
 from app.schemas.analyze import AnalyzeRequest, AnalyzeResponse, EmotionPrediction
-from app.services.translation import translate_if_needed
+from app.services.translation import is_degraded, translate_if_needed_async, translation_service
+from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,13 +24,17 @@ async def analyze_emotion(request: AnalyzeRequest):
         original_text = request.text
         
         # Translation pipeline: detect language -> translate if needed
-        analyzed_text, detected_lang, was_translated = translate_if_needed(original_text)
+        # (deadline 초과 시 원문으로 분석하고 translation_degraded로 표시)
+        translation = await translate_if_needed_async(original_text)
+        analyzed_text, detected_lang, was_translated = translation
         
         if was_translated:
             logger.info(f"Translated {detected_lang} -> en for emotion analysis")
         
         # Emotion analysis on (possibly translated) English text
-        selected, all_probs = predict(analyzed_text, request.threshold, request.topk)
+        selected, all_probs, tier = await predict_async(
+            analyzed_text, request.threshold, request.topk, cascade=request.cascade
+        )
         
         predictions = [
             EmotionPrediction(label=label, probability=prob) 
@@ -36,9 +47,39 @@ async def analyze_emotion(request: AnalyzeRequest):
             original_text=original_text,
             analyzed_text=analyzed_text,
             detected_language=detected_lang,
-            was_translated=was_translated
+            was_translated=was_translated,
+            translation_degraded=is_degraded(translation),
+            tier=tier,
         )
     
+    except ModelNotReady as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Emotion model is not ready yet ({e})",
+            headers={"Retry-After": str(e.retry_after)} if e.retry_after is not None else None,
+        )
+    except InferenceQueueFull as e:
+        logger.warning(f"Emotion analysis rejected, inference queue full: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Emotion model is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.error(f"Error in emotion analysis pipeline: {e}")
         raise HTTPException(status_code=500, detail=f"Error analyzing emotions: {str(e)}")
+
+@router.get("/analyze/stats")
+async def get_analyze_stats():
+    """
+    Token-length distribution, truncation counts (MAX_LEN tuning), prediction/translation
+    cache and cascade escalation stats
+    """
+    return {
+        "max_len": settings.MAX_LEN,
+        "lengths": get_length_stats().snapshot(),
+        "prediction_cache": get_prediction_cache().stats(),
+        "translation": translation_service.stats(),
+        "cascade": get_cascade_stats().snapshot(),
+        "memory": process_memory(),
+    }
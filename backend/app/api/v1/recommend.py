@@ -1,18 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import RedirectResponse
 from app.core.config import settings
+import asyncio
 import os
 import spotipy
+from app.recommend.catalog import get_catalog
+from app.recommend.coalescing import get_candidate_set_cache
+from app.recommend.pools import get_candidate_pools
+from app.recommend.recent import load_recent, record_recent
 from app.recommend.recommender import aggregate_targets
-from app.services.spotify import get_recommendations, get_available_genres
+from app.recommend.taste import load_profile, personalize_seeds, personalize_target, rerank_by_taste
+from app.services.spotify import get_recommendations_async, get_available_genres
+from app.services.spotify_cache import get_audio_features_cache, get_search_cache
+from app.services.spotify_ratelimit import get_rate_limiter
 from app.schemas.recommend import RecommendRequest, RecommendResponse, TrackInfo
 from typing import List
-from dotenv import load_dotenv
-from pathlib import Path
-
-# .env 파일 직접 로드
-env_path = Path(__file__).resolve().parents[3] / ".env"
-load_dotenv(env_path)
 
 router = APIRouter()
 @router.get("/spotify/login")
@@ -66,15 +68,49 @@ async def get_music_recommendations(request: RecommendRequest):
         # Get target audio features and seeds from emotion analysis
         target, genre_seeds = aggregate_targets(selected_emotions)
         
-        # Spotify API를 통한 추천
-        spotify_result = get_recommendations(
-            seed_genres=genre_seeds,
-            limit=request.limit,
-            target_valence=target.get("valence"),
-            target_energy=target.get("energy"), 
-            target_danceability=target.get("danceability"),
-            target_acousticness=target.get("acousticness")
-        )
+        # 사용자의 최근 추천 곡 filter (Bloom filter, 후보마다 O(1) 확인)와 취향 프로필 (한 행 읽기)
+        track_user = request.user_id if settings.RECENT_TRACKS_ENABLED else None
+        taste_user = request.user_id if settings.TASTE_PROFILE_ENABLED else None
+        recent, profile = await asyncio.to_thread(
+            lambda: (
+                load_recent(track_user) if track_user is not None else None,
+                load_profile(taste_user) if taste_user is not None else None,
+            )
+        ) if request.user_id is not None else (None, None)
+
+        # 평소 감정 조합 쪽으로 target을 조금 옮기고 선호 장르를 seed에 추가, 후보는 넉넉히 받아 재정렬
+        target = personalize_target(target, profile)
+        genre_seeds = personalize_seeds(genre_seeds, profile)
+        fetch_limit = request.limit * max(1, settings.TASTE_RERANK_FACTOR) if profile else request.limit
+
+        catalog = get_catalog()
+        spotify_result = None
+        if catalog is not None and len(catalog) >= request.limit:
+            # 로컬 카탈로그에서 target과 가까운 트랙 (Spotify 호출 없음)
+            spotify_result = catalog.recommend(target, fetch_limit, seed_genres=genre_seeds, recent=recent)
+        elif settings.CANDIDATE_POOLS_ENABLED:
+            # 백그라운드에서 미리 모아 둔 감정별 후보 pool (Spotify 호출 없음, 부족하면 None)
+            spotify_result = get_candidate_pools().recommend(
+                selected_emotions, target, fetch_limit, seed_genres=genre_seeds, recent=recent
+            )
+        if spotify_result is None:
+            # Spotify API를 통한 추천: 양자화된 감정 signature가 같은 요청은 하나의 검색 결과(후보)를
+            # 공유하고 (single-flight + 짧은 TTL 캐시), 각자 그 후보에서 무작위로 limit개를 받음
+            spotify_result = await get_candidate_set_cache().recommend(
+                target, genre_seeds, fetch_limit, recent=recent
+            )
+        if profile:
+            # 후보 순서(target 거리 순) + 선호 아티스트 가산점으로 limit개
+            ranked = rerank_by_taste(spotify_result["tracks"], profile, request.limit)
+            spotify_result = {
+                **spotify_result,
+                "tracks": ranked,
+                "total": len(ranked),
+                "parameters": {**spotify_result["parameters"], "limit": request.limit, "taste_reranked": True},
+            }
+
+        if track_user is not None:
+            await asyncio.to_thread(record_recent, track_user, [t["id"] for t in spotify_result["tracks"]])
         
         # 결과를 우리 스키마 형식에 맞게 변환
         tracks = []
@@ -108,13 +144,28 @@ async def get_music_recommendations(request: RecommendRequest):
         # 기타 서버 에러
         raise HTTPException(status_code=500, detail=f"Error getting recommendations: {str(e)}")
 
+@router.get("/recommend/stats")
+async def get_recommend_stats():
+    """
+    Spotify search cache hit rates (fresh / stale-while-revalidate / miss), audio features cache,
+    the rate limit budget, candidate pool coverage and the coalesced live candidate cache
+    """
+    return {
+        "search_cache": get_search_cache().stats(),
+        "audio_features_cache": get_audio_features_cache().stats(),
+        "rate_limit": await asyncio.to_thread(get_rate_limiter().stats),
+        "candidate_pools": get_candidate_pools().stats(),
+        "live_candidates": get_candidate_set_cache().stats(),
+    }
+
 @router.get("/genres")
 async def get_supported_genres():
     """
     Get list of available genres from Spotify
     """
     try:
-        genres = get_available_genres()
+        # 동기 클라이언트(rate limit 대기, blocking HTTP)이므로 thread에서
+        genres = await asyncio.to_thread(get_available_genres)
         return {"genres": genres, "total": len(genres)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting genres: {str(e)}")
@@ -126,7 +177,7 @@ async def test_spotify_connection():
     """
     try:
         # 간단한 추천 요청으로 연결 테스트
-        result = get_recommendations(
+        result = await get_recommendations_async(
             seed_genres=["pop"],
             limit=1,
             target_valence=0.5
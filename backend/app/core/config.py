@@ -10,9 +10,50 @@ DB_FILE_PATH = BACKEND_DIR / "emotion_app.db"
 class Settings(BaseSettings):
     # Model settings
     MODEL_DIR: str = "./models/goemotions_bert"
+    FALLBACK_MODEL_NAME: str = "monologg/bert-base-cased-goemotions-original"  # used when MODEL_DIR is missing
     MAX_LEN: int = 256
     THRESHOLD: float = 0.30
     TOPK: int = 3
+    MODEL_BACKEND: str = "torch"  # torch | onnx | onnx-int8
+    ONNX_MODEL_DIR: str = "./models/goemotions_onnx"
+    # Share weights across workers: mmap safetensors and/or load once in a pre-fork master
+    MODEL_WEIGHTS_MMAP: bool = False
+    MODEL_SAFETENSORS_PATH: str = ""  # default: <MODEL_DIR>/model.safetensors
+    MODEL_PRELOAD: bool = False  # load at import time (gunicorn --preload)
+    TOKENIZER_CACHE_SIZE: int = 2048  # recently seen texts whose encodings are kept
+
+    # Model cascade (small distilled classifier first, full model only when uncertain)
+    CASCADE_ENABLED: bool = False  # default when AnalyzeRequest.cascade is not given
+    CASCADE_SMALL_MODEL_DIR: str = ""  # same 28 GoEmotions labels; empty disables the cascade
+    CASCADE_MARGIN: float = 0.10  # escalate when the deciding boundary (k-th vs (k+1)-th prob, or THRESHOLD) is this close
+    CASCADE_AUDIT_RATE: float = 0.0  # fraction of small-tier answers re-checked by the full model
+
+    # Inference batching (concurrent /analyze calls share one forward pass)
+    BATCHING_ENABLED: bool = True
+    BATCH_MAX_SIZE: int = 16
+    BATCH_MAX_WAIT_MS: float = 2.0
+    BATCH_TOKEN_BUDGET: int = 8192  # max padded tokens (rows x longest) per forward pass
+
+    # Inference executor (keeps torch off the event loop)
+    INFERENCE_EXECUTOR: str = "thread"  # thread | process
+    INFERENCE_WORKERS: int = 1
+    INFERENCE_START_METHOD: str = "spawn"  # spawn | fork (fork shares a preloaded model)
+    INFERENCE_TORCH_THREADS: int = 0  # 0 = torch default (process mode: cpu_count / workers)
+    INFERENCE_QUEUE_SIZE: int = 256  # max pending /analyze inferences before 503
+
+    # Emotion prediction cache (in-memory LRU + optional shared SQLite file)
+    PREDICTION_CACHE_SIZE: int = 4096  # 0 disables the in-memory tier
+    PREDICTION_CACHE_DB: str = ""  # e.g. ./cache/predictions.db
+
+    # Translation cache (in-memory LRU/TTL + optional shared SQLite file)
+    TRANSLATION_CACHE_SIZE: int = 2048
+    TRANSLATION_CACHE_TTL: float = 7 * 24 * 3600  # seconds
+    TRANSLATION_NEGATIVE_TTL: float = 60.0  # failed translations are retried after this
+    TRANSLATION_CACHE_DB: str = ""  # e.g. ./cache/translations.db
+    # Translation provider for /analyze (async, pooled HTTP client)
+    TRANSLATION_BACKEND: str = "google"  # google | stub (offline: returns the text unchanged)
+    TRANSLATION_TIMEOUT_S: float = 3.0  # deadline; on expiry /analyze uses the untranslated text
+    TRANSLATION_MAX_CONNECTIONS: int = 10
 
     # Database settings (absolute path anchored to backend directory)
     DATABASE_URL: str = f"sqlite:///{DB_FILE_PATH}"
@@ -25,6 +66,62 @@ class Settings(BaseSettings):
         "user-read-playback-state user-modify-playback-state user-read-currently-playing"
     )
     SPOTIFY_REFRESH_TOKEN: Optional[str] = None
+    SPOTIFY_CONCURRENCY: int = 4  # concurrent search requests per /recommend
+    SPOTIFY_TIMEOUT_S: float = 10.0
+    SPOTIFY_MAX_CONNECTIONS: int = 10  # keep-alive pool size (sync session and async client)
+    SPOTIFY_TOKEN_REFRESH_MARGIN_S: float = 300.0  # refresh access tokens this long before expiry
+    # Search response cache: fresh for TTL, then served stale (refreshed in background) for STALE
+    SPOTIFY_SEARCH_CACHE_SIZE: int = 1024
+    SPOTIFY_SEARCH_TTL_S: float = 600.0
+    SPOTIFY_SEARCH_STALE_S: float = 3600.0
+    # Audio features (fetched in chunks of 100) used to re-rank search candidates by target distance
+    SPOTIFY_AUDIO_FEATURES_CACHE_SIZE: int = 20000
+    SPOTIFY_AUDIO_FEATURES_TTL_S: float = 7 * 24 * 3600
+    SPOTIFY_AUDIO_FEATURES_NEGATIVE_TTL_S: float = 300.0  # tracks without features / failed lookups
+    SPOTIFY_RERANK_POOL_FACTOR: int = 2  # collect limit * factor candidates, return the closest `limit`
+    # Rate limit scheduler (token bucket shared by every worker using the same DB file)
+    SPOTIFY_RATE_LIMIT_PER_S: float = 5.0
+    SPOTIFY_RATE_LIMIT_BURST: int = 10
+    SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE: float = 0.5  # share of the burst kept for user-facing requests
+    SPOTIFY_RATE_LIMIT_MAX_WAIT_S: float = 3.0  # user requests fail fast beyond this wait
+    SPOTIFY_RATE_LIMIT_BACKGROUND_MAX_WAIT_S: float = 120.0
+    SPOTIFY_RATE_LIMIT_DB: str = ""  # e.g. ./cache/spotify_ratelimit.db (empty = per-process bucket)
+
+    # Local track catalog (python -m app.recommend.catalog ingest); empty = Spotify search only
+    TRACK_CATALOG_PATH: str = ""  # e.g. ./data/catalog.json or .csv
+    TRACK_CATALOG_POOL_FACTOR: int = 3  # sample `limit` tracks from the nearest limit * factor
+
+    # Per-emotion candidate pools refreshed in the background (app/recommend/pools.py)
+    CANDIDATE_POOLS_ENABLED: bool = True
+    CANDIDATE_POOL_SIZE: int = 300  # tracks kept per label / label pair
+    CANDIDATE_POOL_REFRESH_S: float = 6 * 3600
+    CANDIDATE_POOL_MAX_PAIRS: int = 20  # most requested top-2 label pairs get their own pool
+    CANDIDATE_POOL_MIN_PAIR_REQUESTS: int = 3
+    CANDIDATE_POOL_SAMPLE_FACTOR: int = 3  # sample limit * factor candidates, return the closest `limit`
+    CANDIDATE_POOL_DB: str = ""  # e.g. ./cache/candidate_pools.db (shared by workers, survives restarts)
+
+    # Live /recommend coalescing: requests with the same quantized target + seeds share one search
+    RECOMMEND_SIGNATURE_STEP: float = 0.05
+    RECOMMEND_CACHE_SIZE: int = 512
+    RECOMMEND_CACHE_TTL_S: float = 60.0
+    RECOMMEND_CANDIDATE_FACTOR: int = 3  # shared candidate set = limit * factor tracks
+
+    # Per-user recently-recommended filter (rotating Bloom filter in the app DB)
+    RECENT_TRACKS_ENABLED: bool = True
+    RECENT_TRACKS_WINDOW_DAYS: float = 28.0
+    RECENT_TRACKS_GENERATIONS: int = 4  # window is dropped one generation (window / 4) at a time
+    RECENT_TRACKS_FILTER_BITS: int = 8192  # per generation -> 4 KB per user by default
+    RECENT_TRACKS_HASHES: int = 5
+
+    # Per-user taste profile (updated in upsert_diary, used to re-rank /recommend)
+    TASTE_PROFILE_ENABLED: bool = True
+    TASTE_DECAY: float = 0.9  # artist/genre weights are multiplied by this once per new diary (day)
+    TASTE_MAX_ARTISTS: int = 50
+    TASTE_MAX_GENRES: int = 20
+    TASTE_MIN_DIARIES: int = 3  # target/seed personalization only after this many diaries
+    TASTE_TARGET_BLEND: float = 0.2  # move the target this far toward the user's typical target
+    TASTE_ARTIST_WEIGHT: float = 0.3  # max rank boost for favourite artists
+    TASTE_RERANK_FACTOR: int = 2  # fetch limit * factor candidates to re-rank
 
     # App settings
     APP_NAME: str = "Emotion Music App"
@@ -0,0 +1,40 @@
+"""
+Readiness tracking for components that start in the background
+
+/health는 프로세스가 살아있는지만, /ready는 모델/DB/Spotify가 준비되었는지를 보고합니다.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+DISABLED = "disabled"
+
+
+class Readiness:
+    def __init__(self, components: Iterable[str]):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict] = {
+            name: {"status": PENDING, "detail": None, "since": time.time()} for name in components
+        }
+
+    def mark(self, name: str, status: str, detail: Optional[str] = None) -> None:
+        with self._lock:
+            self._state[name] = {"status": status, "detail": detail, "since": time.time()}
+
+    def status(self, name: str) -> str:
+        with self._lock:
+            return self._state.get(name, {}).get("status", PENDING)
+
+    def is_ready(self, name: str) -> bool:
+        return self.status(name) == READY
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: dict(state) for name, state in self._state.items()}
+
+
+readiness = Readiness(["model", "database", "spotify", "candidate_pools"])
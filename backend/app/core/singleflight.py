@@ -0,0 +1,44 @@
+"""
+Single-flight coalescing for async calls
+
+같은 키로 동시에 들어온 호출은 첫 번째 호출의 결과를 함께 기다립니다. 실제 작업은
+별도 task로 실행되므로 기다리던 호출자가 timeout/취소되어도 작업은 끝까지 진행되고,
+그 결과(예: 캐시 저장)는 다음 요청에 활용됩니다.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.get_running_loop().create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self.coalesced += 1
+        # shield: 호출자의 취소가 공유 task를 취소하지 않도록
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 아무도 기다리지 않는 task의 예외가 "never retrieved" 경고로 남지 않도록
+            task.exception()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "started": self.started, "coalesced": self.coalesced}
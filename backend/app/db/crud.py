@@ -3,6 +3,13 @@ from app.db import models
 from app.schemas.auth import UserCreate
 from typing import List, Dict, Optional
 import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# 같은 사용자의 동시 저장과 충돌했을 때 프로필을 다시 읽어서 갱신하는 횟수
+TASTE_PROFILE_ATTEMPTS = 5
 
 def hash_password(password: str) -> str:
     """Hash password using SHA256"""
@@ -115,12 +122,14 @@ def upsert_diary(db: Session, user_id: int, content: str, emotion: str = None, m
     )
 
     if existing:
+        old = (existing.emotion, existing.music)
         existing.content = content
         existing.emotion = emotion
         existing.music = music
         db.add(existing)
         db.commit()
         db.refresh(existing)
+        _update_taste_profile(db, user_id, old, (emotion, music))
         return existing
 
     db_diary = models.Diary(
@@ -133,8 +142,33 @@ def upsert_diary(db: Session, user_id: int, content: str, emotion: str = None, m
     db.add(db_diary)
     db.commit()
     db.refresh(db_diary)
+    _update_taste_profile(db, user_id, None, (emotion, music))
     return db_diary
 
+def _update_taste_profile(db: Session, user_id: int, old, new) -> None:
+    """
+    Apply one diary change to the user's taste profile (after the diary is committed)
+
+    The profile is derived data: failures are logged and never fail the diary save.
+    Concurrent saves are resolved by compare-and-swap on updated_at (re-read and retry).
+    """
+    from app.core.config import settings
+    from app.recommend.taste import apply_diary_change
+
+    if not settings.TASTE_PROFILE_ENABLED or old == new:
+        return
+    try:
+        for _ in range(TASTE_PROFILE_ATTEMPTS):
+            row = get_taste_profile(db, user_id)
+            profile = apply_diary_change(row.profile if row is not None else None, old, new)
+            if save_taste_profile(db, user_id, profile, expected=row):
+                return
+            db.expire_all()
+        logger.warning(f"Gave up updating taste profile for user {user_id} after {TASTE_PROFILE_ATTEMPTS} conflicts")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Failed to update taste profile for user {user_id}: {e}")
+
 def get_diary(db: Session, diary_id: int) -> Optional[models.Diary]:
     """Get diary by ID"""
     return db.query(models.Diary).filter(models.Diary.id == diary_id).first()
@@ -148,3 +182,80 @@ def get_diaries(db: Session, user_id: int, limit: int = 30) -> List[models.Diary
             .all())
 
 # Recommendation functions removed - recommendations are now stored in diary.music field
+
+def get_recent_track_filter(db: Session, user_id: int) -> Optional[models.RecentTrackFilter]:
+    """Get the user's recently-recommended track filter"""
+    return db.query(models.RecentTrackFilter).filter(models.RecentTrackFilter.user_id == user_id).first()
+
+def save_recent_track_filter(
+    db: Session,
+    user_id: int,
+    bits: bytes,
+    started_at: float,
+    expected: Optional[models.RecentTrackFilter] = None,
+) -> bool:
+    """
+    Create or replace the user's recently-recommended track filter (compare-and-swap)
+
+    ``expected`` is the row the new value was computed from (None when there was no row).
+    Returns False without writing if another request changed or created the row in the
+    meantime, so the caller can re-read and retry.
+    """
+    from sqlalchemy.exc import IntegrityError
+
+    if expected is None:
+        db.add(models.RecentTrackFilter(user_id=user_id, bits=bits, started_at=started_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+    updated = (
+        db.query(models.RecentTrackFilter)
+        .filter(
+            models.RecentTrackFilter.user_id == user_id,
+            models.RecentTrackFilter.bits == expected.bits,
+            models.RecentTrackFilter.started_at == expected.started_at,
+        )
+        .update({"bits": bits, "started_at": started_at}, synchronize_session=False)
+    )
+    db.commit()
+    return updated == 1
+
+def get_taste_profile(db: Session, user_id: int) -> Optional[models.UserTasteProfile]:
+    """Get the user's taste profile"""
+    return db.query(models.UserTasteProfile).filter(models.UserTasteProfile.user_id == user_id).first()
+
+def save_taste_profile(
+    db: Session, user_id: int, profile: Dict, expected: Optional[models.UserTasteProfile] = None
+) -> bool:
+    """
+    Create or replace the user's taste profile (compare-and-swap on updated_at)
+
+    ``expected`` is the row the new profile was computed from (None when there was no row).
+    Returns False without writing if another save changed or created the row in the meantime.
+    """
+    from sqlalchemy.exc import IntegrityError
+
+    updated_at = time.time()
+    if expected is None:
+        db.add(models.UserTasteProfile(user_id=user_id, profile=profile, updated_at=updated_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+    # updated_at이 버전 역할을 하므로 항상 이전 값보다 커야 함
+    updated_at = max(updated_at, expected.updated_at + 1e-6)
+    updated = (
+        db.query(models.UserTasteProfile)
+        .filter(
+            models.UserTasteProfile.user_id == user_id,
+            models.UserTasteProfile.updated_at == expected.updated_at,
+        )
+        .update({"profile": profile, "updated_at": updated_at}, synchronize_session=False)
+    )
+    db.commit()
+    return updated == 1
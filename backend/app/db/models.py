@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, JSON, Float, LargeBinary
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -20,3 +20,19 @@ class Diary(Base):
     emotion = Column(String)
     music = Column(JSON)  # 추천된 음악 정보를 JSON 형태로 저장
     owner = relationship('User', back_populates='diaries')
+
+class RecentTrackFilter(Base):
+    __tablename__ = 'recent_track_filters'
+
+    # 최근 추천한 트랙 id의 rotating Bloom filter (app/recommend/recent.py), 사용자당 몇 KB
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    bits = Column(LargeBinary, nullable=False)  # generation별 bit array를 최신 순서로 이어 붙임
+    started_at = Column(Float, nullable=False)  # 최신 generation이 시작된 시각 (unix time)
+
+class UserTasteProfile(Base):
+    __tablename__ = 'user_taste_profiles'
+
+    # 일기 저장 시 점진적으로 갱신되는 취향 프로필 (app/recommend/taste.py), 사용자당 한 행
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    profile = Column(JSON, nullable=False)  # emotion running mean + 감쇠된 artist/genre 가중치
+    updated_at = Column(Float, nullable=False)  # unix time
@@ -1,37 +1,37 @@
+import asyncio
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api.v1 import analyze, recommend, diaries, auth
 from app.core.config import settings
+from app.core.readiness import DISABLED, FAILED, READY, WARMING, readiness
 from app.db.base import engine, SessionLocal
 from app.db.models import Base
 from app.db import crud
+from app.model.executor import get_inference_executor
+from app.model.warmup import warm_up_in_background
+from app.recommend.pools import start_pool_warmer, stop_pool_warmer
 from app.schemas.auth import UserCreate
+from app.services.spotify import close_async_spotify
+from app.services.translation import translation_service
 from dotenv import load_dotenv
 from pathlib import Path
 
 # .env 파일 직접 로드 (최우선)
 env_path = Path(__file__).resolve().parents[1] / ".env"
-load_dotenv(env_path)
+env_loaded = load_dotenv(env_path)
 print(f"Loading .env from: {env_path}")
-print(f"Environment loaded: SPOTIFY_CLIENT_ID = {'Yes' if load_dotenv(env_path) else 'No'}")
-
-# Initialize database (idempotent - do NOT drop tables)
-try:
-    print("Ensuring database schema...")
-    Base.metadata.create_all(bind=engine)
-    print("Database schema is ready.")
-except Exception as e:
-    print(f"Error ensuring database: {e}")
-
-# Pre-load emotion model to avoid timeout on first request
-try:
-    from app.model.emotion_model import load_model
-    print("Loading emotion model...")
-    load_model()
-    print("Emotion model loaded successfully!")
-except Exception as e:
-    print(f"Warning: Failed to preload emotion model: {e}")
-    print("Model will be loaded on first request (may cause timeout)")
+print(f"Environment loaded: SPOTIFY_CLIENT_ID = {'Yes' if env_loaded else 'No'}")
+
+# Pre-fork mode (gunicorn --preload): load weights once in the master so the
+# forked workers share them copy-on-write. Warm-up still runs per worker.
+if settings.MODEL_PRELOAD:
+    try:
+        from app.model.sharing import preload_for_fork
+        preload_for_fork()
+    except Exception as e:
+        print(f"Warning: failed to preload emotion model: {e}")
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -39,8 +39,28 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Startup is staged: the app answers /health immediately while the database,
+# emotion model and Spotify client get ready in the background (see /ready).
+_background_tasks = set()
+
+def _spawn(coro) -> None:
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def init_database() -> None:
+    # Initialize database (idempotent - do NOT drop tables)
+    readiness.mark("database", WARMING)
+    try:
+        Base.metadata.create_all(bind=engine)
+        seed_default_users()
+        readiness.mark("database", READY)
+        print("Database schema is ready.")
+    except Exception as e:
+        readiness.mark("database", FAILED, str(e))
+        print(f"Error ensuring database: {e}")
+
 # Seed default users on startup so login always works after restarts
-@app.on_event("startup")
 def seed_default_users() -> None:
     try:
         with SessionLocal() as db:
@@ -53,6 +73,37 @@ def seed_default_users() -> None:
     except Exception as e:
         print(f"Warning: failed to seed default users: {e}")
 
+def init_spotify() -> None:
+    from app.services.spotify import get_spotify
+    client_id = os.getenv("SPOTIFY_CLIENT_ID") or settings.SPOTIFY_CLIENT_ID
+    client_secret = os.getenv("SPOTIFY_CLIENT_SECRET") or settings.SPOTIFY_CLIENT_SECRET
+    if not client_id or not client_secret:
+        readiness.mark("spotify", DISABLED, "credentials not configured")
+        return
+    readiness.mark("spotify", WARMING)
+    try:
+        get_spotify()
+        readiness.mark("spotify", READY)
+    except Exception as e:
+        readiness.mark("spotify", FAILED, str(e))
+
+@app.on_event("startup")
+async def start_background_init() -> None:
+    _spawn(asyncio.to_thread(init_database))
+    _spawn(warm_up_in_background())
+    _spawn(asyncio.to_thread(init_spotify))
+    start_pool_warmer()
+
+@app.on_event("shutdown")
+def stop_inference_executor() -> None:
+    get_inference_executor().shutdown()
+
+@app.on_event("shutdown")
+async def close_http_clients() -> None:
+    await stop_pool_warmer()
+    await translation_service.aclose()
+    await close_async_spotify()
+
 # CORS middleware for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -76,6 +127,16 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Model and database must be ready; Spotify and candidate pools are reported but do not gate readiness"""
+    components = readiness.snapshot()
+    ready = all(components[name]["status"] == READY for name in ("model", "database"))
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "components": components},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,266 @@
+"""
+Inference backends for the GoEmotions classifier
+
+MODEL_BACKEND 설정으로 선택:
+- ``torch``: float32 PyTorch BertForSequenceClassification (기존 동작)
+- ``onnx``: ONNX Runtime CPU 세션 (처음 사용 시 torch 모델에서 export)
+- ``onnx-int8``: 위 ONNX 모델을 dynamic int8 양자화한 버전
+
+Usage:
+    python -m app.model.backends export --backend onnx-int8
+    python -m app.model.backends parity --backend onnx-int8
+"""
+import argparse
+import copy
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.nlp.labels import GOEMOTIONS_LABELS
+
+logger = logging.getLogger(__name__)
+
+MODEL_BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+ONNX_OPSET = 14
+
+# Parity check 기본 샘플 (번역된 일기와 비슷한 영어 문장들)
+PARITY_SAMPLES = [
+    "I finally finished my project today and I feel so proud of myself.",
+    "I miss my grandmother so much, the house feels empty without her.",
+    "Why does everyone keep ignoring my messages? This is so annoying.",
+    "Thank you for always being there for me, I really appreciate it.",
+    "I am nervous about the interview tomorrow.",
+    "What a surprise! I did not expect a party at all.",
+    "Ugh, that food was disgusting.",
+    "Today was an ordinary day. I went to school and came back home.",
+]
+
+
+def onnx_model_path(quantized: bool = False) -> Path:
+    name = "model.int8.onnx" if quantized else "model.onnx"
+    return Path(settings.ONNX_MODEL_DIR) / name
+
+
+def _file_stamp(path: Path) -> str:
+    """파일 크기 + 수정 시각 (같은 경로의 가중치가 바뀌면 식별자도 바뀌도록)"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return "missing"
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def backend_identity(name: Optional[str] = None) -> str:
+    """
+    실제로 로드되는(될) 가중치의 식별자: backend, model_source(), 가중치 파일의 stamp
+
+    모델을 로드하지 않고 계산하므로 inference가 다른 프로세스에서 실행되어도 같은 값입니다.
+    """
+    from app.model.emotion_model import mmap_weights_path, model_source
+
+    name = name or settings.MODEL_BACKEND
+    source = model_source()
+    parts = [name, source]
+    if name == "torch":
+        weights = mmap_weights_path()
+        if weights is None:
+            weights = next(
+                (Path(source) / f for f in ("model.safetensors", "pytorch_model.bin") if (Path(source) / f).exists()),
+                None,
+            )
+        if weights is not None:
+            parts += [str(weights), _file_stamp(weights)]
+    else:
+        path = onnx_model_path(quantized=name == "onnx-int8")
+        parts += [str(path), _file_stamp(path)]
+    return ":".join(parts)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self):
+        from app.model.emotion_model import load_model
+
+        load_model()
+        self.identity = backend_identity("torch")
+
+    def predict_logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        from app.model.emotion_model import torch_logits
+
+        return torch_logits(encoded)
+
+
+class OnnxBackend:
+    def __init__(self, quantized: bool = False):
+        import onnxruntime as ort
+        from app.model.executor import intra_op_threads
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        path = ensure_onnx_model(quantized)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = intra_op_threads()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.identity = backend_identity(self.name)
+
+    def predict_logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        feeds = {
+            name: np.asarray(encoded[name], dtype=np.int64)
+            for name in self.input_names
+            if name in encoded
+        }
+        return self.session.run(["logits"], feeds)[0]
+
+
+def export_onnx(path: Optional[Path] = None) -> Path:
+    """현재 torch 모델을 dynamic batch/sequence 축을 가진 ONNX 그래프로 export"""
+    import torch
+    from app.model.emotion_model import load_model
+
+    path = Path(path or onnx_model_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    model, tokenizer = load_model()
+
+    class _LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).logits
+
+    dummy = tokenizer(["export dummy input"], return_tensors="pt", return_token_type_ids=True)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ONNX_INPUT_NAMES}
+    dynamic_axes["logits"] = {0: "batch"}
+    # 공유 중인 서빙 모델(GPU일 수 있음)을 옮기지 않도록 CPU 복사본에서 export
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(copy.deepcopy(model).cpu()).eval(),
+            tuple(dummy[name] for name in ONNX_INPUT_NAMES),
+            str(path),
+            input_names=ONNX_INPUT_NAMES,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    logger.info(f"Exported ONNX model to {path}")
+    return path
+
+
+def quantize_onnx(source: Optional[Path] = None, target: Optional[Path] = None) -> Path:
+    """Dynamic int8 quantization (가중치만 int8, activation은 실행 시 양자화)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = Path(source or onnx_model_path())
+    target = Path(target or onnx_model_path(quantized=True))
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+    logger.info(f"Quantized ONNX model written to {target}")
+    return target
+
+
+def ensure_onnx_model(quantized: bool = False) -> Path:
+    """필요한 ONNX 파일이 없으면 export(+quantize) 후 경로 반환"""
+    fp32_path = onnx_model_path()
+    if not fp32_path.exists():
+        from app.model.emotion_model import release_model
+
+        export_onnx(fp32_path)
+        if settings.MODEL_BACKEND != "torch":
+            release_model()
+    if not quantized:
+        return fp32_path
+    int8_path = onnx_model_path(quantized=True)
+    if not int8_path.exists():
+        quantize_onnx(fp32_path, int8_path)
+    return int8_path
+
+
+def create_backend(name: str):
+    if name == "torch":
+        return TorchBackend()
+    if name == "onnx":
+        return OnnxBackend(quantized=False)
+    if name == "onnx-int8":
+        return OnnxBackend(quantized=True)
+    raise ValueError(f"Unknown MODEL_BACKEND '{name}', expected one of {MODEL_BACKENDS}")
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend(settings.MODEL_BACKEND)
+        logger.info(f"Emotion model backend: {_backend.identity}")
+    return _backend
+
+
+def check_parity(backend_name: str, texts: Optional[List[str]] = None, atol: float = 0.05) -> Dict:
+    """
+    Compare the 28 GoEmotions probabilities of ``backend_name`` against torch.
+
+    Returns max/mean absolute difference per label, top-1 agreement and
+    whether every probability is within ``atol``.
+    """
+    from app.model.emotion_model import sigmoid
+    from app.nlp.tokenizer import get_tokenization_service
+
+    texts = texts or PARITY_SAMPLES
+    reference = TorchBackend()
+    candidate = create_backend(backend_name)
+    encoded = get_tokenization_service().encode_many(texts)
+    ref_probs = sigmoid(reference.predict_logits(encoded))
+    cand_probs = sigmoid(candidate.predict_logits(encoded))
+
+    diff = np.abs(ref_probs - cand_probs)
+    per_label = diff.max(axis=0)
+    return {
+        "backend": candidate.name,
+        "samples": len(texts),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "per_label_max_abs_diff": {
+            label: float(per_label[i]) for i, label in enumerate(GOEMOTIONS_LABELS)
+        },
+        "top1_agreement": float((ref_probs.argmax(axis=1) == cand_probs.argmax(axis=1)).mean()),
+        "within_tolerance": bool(diff.max() <= atol),
+        "atol": atol,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export / verify GoEmotions inference backends")
+    parser.add_argument("command", choices=["export", "parity"])
+    parser.add_argument("--backend", choices=["onnx", "onnx-int8"], default="onnx-int8")
+    parser.add_argument("--atol", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        path = ensure_onnx_model(quantized=args.backend == "onnx-int8")
+        print(f"ONNX model ready: {path}")
+    else:
+        report = check_parity(args.backend, atol=args.atol)
+        print(json.dumps(report, indent=2))
+        if not report["within_tolerance"]:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Offline batch emotion analysis for large diary exports
+
+JSONL 또는 CSV를 스트리밍으로 읽어 청크 단위로 번역 → 토큰 길이 버킷팅 → batched
+inference를 수행하고, 확률과 선택된 라벨을 JSONL/CSV로 기록합니다. 청크마다
+checkpoint를 남기므로 중간에 중단되어도 --resume으로 이어서 실행할 수 있습니다.
+
+Usage:
+    python -m app.model.batch_analyze diaries.jsonl scored.jsonl --text-field content
+    python -m app.model.batch_analyze diaries.csv scored.csv --resume
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.nlp.labels import GOEMOTIONS_LABELS
+
+logger = logging.getLogger(__name__)
+
+
+def _format(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError(f"Unsupported file type '{suffix}' (expected .jsonl or .csv)")
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if _format(path) == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def chunked(records: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk: List[Dict] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Checkpoint:
+    """Records how many input records are durably written and the output size at that point"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[Dict]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, records_done: int, output_bytes: int) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"records_done": records_done, "output_bytes": output_bytes}, f)
+        os.replace(tmp, self.path)
+
+
+class ResultWriter:
+    def __init__(self, path: str, resume_bytes: Optional[int]):
+        self.format = _format(path)
+        fresh = resume_bytes is None
+        if not fresh:
+            # checkpoint 이후에 쓰인 불완전한 출력은 잘라냄
+            with open(path, "r+b") as f:
+                f.truncate(resume_bytes)
+        self.file = open(path, "w" if fresh else "a", newline="", encoding="utf-8")
+        self.csv_writer = None
+        self._csv_header = fresh
+
+    def write(self, record: Dict, result: Dict) -> None:
+        if self.format == "jsonl":
+            self.file.write(json.dumps({**record, **result}, ensure_ascii=False) + "\n")
+            return
+        row = dict(record)
+        row.update({
+            "analyzed_text": result["analyzed_text"],
+            "detected_language": result["detected_language"],
+            "was_translated": result["was_translated"],
+            "selected": ";".join(f"{p['label']}:{p['probability']:.4f}" for p in result["predictions"]),
+        })
+        row.update({f"prob_{label}": f"{p:.6f}" for label, p in result["probabilities"].items()})
+        if self.csv_writer is None:
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=list(row.keys()), extrasaction="ignore")
+            if self._csv_header:
+                self.csv_writer.writeheader()
+        self.csv_writer.writerow(row)
+
+    def commit(self) -> int:
+        """Flush to disk and return the durable output size in bytes"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def analyze_chunk(
+    records: List[Dict],
+    text_field: str,
+    translate: bool,
+    threshold: Optional[float],
+    topk: Optional[int],
+) -> List[Dict]:
+    from app.model.emotion_model import infer_batch, record_lengths, select_emotions
+    from app.model.prediction_cache import get_prediction_cache
+    from app.services.translation import translate_if_needed
+
+    prepared = []
+    for record in records:
+        text = str(record.get(text_field) or "")
+        if translate and text.strip():
+            prepared.append(translate_if_needed(text))
+        else:
+            prepared.append((text, "unknown", False))
+
+    # 캐시에 없는 텍스트만 모아서 길이 버킷 단위로 추론 (infer_batch 내부에서 정렬/버킷팅)
+    cache = get_prediction_cache()
+    probs: List[Optional[np.ndarray]] = [cache.get(analyzed) for analyzed, _, _ in prepared]
+    missing = [i for i, p in enumerate(probs) if p is None]
+    if missing:
+        texts = [prepared[i][0] for i in missing]
+        batch_probs, raw_lengths, truncated = infer_batch(texts)
+        record_lengths(raw_lengths, truncated)
+        for i, text, row in zip(missing, texts, batch_probs):
+            probs[i] = row
+            cache.set(text, row)
+
+    results = []
+    for (analyzed, lang, was_translated), row in zip(prepared, probs):
+        selected = select_emotions(row, threshold, topk)
+        results.append({
+            "analyzed_text": analyzed,
+            "detected_language": lang,
+            "was_translated": was_translated,
+            "predictions": [{"label": label, "probability": p} for label, p in selected],
+            "probabilities": {label: float(p) for label, p in zip(GOEMOTIONS_LABELS, row)},
+        })
+    return results
+
+
+def run(args: argparse.Namespace) -> int:
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.ckpt")
+    state = checkpoint.load() if args.resume else None
+    if args.resume and state is None:
+        logger.info("No checkpoint found, starting from the beginning")
+    elif state is not None and (
+        not os.path.exists(args.output) or os.path.getsize(args.output) < state["output_bytes"]
+    ):
+        # checkpoint가 가리키는 출력이 없거나 잘려 있으면 이어 쓸 수 없음
+        logger.warning(f"Output {args.output} is missing or shorter than the checkpoint, starting from the beginning")
+        state = None
+    done = state["records_done"] if state else 0
+
+    records = read_records(args.input)
+    for _ in range(done):
+        if next(records, None) is None:
+            break
+
+    writer = ResultWriter(args.output, state["output_bytes"] if state else None)
+    started = time.time()
+    processed = 0
+    try:
+        for chunk in chunked(records, args.chunk_size):
+            results = analyze_chunk(chunk, args.text_field, not args.no_translate, args.threshold, args.topk)
+            for record, result in zip(chunk, results):
+                writer.write(record, result)
+            done += len(chunk)
+            processed += len(chunk)
+            checkpoint.save(done, writer.commit())
+            elapsed = time.time() - started
+            logger.info(f"{done} records done ({processed / max(elapsed, 1e-6):.1f} rec/s, {elapsed:.0f}s elapsed)")
+    finally:
+        writer.close()
+    logger.info(f"Finished: {done} records written to {args.output}")
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch emotion analysis for JSONL/CSV diary exports")
+    parser.add_argument("input", help="input .jsonl or .csv")
+    parser.add_argument("output", help="output .jsonl or .csv")
+    parser.add_argument("--text-field", default="content", help="field holding the diary text")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="records per inference/checkpoint chunk")
+    parser.add_argument("--no-translate", action="store_true", help="analyze texts as-is (already English)")
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--topk", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None, help="checkpoint path (default: <output>.ckpt)")
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Micro-batching scheduler for emotion inference
+
+동시에 들어온 /analyze 요청들을 모아서 한 번의 batched forward pass로 처리합니다.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.model.executor import get_inference_executor
+
+logger = logging.getLogger(__name__)
+
+BatchFn = Callable[[List[str]], Sequence[Any]]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into batches of at most ``max_batch_size``.
+
+    A batch is dispatched as soon as it is full or ``max_wait_ms`` has passed
+    since its first item arrived. Requests that arrive while a batch is running
+    queue up and form the next batch, so under low load a lone request is only
+    delayed by ``max_wait_ms`` at most.
+    """
+
+    def __init__(
+        self,
+        infer_fn: BatchFn,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 2.0,
+        max_concurrent_batches: int = 1,
+    ):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, text: str) -> Any:
+        """Queue one text and wait for its row of the batch result"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            asyncio.get_running_loop().create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: Sequence[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            # 호출자가 이미 취소한 요청은 계산에서 제외
+            live = [(text, fut) for text, fut in batch if not fut.done()]
+            if not live:
+                return
+            texts = [text for text, _ in live]
+            try:
+                rows = await self._infer(texts)
+            except Exception as e:
+                logger.error(f"Batched inference failed for {len(texts)} texts: {e}")
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(e)
+                return
+            for (_, fut), row in zip(live, rows):
+                if not fut.done():
+                    fut.set_result(row)
+        finally:
+            self._slots.release()
+
+    async def _infer(self, texts: List[str]) -> Sequence[Any]:
+        # forward pass가 도는 동안 이벤트 루프가 다음 배치를 모을 수 있도록 executor에서 실행
+        return await get_inference_executor().run(self.infer_fn, texts)
+
+
+_batcher: Optional[MicroBatcher] = None
+
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        from app.model.emotion_model import infer_rows
+
+        _batcher = MicroBatcher(
+            infer_rows,
+            max_batch_size=settings.BATCH_MAX_SIZE,
+            max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+            max_concurrent_batches=get_inference_executor().workers,
+        )
+    return _batcher
+
+
+_small_batcher: Optional[MicroBatcher] = None
+
+
+def get_small_batcher() -> MicroBatcher:
+    """Cascade small tier용 batcher (같은 executor를 공유)"""
+    global _small_batcher
+    if _small_batcher is None:
+        from app.model.cascade import small_infer_rows
+
+        _small_batcher = MicroBatcher(
+            small_infer_rows,
+            max_batch_size=settings.BATCH_MAX_SIZE,
+            max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+            max_concurrent_batches=get_inference_executor().workers,
+        )
+    return _small_batcher
@@ -0,0 +1,98 @@
+"""
+Token-length bucketing and sequence-length statistics
+
+동적 padding에서는 한 배치의 비용이 (행 수 × 가장 긴 시퀀스 길이)에 비례하므로
+길이가 비슷한 입력끼리 묶고, 배치마다 고정 행 수 대신 토큰 예산을 적용합니다.
+"""
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Histogram edges (upper bounds, inclusive) for the token-length distribution
+LENGTH_HISTOGRAM_EDGES = (16, 32, 64, 128, 256, 384, 512)
+
+
+def bucket_by_length(
+    lengths: Sequence[int], token_budget: int, max_rows: Optional[int] = None
+) -> List[List[int]]:
+    """
+    Group indices into batches whose padded size stays within ``token_budget``.
+
+    Indices are sorted by length, and each batch grows until
+    ``rows * longest_length`` would exceed the budget (or ``max_rows`` is hit).
+    A single sequence longer than the budget still gets its own batch.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for idx in order:
+        longest = max(lengths[idx], 1)
+        rows = len(current) + 1
+        too_many_tokens = rows * longest > token_budget
+        too_many_rows = max_rows is not None and rows > max_rows
+        if current and (too_many_tokens or too_many_rows):
+            buckets.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+class LengthStats:
+    """Thread-safe running token-length distribution used to tune MAX_LEN"""
+
+    def __init__(self, window: int = 10000):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self._histogram = [0] * (len(LENGTH_HISTOGRAM_EDGES) + 1)
+        self.count = 0
+        self.truncated = 0
+        self.total_tokens = 0
+        self.max_seen = 0
+
+    def record(self, lengths: Iterable[int], truncated: Iterable[bool]) -> None:
+        """``lengths`` are raw token counts before truncation to MAX_LEN"""
+        with self._lock:
+            for length, was_truncated in zip(lengths, truncated):
+                length = int(length)
+                self.count += 1
+                self.total_tokens += length
+                self.max_seen = max(self.max_seen, length)
+                if was_truncated:
+                    self.truncated += 1
+                self._recent.append(length)
+                slot = int(np.searchsorted(LENGTH_HISTOGRAM_EDGES, length))
+                self._histogram[slot] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            recent = np.array(self._recent, dtype=np.int64)
+            histogram = list(self._histogram)
+            count, truncated = self.count, self.truncated
+            total, max_seen = self.total_tokens, self.max_seen
+
+        labels = [f"<={edge}" for edge in LENGTH_HISTOGRAM_EDGES]
+        labels.append(f">{LENGTH_HISTOGRAM_EDGES[-1]}")
+        percentiles = {}
+        if len(recent):
+            for p in (50, 90, 95, 99):
+                percentiles[f"p{p}"] = float(np.percentile(recent, p))
+        return {
+            "count": count,
+            "truncated": truncated,
+            "truncated_ratio": (truncated / count) if count else 0.0,
+            "mean_tokens": (total / count) if count else 0.0,
+            "max_tokens": max_seen,
+            "recent_percentiles": percentiles,
+            "histogram": dict(zip(labels, histogram)),
+        }
+
+
+_length_stats = LengthStats()
+
+
+def get_length_stats() -> LengthStats:
+    return _length_stats
@@ -0,0 +1,199 @@
+"""
+Confidence-based model cascade
+
+작은(distilled) 분류기가 같은 28개 GoEmotions 라벨로 먼저 답하고, 실제로 선택을 가르는
+경계(TOPK가 설정되면 k번째/k+1번째 확률 차이, 아니면 THRESHOLD) 근처에 있을 때만
+전체 BERT 모델로 escalation 합니다.
+
+CASCADE_AUDIT_RATE 비율만큼은 small tier가 답한 요청도 백그라운드에서 전체 모델로
+다시 계산하여 라벨 일치율을 기록합니다.
+"""
+import inspect
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.nlp.labels import GOEMOTIONS_LABELS
+from app.nlp.tokenizer import get_tokenization_service
+
+logger = logging.getLogger(__name__)
+
+TIER_SMALL = "small"
+TIER_FULL = "full"
+
+_small_model = None
+_small_inputs: Tuple[str, ...] = ()
+
+
+def cascade_available() -> bool:
+    return bool(settings.CASCADE_SMALL_MODEL_DIR)
+
+
+def load_small_model():
+    """Small tier 분류기 (torch, CASCADE_SMALL_MODEL_DIR)"""
+    global _small_model, _small_inputs
+    if _small_model is None:
+        from transformers import AutoModelForSequenceClassification
+        from app.model.emotion_model import get_device
+
+        model = AutoModelForSequenceClassification.from_pretrained(
+            settings.CASCADE_SMALL_MODEL_DIR,
+            num_labels=len(GOEMOTIONS_LABELS),
+            problem_type="multi_label_classification",
+        ).to(get_device())
+        model.eval()
+        # DistilBERT 등은 token_type_ids를 받지 않음
+        _small_inputs = tuple(inspect.signature(model.forward).parameters)
+        _small_model = model
+    return _small_model
+
+
+def small_infer_batch(texts: List[str]) -> np.ndarray:
+    import torch
+    from app.model.bucketing import bucket_by_length
+    from app.model.emotion_model import get_device, sigmoid
+
+    model = load_small_model()
+    tokens = get_tokenization_service(settings.CASCADE_SMALL_MODEL_DIR)
+    encoded = tokens.encode(list(texts))
+
+    probs = np.zeros((len(encoded), len(GOEMOTIONS_LABELS)), dtype=np.float32)
+    lengths = [len(e.ids) for e in encoded]
+    for bucket in bucket_by_length(lengths, settings.BATCH_TOKEN_BUDGET):
+        inputs = {
+            k: torch.from_numpy(v).to(get_device())
+            for k, v in tokens.pad([encoded[i] for i in bucket]).items()
+            if k in _small_inputs
+        }
+        with torch.no_grad():
+            logits = model(**inputs).logits
+        probs[bucket] = sigmoid(logits.detach().cpu().numpy())
+    return probs
+
+
+def small_infer_rows(texts: List[str]) -> List[np.ndarray]:
+    """MicroBatcher/executor용: 입력마다 small tier 확률 벡터"""
+    return list(small_infer_batch(texts))
+
+
+def needs_escalation(
+    probs: np.ndarray,
+    threshold: Optional[float] = None,
+    topk: Optional[int] = None,
+    margin: Optional[float] = None,
+) -> bool:
+    """
+    True when the small model's selection (select_emotions 규칙) could flip:
+
+    - top-k mode: the k-th and (k+1)-th probabilities are within ``margin``
+      (threshold는 선택에 쓰이지 않으므로 보지 않음)
+    - threshold mode: a probability sits within ``margin`` of the threshold, or nothing
+      passes it and the argmax fallback is within ``margin`` of the runner-up
+    """
+    threshold = settings.THRESHOLD if threshold is None else threshold
+    topk = settings.TOPK if topk is None else topk
+    margin = settings.CASCADE_MARGIN if margin is None else margin
+    probs = np.asarray(probs)
+    ranked = np.sort(probs)[::-1]
+
+    if topk is not None:
+        return 0 < topk < len(ranked) and bool(ranked[topk - 1] - ranked[topk] < margin)
+    if np.any(np.abs(probs - threshold) < margin):
+        return True
+    return bool(ranked[0] < threshold and len(ranked) > 1 and ranked[0] - ranked[1] < margin)
+
+
+class CascadeStats:
+    """Escalation rate and small/full label agreement (from audited requests)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.escalated = 0
+        self.audited = 0
+        self.audit_top1_agree = 0
+        self.audit_jaccard_sum = 0.0
+
+    def record(self, escalated: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if escalated:
+                self.escalated += 1
+
+    def record_audit(self, small_labels: List[str], full_labels: List[str]) -> None:
+        small_set, full_set = set(small_labels), set(full_labels)
+        union = small_set | full_set
+        with self._lock:
+            self.audited += 1
+            if small_labels and full_labels and small_labels[0] == full_labels[0]:
+                self.audit_top1_agree += 1
+            self.audit_jaccard_sum += len(small_set & full_set) / len(union) if union else 1.0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": cascade_available(),
+                "requests": self.requests,
+                "escalated": self.escalated,
+                "escalation_rate": (self.escalated / self.requests) if self.requests else 0.0,
+                "audited": self.audited,
+                "audit_top1_agreement": (self.audit_top1_agree / self.audited) if self.audited else None,
+                "audit_label_jaccard": (self.audit_jaccard_sum / self.audited) if self.audited else None,
+            }
+
+
+_cascade_stats = CascadeStats()
+
+
+def get_cascade_stats() -> CascadeStats:
+    return _cascade_stats
+
+
+_small_cache = None
+
+
+def get_small_prediction_cache():
+    """Small tier 확률 벡터용 memory-only 캐시 (full 모델 캐시와 identity가 다름)"""
+    global _small_cache
+    if _small_cache is None:
+        from app.model.prediction_cache import PredictionCache
+
+        _small_cache = PredictionCache(
+            maxsize=settings.PREDICTION_CACHE_SIZE,
+            identity=f"cascade-small|{settings.CASCADE_SMALL_MODEL_DIR}|{settings.MAX_LEN}",
+        )
+    return _small_cache
+
+
+def predict_cascade(
+    text: str, threshold: Optional[float] = None, topk: Optional[int] = None
+) -> Tuple[np.ndarray, str]:
+    """
+    Synchronous cascade: returns (28 probabilities, tier that answered).
+
+    이미 full 모델 결과가 캐시에 있으면 그것을 사용합니다.
+    """
+    from app.model.emotion_model import predict_probs_batch
+    from app.model.prediction_cache import get_prediction_cache
+
+    full_cache = get_prediction_cache()
+    probs = full_cache.get(text)
+    if probs is not None:
+        return probs, TIER_FULL
+
+    small_cache = get_small_prediction_cache()
+    small_probs = small_cache.get(text)
+    if small_probs is None:
+        small_probs = small_infer_batch([text])[0]
+        small_cache.set(text, small_probs)
+
+    escalate = needs_escalation(small_probs, threshold, topk)
+    _cascade_stats.record(escalate)
+    if not escalate:
+        return small_probs, TIER_SMALL
+    probs = predict_probs_batch([text])[0]
+    full_cache.set(text, probs)
+    return probs, TIER_FULL
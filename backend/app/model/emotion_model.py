@@ -1,59 +1,142 @@
-import torch
 import numpy as np
-from transformers import BertTokenizer, BertForSequenceClassification
 from app.core.config import settings
 from app.nlp.labels import GOEMOTIONS_LABELS
-from typing import List, Tuple
+from app.nlp.tokenizer import get_tokenization_service
+from typing import List, Optional, Tuple
+
+# torch/transformers는 import 비용이 크므로 실제로 모델을 로드할 때 import 합니다.
 
 _model = None
-_tokenizer = None
-_device = "cuda" if torch.cuda.is_available() else "cpu"
+_device = None
+
+def get_device() -> str:
+    global _device
+    if _device is None:
+        import torch
+        _device = "cuda" if torch.cuda.is_available() else "cpu"
+    return _device
+
+_model_source: Optional[str] = None
+
+def mmap_weights_path():
+    """MODEL_WEIGHTS_MMAP이 켜져 있고 safetensors 파일이 있으면 그 경로, 아니면 None"""
+    if not settings.MODEL_WEIGHTS_MMAP:
+        return None
+    from app.model.sharing import safetensors_path
+    path = safetensors_path()
+    if not path.exists():
+        print(f"MODEL_WEIGHTS_MMAP is set but {path} is missing; run 'python -m app.model.sharing convert'")
+        return None
+    return path
+
+def model_source() -> str:
+    """
+    가중치와 토크나이저를 함께 로드할 위치를 한 번만 결정
+    (mmap safetensors 디렉토리 -> MODEL_DIR -> FALLBACK_MODEL_NAME)
+
+    load_model()과 tokenization service가 모두 이 값을 사용하므로 둘이 다른 모델을 가리키지 않습니다.
+    """
+    global _model_source
+    if _model_source is None:
+        from pathlib import Path
+        path = mmap_weights_path()
+        if path is not None:
+            _model_source = str(path.parent)
+        elif (Path(settings.MODEL_DIR) / "config.json").exists():
+            _model_source = settings.MODEL_DIR
+        else:
+            # Fallback to pre-trained GoEmotions model from HuggingFace
+            _model_source = settings.FALLBACK_MODEL_NAME
+    return _model_source
+
+def load_tokenizer():
+    """모델 없이 토크나이저만 로드 (공용 tokenization service의 fast tokenizer)"""
+    return get_tokenization_service(model_source()).tokenizer
 
 def load_model():
-    global _model, _tokenizer
+    global _model
     if _model is None:
-        try:
-            # Try to load custom trained model first
+        from transformers import BertForSequenceClassification
+        device = get_device()
+        source = model_source()
+        path = mmap_weights_path()
+        if path is not None and str(path.parent) == source:
+            from app.model.sharing import load_model_mmap
+            _model = load_model_mmap(source, path).to(device)
+        else:
+            if source == settings.FALLBACK_MODEL_NAME:
+                print("Loading pre-trained GoEmotions model...")
             _model = BertForSequenceClassification.from_pretrained(
-                settings.MODEL_DIR, 
+                source,
                 num_labels=len(GOEMOTIONS_LABELS),
                 problem_type="multi_label_classification",
-            ).to(_device)
-            _tokenizer = BertTokenizer.from_pretrained(settings.MODEL_DIR)
-        except Exception:
-            # Fallback to pre-trained GoEmotions model from HuggingFace
-            print("Loading pre-trained GoEmotions model...")
-            _model = BertForSequenceClassification.from_pretrained(
-                "monologg/bert-base-cased-goemotions-original",
-                num_labels=len(GOEMOTIONS_LABELS),
-                problem_type="multi_label_classification",
-            ).to(_device)
-            _tokenizer = BertTokenizer.from_pretrained("monologg/bert-base-cased-goemotions-original")
+            ).to(device)
         _model.eval()
-    return _model, _tokenizer
+    return _model, load_tokenizer()
 
-def predict(text: str, threshold: float = None, topk: int = None) -> Tuple[List[Tuple[str, float]], List[float]]:
-    """원래 코드 로직을 사용한 감정 예측"""
-    threshold = settings.THRESHOLD if threshold is None else threshold
-    topk = settings.TOPK if topk is None else topk
+def release_model() -> None:
+    """torch 모델 참조를 해제 (ONNX export 후 메모리 회수용)"""
+    global _model
+    _model = None
 
-    model, tokenizer = load_model()
+def torch_logits(encoded: dict) -> np.ndarray:
+    """토크나이즈된 numpy 입력에 대해 torch 모델의 logits를 계산"""
+    import torch
 
-    # 원래 코드의 토크나이징 방식 사용
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        padding="max_length",
-        truncation=True,
-        max_length=settings.MAX_LEN,
-    ).to(_device)
-
-    model.eval()
+    model, _ = load_model()
+    inputs = {k: torch.from_numpy(v).to(get_device()) for k, v in encoded.items()}
     with torch.no_grad():
-        outputs = model(**inputs)
-        logits = outputs.logits
-        probs_tensor = torch.sigmoid(logits)
-        probs = probs_tensor.detach().cpu().numpy()[0]
+        logits = model(**inputs).logits
+    return logits.detach().cpu().numpy()
+
+def sigmoid(logits: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-logits.astype(np.float32)))
+
+def infer_batch(texts: List[str]) -> Tuple[np.ndarray, List[int], List[bool]]:
+    """
+    (N, 28) 확률 행렬과 각 텍스트의 원래 토큰 수, MAX_LEN 초과로 잘렸는지 여부를 반환
+
+    길이가 비슷한 텍스트끼리 BATCH_TOKEN_BUDGET 안에서 묶어 forward pass를 실행합니다.
+    """
+    from app.model.backends import get_backend
+    from app.model.bucketing import bucket_by_length
+
+    backend = get_backend()
+    tokens = get_tokenization_service(model_source())
+    encoded = tokens.encode(list(texts))
+
+    probs = np.zeros((len(encoded), len(GOEMOTIONS_LABELS)), dtype=np.float32)
+    lengths = [len(e.ids) for e in encoded]
+    for bucket in bucket_by_length(lengths, settings.BATCH_TOKEN_BUDGET):
+        inputs = tokens.pad([encoded[i] for i in bucket])
+        probs[bucket] = sigmoid(backend.predict_logits(inputs))
+    return probs, [e.raw_length for e in encoded], [e.truncated for e in encoded]
+
+def infer_rows(texts: List[str]) -> List[Tuple[np.ndarray, int, bool]]:
+    """MicroBatcher/executor용: 입력마다 (확률 벡터, 원래 토큰 수, 잘림 여부)"""
+    return list(zip(*infer_batch(texts)))
+
+def record_lengths(raw_lengths: List[int], truncated: List[bool]) -> None:
+    """길이 통계는 API 프로세스에서 기록 (process executor 워커가 아닌 곳)"""
+    from app.model.bucketing import get_length_stats
+
+    get_length_stats().record(raw_lengths, truncated)
+
+def predict_probs_batch(texts: List[str]) -> np.ndarray:
+    """
+    여러 텍스트를 batched forward pass로 처리하여 (N, 28) 확률 행렬을 반환
+    """
+    probs, raw_lengths, truncated = infer_batch(texts)
+    record_lengths(raw_lengths, truncated)
+    return probs
+
+def select_emotions(
+    probs: np.ndarray, threshold: Optional[float] = None, topk: Optional[int] = None
+) -> List[Tuple[str, float]]:
+    """확률 벡터 하나에서 threshold/topk 규칙으로 감정 라벨을 선택"""
+    threshold = settings.THRESHOLD if threshold is None else threshold
+    topk = settings.TOPK if topk is None else topk
+    probs = np.asarray(probs)
 
     # 원래 코드의 선택 로직
     if topk is not None:
@@ -66,4 +149,29 @@ def predict(text: str, threshold: float = None, topk: int = None) -> Tuple[List[
     selected = [(GOEMOTIONS_LABELS[i], float(probs[i])) for i in idxs]
     # Sort by confidence for consistency
     selected.sort(key=lambda x: x[1], reverse=True)
-    return selected, probs.tolist()
+    return selected
+
+def predict(
+    text: str, threshold: float = None, topk: int = None, cascade: bool = False
+) -> Tuple[List[Tuple[str, float]], List[float]]:
+    """
+    원래 코드 로직을 사용한 감정 예측
+
+    cascade=True이고 CASCADE_SMALL_MODEL_DIR이 설정되어 있으면 작은 모델이 먼저 답하고
+    불확실할 때만 전체 모델을 실행합니다 (app/model/cascade.py).
+    """
+    from app.model.prediction_cache import get_prediction_cache
+
+    if cascade:
+        from app.model.cascade import cascade_available, predict_cascade
+
+        if cascade_available():
+            probs, _ = predict_cascade(text, threshold, topk)
+            return select_emotions(probs, threshold, topk), probs.tolist()
+
+    cache = get_prediction_cache()
+    probs = cache.get(text)
+    if probs is None:
+        probs = predict_probs_batch([text])[0]
+        cache.set(text, probs)
+    return select_emotions(probs, threshold, topk), probs.tolist()
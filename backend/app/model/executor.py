@@ -0,0 +1,119 @@
+"""
+Pluggable executors for CPU-bound emotion inference
+
+torch forward pass를 이벤트 루프 밖에서 실행하여 /health, /diaries, /auth 등
+다른 엔드포인트가 추론 중에도 응답할 수 있도록 합니다.
+
+- ``thread``: 같은 프로세스의 스레드 풀 (모델 1개 공유, torch가 GIL을 해제)
+- ``process``: 워커 프로세스 풀, 각 워커가 시작 시 모델을 한 번 로드
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+class InferenceQueueFull(Exception):
+    """Raised when more inference requests are pending than INFERENCE_QUEUE_SIZE allows"""
+
+
+def _resolve_torch_threads(mode: str, workers: int, torch_threads: int) -> int:
+    if torch_threads > 0:
+        return torch_threads
+    if mode == "process":
+        # 워커끼리 코어를 나눠 쓰도록 기본값을 분배
+        return max(1, (os.cpu_count() or 1) // workers)
+    return 0
+
+
+def intra_op_threads() -> int:
+    """Intra-op thread count each inference worker should use (0 = library default)"""
+    return _resolve_torch_threads(
+        settings.INFERENCE_EXECUTOR, max(1, settings.INFERENCE_WORKERS), settings.INFERENCE_TORCH_THREADS
+    )
+
+
+def _set_torch_threads(torch_threads: int) -> None:
+    # ONNX 백엔드는 세션 옵션으로 스레드 수를 정하므로 torch를 import하지 않음
+    if torch_threads > 0 and settings.MODEL_BACKEND == "torch":
+        import torch
+
+        torch.set_num_threads(torch_threads)
+
+
+def _init_process_worker(torch_threads: int) -> None:
+    """Process pool initializer: configure threads and load the model once per worker"""
+    _set_torch_threads(torch_threads)
+    from app.model.backends import get_backend
+
+    get_backend()
+    logger.info(f"Inference worker {os.getpid()} ready (intra-op threads={torch_threads or 'default'})")
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class InferenceExecutor:
+    def __init__(self, mode: str = "thread", workers: int = 1, torch_threads: int = 0):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown inference executor '{mode}', expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.torch_threads = _resolve_torch_threads(mode, self.workers, torch_threads)
+        self._pool: Optional[Executor] = None
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(settings.INFERENCE_START_METHOD),
+                    initializer=_init_process_worker,
+                    initargs=(self.torch_threads,),
+                )
+            else:
+                _set_torch_threads(self.torch_threads)
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="inference"
+                )
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, fn, *args)
+
+    async def start(self) -> None:
+        """Spin up every worker ahead of the first request (process mode loads models here)"""
+        if self.mode != "process":
+            return
+        pids = await asyncio.gather(*(self.run(_noop) for _ in range(self.workers)))
+        logger.info(f"Inference process pool started: {sorted(set(pids))}")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executor: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    global _executor
+    if _executor is None:
+        _executor = InferenceExecutor(
+            mode=settings.INFERENCE_EXECUTOR,
+            workers=settings.INFERENCE_WORKERS,
+            torch_threads=settings.INFERENCE_TORCH_THREADS,
+        )
+    return _executor
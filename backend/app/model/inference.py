@@ -0,0 +1,126 @@
+"""
+Async entry point for emotion inference used by the API layer
+"""
+import asyncio
+import logging
+import random
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.readiness import READY, readiness
+from app.model.batcher import get_batcher, get_small_batcher
+from app.model.cascade import (
+    TIER_FULL,
+    TIER_SMALL,
+    cascade_available,
+    get_cascade_stats,
+    get_small_prediction_cache,
+    needs_escalation,
+    small_infer_rows,
+)
+from app.model.emotion_model import infer_rows, record_lengths, select_emotions
+from app.model.executor import InferenceQueueFull, get_inference_executor
+from app.model.prediction_cache import get_prediction_cache
+from app.model.warmup import ModelNotReady
+
+logger = logging.getLogger(__name__)
+
+_pending = 0
+_audit_tasks = set()
+
+
+def _check_capacity() -> None:
+    status = readiness.status("model")
+    if status != READY:
+        raise ModelNotReady(f"emotion model is {status}", status)
+    if _pending >= settings.INFERENCE_QUEUE_SIZE:
+        raise InferenceQueueFull(f"{_pending} inference requests already pending")
+
+
+async def _run_full(text: str) -> np.ndarray:
+    global _pending
+    _pending += 1
+    try:
+        if settings.BATCHING_ENABLED:
+            probs, raw_length, truncated = await get_batcher().submit(text)
+        else:
+            probs, raw_length, truncated = (await get_inference_executor().run(infer_rows, [text]))[0]
+    finally:
+        _pending -= 1
+    record_lengths([raw_length], [truncated])
+    get_prediction_cache().set(text, probs)
+    return probs
+
+
+async def _run_small(text: str) -> np.ndarray:
+    global _pending
+    cache = get_small_prediction_cache()
+    probs = cache.get(text)
+    if probs is not None:
+        return probs
+    _pending += 1
+    try:
+        if settings.BATCHING_ENABLED:
+            probs = await get_small_batcher().submit(text)
+        else:
+            probs = (await get_inference_executor().run(small_infer_rows, [text]))[0]
+    finally:
+        _pending -= 1
+    cache.set(text, probs)
+    return probs
+
+
+async def _audit(text: str, small_probs: np.ndarray, threshold: Optional[float], topk: Optional[int]) -> None:
+    """Small tier 답변을 전체 모델과 비교하여 라벨 일치율을 기록 (응답과 무관하게 백그라운드)"""
+    try:
+        full_probs = await _run_full(text)
+    except Exception as e:
+        logger.warning(f"Cascade audit skipped: {e}")
+        return
+    get_cascade_stats().record_audit(
+        [label for label, _ in select_emotions(small_probs, threshold, topk)],
+        [label for label, _ in select_emotions(full_probs, threshold, topk)],
+    )
+
+
+def _schedule_audit(text: str, small_probs: np.ndarray, threshold: Optional[float], topk: Optional[int]) -> None:
+    if settings.CASCADE_AUDIT_RATE <= 0 or random.random() >= settings.CASCADE_AUDIT_RATE:
+        return
+    # 감사 요청이 사용자 요청의 큐 자리를 빼앗지 않도록 절반 이상 차 있으면 건너뜀
+    if _pending >= settings.INFERENCE_QUEUE_SIZE // 2:
+        return
+    task = asyncio.get_running_loop().create_task(_audit(text, small_probs, threshold, topk))
+    _audit_tasks.add(task)
+    task.add_done_callback(_audit_tasks.discard)
+
+
+async def predict_async(
+    text: str,
+    threshold: Optional[float] = None,
+    topk: Optional[int] = None,
+    cascade: Optional[bool] = None,
+) -> Tuple[List[Tuple[str, float]], List[float], str]:
+    """
+    predict()와 같은 (selected, probs)에 답한 tier("small" | "full")를 더해 반환
+
+    요청들은 배치로 묶어 executor에서 처리합니다. cascade가 None이면 CASCADE_ENABLED를 따릅니다.
+    """
+    probs = get_prediction_cache().get(text)
+    if probs is not None:
+        return select_emotions(probs, threshold, topk), probs.tolist(), TIER_FULL
+
+    cascade = settings.CASCADE_ENABLED if cascade is None else cascade
+    _check_capacity()
+    if cascade and cascade_available():
+        small_probs = await _run_small(text)
+        escalate = needs_escalation(small_probs, threshold, topk)
+        get_cascade_stats().record(escalate)
+        if not escalate:
+            _schedule_audit(text, small_probs, threshold, topk)
+            return select_emotions(small_probs, threshold, topk), small_probs.tolist(), TIER_SMALL
+        _check_capacity()
+
+    probs = await _run_full(text)
+    return select_emotions(probs, threshold, topk), probs.tolist(), TIER_FULL
@@ -0,0 +1,112 @@
+"""
+Content-addressed cache for emotion probability vectors
+
+키는 (모델 식별자, 정규화된 분석 텍스트)의 sha256이며 값은 28개 라벨의 float32
+확률 벡터입니다. threshold/topk 선택은 조회 이후에 적용하므로 파라미터가 다른 요청들도
+같은 캐시 항목을 재사용합니다.
+
+- memory tier: 프로세스별 LRU (PREDICTION_CACHE_SIZE)
+- disk tier: PREDICTION_CACHE_DB가 설정되면 SQLite 파일 (재시작 후에도 유지, 워커 간 공유)
+"""
+import logging
+import re
+import unicodedata
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.core.cache import LRUCache, SQLiteStore, stable_digest
+from app.core.config import settings
+from app.nlp.labels import GOEMOTIONS_LABELS
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    # cased 모델이므로 대소문자는 유지하고 유니코드 형태와 공백만 정규화
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def model_identity() -> str:
+    """
+    Identifies the weights/backend/preprocessing that produced a probability vector
+
+    설정값이 아니라 실제로 로드되는 위치(model_source: mmap / MODEL_DIR / FALLBACK_MODEL_NAME)와
+    가중치 파일 stamp로 만들어서, 공유 PREDICTION_CACHE_DB에서 다른 모델의 확률을 돌려주지 않습니다.
+    """
+    from app.model.backends import backend_identity
+
+    return "|".join([backend_identity(), str(settings.MAX_LEN)])
+
+
+class PredictionCache:
+    def __init__(self, maxsize: int, db_path: Optional[str] = None, identity: Optional[str] = None):
+        self.memory = LRUCache(maxsize)
+        self.disk: Optional[SQLiteStore] = None
+        if db_path:
+            try:
+                self.disk = SQLiteStore(db_path, table="emotion_predictions")
+            except Exception as e:
+                logger.warning(f"Prediction cache disk tier disabled ({db_path}): {e}")
+        self._identity = identity
+        self.disk_hits = 0
+
+    @property
+    def identity(self) -> str:
+        # 처음 조회할 때 계산 (onnx backend는 warm-up에서 export된 파일의 stamp를 사용)
+        if self._identity is None:
+            self._identity = model_identity()
+        return self._identity
+
+    def key(self, text: str) -> str:
+        return stable_digest(self.identity, normalize_text(text))
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.key(text)
+        probs = self.memory.get(key)
+        if probs is not None or self.disk is None:
+            return probs
+        try:
+            blob = self.disk.get(key)
+        except Exception as e:
+            logger.warning(f"Prediction cache disk read failed: {e}")
+            return None
+        if blob is None:
+            return None
+        probs = np.frombuffer(blob, dtype=np.float32)
+        if probs.shape != (len(GOEMOTIONS_LABELS),):
+            return None
+        self.disk_hits += 1
+        self.memory.set(key, probs)
+        return probs
+
+    def set(self, text: str, probs: np.ndarray) -> None:
+        key = self.key(text)
+        probs = np.asarray(probs, dtype=np.float32)
+        self.memory.set(key, probs)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, probs.tobytes())
+            except Exception as e:
+                logger.warning(f"Prediction cache disk write failed: {e}")
+
+    def stats(self) -> Dict:
+        stats = self.memory.stats()
+        stats["disk_enabled"] = self.disk is not None
+        stats["disk_hits"] = self.disk_hits
+        return stats
+
+
+_prediction_cache: Optional[PredictionCache] = None
+
+
+def get_prediction_cache() -> PredictionCache:
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache(
+            maxsize=settings.PREDICTION_CACHE_SIZE,
+            db_path=settings.PREDICTION_CACHE_DB or None,
+        )
+    return _prediction_cache
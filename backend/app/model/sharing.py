@@ -0,0 +1,205 @@
+"""
+Sharing classifier weights across worker processes
+
+워커마다 from_pretrained로 ~420MB 가중치를 따로 올리지 않도록 두 가지 방법을 제공합니다.
+
+1. Memory-mapped safetensors (MODEL_WEIGHTS_MMAP=true)
+   safetensors 파일을 MAP_PRIVATE로 mmap하고 텐서가 그 페이지를 직접 가리키게 합니다.
+   가중치는 읽기만 하므로 모든 워커가 같은 page cache 페이지를 공유합니다.
+   (uvicorn --workers, process executor 모두 적용)
+
+2. Pre-fork loading (MODEL_PRELOAD=true + gunicorn --preload)
+   master 프로세스에서 모델을 한 번 로드한 뒤 fork하여 워커들이 copy-on-write로 공유합니다.
+
+Usage:
+    python -m app.model.sharing convert            # 현재 모델을 model.safetensors로 저장
+    python -m app.model.sharing memory <pid> ...   # 프로세스별 RSS/PSS/USS 측정
+    python -m app.model.sharing memory --children-of <master pid>
+"""
+import argparse
+import gc
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# safetensors dtype 문자열 -> torch dtype 이름
+_SAFETENSORS_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+# mmap 객체는 텐서가 살아있는 동안 유지되어야 함
+_mapped_files: List[mmap.mmap] = []
+
+
+def safetensors_path() -> Path:
+    if settings.MODEL_SAFETENSORS_PATH:
+        return Path(settings.MODEL_SAFETENSORS_PATH)
+    return Path(settings.MODEL_DIR) / "model.safetensors"
+
+
+def load_mmap_state_dict(path: Path) -> Dict:
+    """
+    Parse a safetensors file and return tensors that point into a private mmap.
+
+    Format: 8-byte little-endian header size, JSON header with
+    dtype/shape/data_offsets per tensor, then the raw data block.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        # ACCESS_COPY(MAP_PRIVATE): 쓰기 전까지는 page cache를 그대로 공유
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    _mapped_files.append(mapped)
+
+    data_start = 8 + header_size
+    state_dict = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        begin, end = info["data_offsets"]
+        count = (end - begin) // torch.tensor([], dtype=dtype).element_size()
+        tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + begin)
+        state_dict[name] = tensor.reshape(info["shape"])
+    return state_dict
+
+
+def load_model_mmap(model_dir: str, path: Path):
+    """Build BertForSequenceClassification whose parameters live in the mmapped file"""
+    from transformers import BertConfig, BertForSequenceClassification
+    from app.nlp.labels import GOEMOTIONS_LABELS
+
+    config = BertConfig.from_pretrained(
+        model_dir,
+        num_labels=len(GOEMOTIONS_LABELS),
+        problem_type="multi_label_classification",
+    )
+    model = BertForSequenceClassification(config)
+    state_dict = load_mmap_state_dict(path)
+    # assign=True: 새로 할당한 랜덤 초기화 텐서를 mmap 텐서로 교체 (복사하지 않음)
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    if result.missing_keys:
+        logger.warning(f"mmap state dict is missing keys: {result.missing_keys}")
+    del state_dict
+    gc.collect()
+    logger.info(f"Loaded classifier weights from memory-mapped {path}")
+    return model
+
+
+def convert_to_safetensors(path: Optional[Path] = None) -> Path:
+    """Save the currently configured model's weights as a single safetensors file"""
+    from safetensors.torch import save_file
+    from app.model.emotion_model import load_model
+
+    path = Path(path or safetensors_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    model, tokenizer = load_model()
+    state_dict = {k: v.detach().cpu().contiguous() for k, v in model.state_dict().items()}
+    save_file(state_dict, str(path), metadata={"format": "pt"})
+    # config/tokenizer도 같은 디렉토리에 두어 MODEL_DIR로 바로 로드 가능하게 함
+    model.config.save_pretrained(str(path.parent))
+    tokenizer.save_pretrained(str(path.parent))
+    logger.info(f"Wrote {path}")
+    return path
+
+
+def preload_for_fork() -> None:
+    """
+    Load the model in the pre-fork master so workers share its pages copy-on-write.
+
+    Forward passes are deliberately not run here: using torch's intra-op thread
+    pool before fork() can deadlock the children. gc.freeze() moves the loaded
+    objects out of the GC generations so collections in the workers do not
+    touch (and copy) their pages.
+    """
+    from app.model.backends import get_backend
+
+    get_backend()
+    gc.freeze()
+    logger.info(f"Model preloaded in master process {os.getpid()}")
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, int]:
+    """
+    RSS, PSS and USS (unique set size = private pages) in KiB from /proc.
+
+    USS is what a worker really adds; shared model pages show up in PSS split
+    across the processes that map them.
+    """
+    pid = pid or os.getpid()
+    fields = {"Rss": "rss_kb", "Pss": "pss_kb", "Shared_Clean": "shared_clean_kb",
+              "Shared_Dirty": "shared_dirty_kb", "Private_Clean": "private_clean_kb",
+              "Private_Dirty": "private_dirty_kb"}
+    usage = {"pid": pid}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = int(rest.split()[0])
+    except OSError:
+        # smaps_rollup이 없는 환경 (비 Linux 등)
+        return usage
+    usage["uss_kb"] = usage.get("private_clean_kb", 0) + usage.get("private_dirty_kb", 0)
+    return usage
+
+
+def child_pids(parent: int) -> List[int]:
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # pid (comm) state ppid ...; comm may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared model weights utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="write model.safetensors for MODEL_WEIGHTS_MMAP")
+    convert.add_argument("--output", default=None)
+    memory = sub.add_parser("memory", help="report RSS/PSS/USS per process")
+    memory.add_argument("pids", nargs="*", type=int)
+    memory.add_argument("--children-of", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "convert":
+        print(f"safetensors written: {convert_to_safetensors(args.output)}")
+        return
+
+    pids = list(args.pids)
+    if args.children_of:
+        pids += [args.children_of] + child_pids(args.children_of)
+    for usage in (process_memory(pid) for pid in (pids or [os.getpid()])):
+        print(json.dumps(usage))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Background model loading and warm-up
+
+서버는 즉시 /health에 응답하고, 모델 로드와 몇 번의 dummy forward pass는 백그라운드에서
+진행됩니다. 준비가 끝나기 전의 /analyze 요청은 503 + Retry-After를 받습니다.
+warm-up이 실패하면 지수 backoff로 다시 시도하며, 실패 상태(FAILED) 동안의 503에는 Retry-After를
+붙이지 않습니다 (언제 준비될지 알 수 없음).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.readiness import FAILED, READY, WARMING, readiness
+from app.model.executor import get_inference_executor
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TOKEN_LENGTHS = (8, 32, 128)
+# 실패 후 재시도 간격: 5s, 10s, 20s, ... 최대 5분
+WARMUP_RETRY_INITIAL_S = 5.0
+WARMUP_RETRY_MAX_S = 300.0
+
+
+class ModelNotReady(Exception):
+    """Raised when inference is requested before the model finished warming up"""
+
+    def __init__(self, message: str, status: str = WARMING):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retry_after(self) -> Optional[int]:
+        """Retry-After 초 (warm-up이 실패해서 재시도 대기 중이면 None)"""
+        return None if self.status == FAILED else 5
+
+
+def warmup_model() -> float:
+    """Load the backend and run dummy forward passes across sequence lengths"""
+    from app.model.cascade import cascade_available, small_infer_batch
+    from app.model.emotion_model import infer_batch
+
+    started = time.time()
+    passes = [infer_batch]
+    if cascade_available():
+        passes.append(small_infer_batch)
+    lengths = sorted(set(WARMUP_TOKEN_LENGTHS + (settings.MAX_LEN,)))
+    for length in lengths:
+        # "hello"는 토큰 1개이므로 대략 해당 길이의 시퀀스를 만든다
+        text = " ".join(["hello"] * max(1, length - 2))
+        for run in passes:
+            run([text])
+            run([text] * min(4, settings.BATCH_MAX_SIZE))
+    elapsed = time.time() - started
+    logger.info(f"Emotion model warmed up in {elapsed:.1f}s (pid {os.getpid()})")
+    return elapsed
+
+
+async def warm_up_in_background() -> None:
+    executor = get_inference_executor()
+    delay = WARMUP_RETRY_INITIAL_S
+    attempt = 1
+    while True:
+        readiness.mark("model", WARMING, f"loading {settings.MODEL_BACKEND} backend (attempt {attempt})")
+        try:
+            await executor.start()
+            # 워커마다 한 번씩 (process 모드에서 모든 워커가 예열되도록)
+            await asyncio.gather(*(executor.run(warmup_model) for _ in range(executor.workers)))
+            readiness.mark("model", READY, settings.MODEL_BACKEND)
+            return
+        except Exception as e:
+            logger.error(f"Emotion model warm-up failed (attempt {attempt}), retrying in {delay:.0f}s: {e}")
+            readiness.mark("model", FAILED, f"{e} (retrying in {delay:.0f}s)")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX_S)
+        attempt += 1
@@ -1,14 +1,92 @@
-from transformers import BertTokenizer
+"""
+Unified tokenization service
+
+모델과 같은 위치(app.model.emotion_model.model_source(), cascade는 CASCADE_SMALL_MODEL_DIR)에서
+Rust 기반 fast tokenizer를 한 번만 로드하고, 최근 텍스트의 인코딩 결과를 캐시합니다.
+토크나이저만 다른 모델로 폴백하지 않습니다 (어휘가 가중치와 어긋나므로 로드 실패는 그대로 오류).
+"""
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.core.cache import LRUCache
 from app.core.config import settings
 
-_tokenizer = None
+
+class EncodedText(NamedTuple):
+    ids: List[int]  # [CLS] tokens [SEP], MAX_LEN 이하로 잘린 결과
+    raw_length: int  # special token 제외, 자르기 전 토큰 수
+    truncated: bool
+
+
+class TokenizationService:
+    def __init__(self, tokenizer, max_len: int, cache_size: int = 2048):
+        self.tokenizer = tokenizer
+        self.max_len = max_len
+        self.cache = LRUCache(cache_size)
+        self.pad_token_id = tokenizer.pad_token_id or 0
+
+    def encode(self, texts: List[str]) -> List[EncodedText]:
+        """Tokenize without padding; cached texts skip the tokenizer entirely"""
+        results: List[Optional[EncodedText]] = [self.cache.get(text) for text in texts]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            miss_texts = [texts[i] for i in misses]
+            # fast tokenizer는 배치 입력을 Rust 쪽에서 병렬 처리
+            raw_ids = self.tokenizer(miss_texts, add_special_tokens=False, truncation=False)["input_ids"]
+            # BERT 단일 문장 입력: [CLS] tokens [SEP]
+            limit = self.max_len - 2
+            cls_id, sep_id = self.tokenizer.cls_token_id, self.tokenizer.sep_token_id
+            for i, text, ids in zip(misses, miss_texts, raw_ids):
+                encoded = EncodedText([cls_id] + ids[:limit] + [sep_id], len(ids), len(ids) > limit)
+                self.cache.set(text, encoded)
+                results[i] = encoded
+        return results
+
+    def pad(self, encoded: List[EncodedText]) -> Dict[str, np.ndarray]:
+        """배치 안에서 가장 긴 시퀀스 길이까지만 padding (dynamic padding)"""
+        longest = max(len(e.ids) for e in encoded)
+        input_ids = np.full((len(encoded), longest), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encoded), longest), dtype=np.int64)
+        for row, e in enumerate(encoded):
+            input_ids[row, :len(e.ids)] = e.ids
+            attention_mask[row, :len(e.ids)] = 1
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids),
+        }
+
+    def encode_many(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Encode a batch into padded int64 numpy arrays ready for the model"""
+        return self.pad(self.encode(texts))
+
+
+def _load_fast_tokenizer(model_dir: str):
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+
+
+_services: Dict[str, TokenizationService] = {}
+_lock = threading.Lock()
+
+
+def get_tokenization_service(model_dir: Optional[str] = None) -> TokenizationService:
+    if model_dir is None:
+        from app.model.emotion_model import model_source
+
+        model_dir = model_source()
+    with _lock:
+        if model_dir not in _services:
+            _services[model_dir] = TokenizationService(
+                _load_fast_tokenizer(model_dir),
+                max_len=settings.MAX_LEN,
+                cache_size=settings.TOKENIZER_CACHE_SIZE,
+            )
+        return _services[model_dir]
+
 
 def get_tokenizer():
-    global _tokenizer
-    if _tokenizer is None:
-        try:
-            _tokenizer = BertTokenizer.from_pretrained(settings.MODEL_DIR)
-        except Exception:
-            # Fallback to base model if custom model not found
-            _tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
-    return _tokenizer
+    return get_tokenization_service().tokenizer
@@ -0,0 +1,292 @@
+"""
+Local track catalog with vectorized nearest-neighbour lookup
+
+트랙 id/메타데이터와 audio feature(valence, energy, danceability)를 numpy 배열로 들고 있다가
+aggregate_targets의 target 벡터와 가장 가까운 트랙 k개를 찾습니다 (수만 곡 기준 1ms 미만).
+TRACK_CATALOG_PATH가 설정되어 있으면 /recommend는 Spotify 대신 이 카탈로그로 응답하고,
+Spotify는 ingest(갱신) 작업에서만 사용합니다.
+
+파일 형식:
+- JSON: 트랙 객체 리스트 또는 {"tracks": [...]}
+- CSV: id,name,artists(';'로 구분),album,preview_url,spotify_url,image_url,duration_ms,
+  popularity,explicit,valence,energy,danceability
+
+Usage:
+    python -m app.recommend.catalog ingest data/catalog.json            # Spotify 검색 + audio features
+    python -m app.recommend.catalog ingest data/catalog.json --merge    # 기존 카탈로그에 추가/갱신
+    python -m app.recommend.catalog nearest data/catalog.json --valence 0.8 --energy 0.7 -k 10
+"""
+import argparse
+import csv
+import json
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.recommend.features import FEATURE_KEYS, feature_vector, weight_vector
+from app.recommend.recent import RotatingBloomFilter, exclude_recent
+
+logger = logging.getLogger(__name__)
+
+METADATA_KEYS = (
+    "id", "name", "artists", "album", "preview_url", "external_urls",
+    "image_url", "duration_ms", "popularity", "explicit",
+)
+
+
+def _metadata(record: Dict[str, Any]) -> Dict[str, Any]:
+    row = {k: record.get(k) for k in METADATA_KEYS}
+    # TrackInfo 스키마 기본값과 맞춤 (name/album은 필수 str이므로 손으로 만든 JSON/CSV에 없으면 "")
+    row["name"] = row["name"] or ""
+    row["album"] = row["album"] or ""
+    row["artists"] = row["artists"] or []
+    row["external_urls"] = row["external_urls"] or {}
+    row["popularity"] = row["popularity"] or 0
+    row["explicit"] = bool(row["explicit"])
+    return row
+
+
+class TrackCatalog:
+    def __init__(self, records: List[Dict[str, Any]]):
+        records = [r for r in records if r.get("id") and all(r.get(k) is not None for k in FEATURE_KEYS)]
+        self.ids = np.array([r["id"] for r in records], dtype=object)
+        self.features = (
+            np.stack([feature_vector(r) for r in records])
+            if records else np.zeros((0, len(FEATURE_KEYS)), dtype=np.float32)
+        )
+        # 열 단위(contiguous) 복사본: feature마다 한 번씩 in-place 연산하면 (N, F) 임시 배열이 필요 없음
+        self._columns = np.ascontiguousarray(self.features.T)
+        self.metadata = [_metadata(r) for r in records]
+        self.index = {track_id: i for i, track_id in enumerate(self.ids)}
+        self.weights = weight_vector()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nearest(
+        self, target: Dict[str, float], k: int = 10, exclude: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """target에 가까운 순서로 최대 k개 트랙 (metadata + audio features + distance)"""
+        if len(self) == 0 or k <= 0:
+            return []
+        distances = self.distances(target)
+        if exclude:
+            excluded = [self.index[t] for t in exclude if t in self.index]
+            distances[excluded] = np.inf
+        k = min(k, len(self))
+        # 전체 정렬 대신 argpartition으로 k개만 고른 뒤 그 안에서 정렬
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return [self._row(i, distances[i]) for i in top if np.isfinite(distances[i])]
+
+    def distances(self, target: Dict[str, float]) -> np.ndarray:
+        """모든 트랙과 target 사이의 가중 거리 제곱 (features.weighted_distances와 같은 값)"""
+        target_vec = feature_vector(target)
+        distances = np.zeros(len(self), dtype=np.float32)
+        scratch = np.empty(len(self), dtype=np.float32)
+        for column, value, weight in zip(self._columns, target_vec, self.weights):
+            np.subtract(column, value, out=scratch)
+            np.multiply(scratch, scratch, out=scratch)
+            scratch *= weight
+            distances += scratch
+        return distances
+
+    def _row(self, i: int, distance: float) -> Dict[str, Any]:
+        row = dict(self.metadata[i])
+        row.update({k: float(v) for k, v in zip(FEATURE_KEYS, self.features[i])})
+        row["distance"] = float(distance)
+        return row
+
+    def recommend(
+        self,
+        target: Dict[str, float],
+        limit: int,
+        seed_genres: Optional[List[str]] = None,
+        pool_factor: Optional[int] = None,
+        recent: Optional[RotatingBloomFilter] = None,
+    ) -> Dict[str, Any]:
+        """
+        get_recommendations()와 같은 형태의 결과
+
+        매번 같은 곡만 나오지 않도록 가까운 limit * pool_factor개 중에서 limit개를 뽑고
+        거리 순으로 정렬합니다. recent(사용자의 최근 추천 filter)에 있는 트랙은 가능하면 제외합니다.
+        """
+        pool_factor = settings.TRACK_CATALOG_POOL_FACTOR if pool_factor is None else pool_factor
+        pool = exclude_recent(self.nearest(target, limit * max(1, pool_factor)), recent, limit)
+        tracks = sorted(random.sample(pool, min(limit, len(pool))), key=lambda t: t["distance"])
+        return {
+            "tracks": tracks,
+            "total": len(tracks),
+            "seeds": {"genres": seed_genres or [], "queries": []},
+            "parameters": {
+                "source": "catalog",
+                "catalog_size": len(self),
+                "limit": limit,
+                **{f"target_{k}": target.get(k) for k in FEATURE_KEYS},
+            },
+        }
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [self._row(i, 0.0) for i in range(len(self))]
+
+    def save(self, path: str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = self.records()
+        for r in records:
+            r.pop("distance", None)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time.time(), "tracks": records}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "TrackCatalog":
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            return cls(_read_csv(path))
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["tracks"] if isinstance(data, dict) else data)
+
+
+def _read_csv(path: Path) -> List[Dict[str, Any]]:
+    def number(value: Optional[str], cast=float):
+        return cast(value) if value not in (None, "") else None
+
+    records = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            records.append({
+                "id": row.get("id"),
+                "name": row.get("name"),
+                "artists": [a.strip() for a in (row.get("artists") or "").split(";") if a.strip()],
+                "album": row.get("album"),
+                "preview_url": row.get("preview_url") or None,
+                "external_urls": {"spotify": row["spotify_url"]} if row.get("spotify_url") else {},
+                "image_url": row.get("image_url") or None,
+                "duration_ms": number(row.get("duration_ms"), int),
+                "popularity": number(row.get("popularity"), int) or 0,
+                "explicit": (row.get("explicit") or "").lower() in ("1", "true", "yes"),
+                **{k: number(row.get(k)) for k in FEATURE_KEYS},
+            })
+    return records
+
+
+def default_ingest_queries() -> List[str]:
+    """추천 경로에서 쓰는 어휘: 감정별 장르 seed + 감정/다양성 검색어"""
+    from app.recommend.emotion_map import EMOTION_TO_SPOTIFY
+    from app.services.spotify import VARIETY_TERMS
+
+    mood_terms = [
+        "happy", "uplifting", "cheerful", "joyful", "sad", "melancholy", "emotional", "mellow",
+        "calm", "peaceful", "relaxed", "upbeat", "energetic", "dance", "party",
+        "slow", "acoustic", "ambient", "chill",
+    ]
+    seeds = [seed for data in EMOTION_TO_SPOTIFY.values() for seed in data["seeds"]]
+    return list(dict.fromkeys(seeds + mood_terms + VARIETY_TERMS))
+
+
+def ingest_from_spotify(
+    queries: List[str], per_query: int = 50, existing: Optional[TrackCatalog] = None
+) -> TrackCatalog:
+    """
+    Spotify 검색으로 트랙을 모으고 audio features를 100개씩 받아 카탈로그를 만듦
+
+    백그라운드 우선순위로 실행되므로 같은 rate limit 예산을 쓰는 서버의 사용자 요청을 밀어내지 않음
+    """
+    from app.services.spotify import _track_to_dict, get_spotify
+    from app.services.spotify_ratelimit import background_priority
+
+    with background_priority():
+        return _ingest(get_spotify(), _track_to_dict, queries, per_query, existing)
+
+
+def _ingest(sp, track_to_dict, queries: List[str], per_query: int, existing: Optional[TrackCatalog]) -> TrackCatalog:
+    tracks: Dict[str, Dict[str, Any]] = {r["id"]: r for r in (existing.records() if existing else [])}
+    fetched: List[str] = []
+    for query in queries:
+        try:
+            items = sp.search(q=query, type="track", limit=min(50, per_query))["tracks"]["items"]
+        except Exception as e:
+            logger.warning(f"Catalog search failed for '{query}': {e}")
+            continue
+        for item in items:
+            if item.get("id"):
+                tracks[item["id"]] = {**tracks.get(item["id"], {}), **track_to_dict(item)}
+                fetched.append(item["id"])
+
+    fetched = list(dict.fromkeys(fetched))
+    for start in range(0, len(fetched), 100):
+        chunk = fetched[start:start + 100]
+        try:
+            features = sp.audio_features(chunk) or []
+        except Exception as e:
+            logger.warning(f"Audio features request failed for {len(chunk)} tracks: {e}")
+            continue
+        for item in features:
+            if item and item.get("id") in tracks:
+                tracks[item["id"]].update({k: item.get(k) for k in FEATURE_KEYS})
+    logger.info(f"Ingested {len(fetched)} tracks from {len(queries)} queries")
+    return TrackCatalog(list(tracks.values()))
+
+
+_catalog: Optional[TrackCatalog] = None
+_catalog_loaded = False
+
+
+def get_catalog() -> Optional[TrackCatalog]:
+    """TRACK_CATALOG_PATH의 카탈로그 (설정되지 않았거나 없으면 None)"""
+    global _catalog, _catalog_loaded
+    if not _catalog_loaded:
+        _catalog_loaded = True
+        path = settings.TRACK_CATALOG_PATH
+        if path and Path(path).exists():
+            try:
+                _catalog = TrackCatalog.load(path)
+                logger.info(f"Loaded track catalog with {len(_catalog)} tracks from {path}")
+            except Exception as e:
+                logger.error(f"Failed to load track catalog {path}: {e}")
+        elif path:
+            logger.warning(f"TRACK_CATALOG_PATH {path} does not exist; using Spotify search")
+    return _catalog
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local track catalog")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="build/refresh the catalog from Spotify")
+    ingest.add_argument("output")
+    ingest.add_argument("--query", action="append", default=None, help="search query (repeatable)")
+    ingest.add_argument("--per-query", type=int, default=50)
+    ingest.add_argument("--merge", action="store_true", help="keep tracks already in the output file")
+    nearest = sub.add_parser("nearest", help="print the k nearest tracks to a target")
+    nearest.add_argument("catalog")
+    for key in FEATURE_KEYS:
+        nearest.add_argument(f"--{key}", type=float, default=0.5)
+    nearest.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "ingest":
+        existing = TrackCatalog.load(args.output) if args.merge and Path(args.output).exists() else None
+        catalog = ingest_from_spotify(args.query or default_ingest_queries(), args.per_query, existing)
+        catalog.save(args.output)
+        print(f"Catalog saved: {args.output} ({len(catalog)} tracks)")
+        return
+
+    catalog = TrackCatalog.load(args.catalog)
+    target = {k: getattr(args, k) for k in FEATURE_KEYS}
+    started = time.perf_counter()
+    rows = catalog.nearest(target, args.k)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for row in rows:
+        print(f"{row['distance']:.4f}  {row['id']}  {row['name']} - {', '.join(row['artists'] or [])}")
+    print(f"{len(rows)} of {len(catalog)} tracks in {elapsed_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Request coalescing + short-lived candidate cache for live /recommend
+
+많은 사용자가 거의 같은 감정 조합(예: joy 0.8 / gratitude 0.2)을 보내므로 aggregate_targets의 target을
+RECOMMEND_SIGNATURE_STEP 단위로 양자화하고 seed 목록과 합쳐 signature를 만듭니다.
+
+- 같은 signature의 동시 요청은 하나의 live 검색(get_recommendations_async)을 함께 기다림 (single-flight)
+- 그 결과(limit * RECOMMEND_CANDIDATE_FACTOR개의 후보)는 RECOMMEND_CACHE_TTL_S 동안 캐시
+- 각 요청은 공유 후보에서 limit개를 무작위로 뽑아 후보 순서(target 거리 순)대로 반환하므로
+  사용자마다 다른 곡이 나올 수 있음
+
+푸시 알림 직후처럼 요청이 몰려도 Spotify 검색은 signature당 한 번입니다.
+"""
+import logging
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.recommend.features import FEATURE_KEYS
+from app.recommend.recent import RotatingBloomFilter, exclude_recent
+
+logger = logging.getLogger(__name__)
+
+
+def quantize(value: float, step: float) -> float:
+    return round(round(value / step) * step, 6) if step > 0 else value
+
+
+def signature(
+    target: Dict[str, float], seeds: List[str], limit: int, step: Optional[float] = None
+) -> Tuple[Tuple[float, ...], Tuple[str, ...], int]:
+    """(양자화된 target, seed 목록, limit); seed 순서는 검색어 순서에 영향이 없으므로 정렬"""
+    step = settings.RECOMMEND_SIGNATURE_STEP if step is None else step
+    quantized = tuple(quantize(target[k], step) for k in FEATURE_KEYS if target.get(k) is not None)
+    return quantized, tuple(sorted(seeds)), limit
+
+
+class CandidateSetCache:
+    def __init__(self, maxsize: int, ttl: float, candidate_factor: int):
+        self.entries = LRUCache(maxsize, ttl=ttl)
+        self.candidate_factor = max(1, candidate_factor)
+        self._flights = SingleFlight()
+        self.computed = 0
+        self.not_cached = 0
+
+    async def _compute(self, key, seeds: List[str], limit: int) -> Dict[str, Any]:
+        from app.services.spotify import get_recommendations_async
+
+        quantized, _, _ = key
+        target = dict(zip(FEATURE_KEYS, quantized))
+        self.computed += 1
+        result = await get_recommendations_async(
+            seed_genres=seeds,
+            limit=limit * self.candidate_factor,
+            target_valence=target.get("valence"),
+            target_energy=target.get("energy"),
+            target_danceability=target.get("danceability"),
+        )
+        # rate limit으로 후보가 부족한 결과는 캐시하지 않음 (다음 요청이 다시 시도)
+        if not result["parameters"].get("rate_limited") and result["total"] >= limit:
+            self.entries.set(key, result)
+        else:
+            self.not_cached += 1
+        return result
+
+    async def candidates(self, target: Dict[str, float], seeds: List[str], limit: int) -> Tuple[Dict[str, Any], str]:
+        """(공유 후보 결과, "hit" | "miss" | "coalesced")"""
+        key = signature(target, seeds, limit)
+        cached = self.entries.get(key)
+        if cached is not None:
+            return cached, "hit"
+        status = "coalesced" if key in self._flights else "miss"
+        return await self._flights.do(key, lambda: self._compute(key, seeds, limit)), status
+
+    async def recommend(
+        self, target: Dict[str, float], seeds: List[str], limit: int, recent: Optional[RotatingBloomFilter] = None
+    ) -> Dict[str, Any]:
+        """
+        get_recommendations_async()와 같은 형태; 후보 중 limit개를 무작위로 골라 후보 순서대로
+        (사용자의 recent filter에 있는 트랙은 가능하면 제외)
+        """
+        shared, status = await self.candidates(target, seeds, limit)
+        candidates = exclude_recent(shared["tracks"], recent, limit)
+        picked = sorted(random.sample(range(len(candidates)), min(limit, len(candidates))))
+        return {
+            **shared,
+            "tracks": [candidates[i] for i in picked],
+            "total": len(picked),
+            "parameters": {
+                **shared["parameters"],
+                "limit": limit,
+                "candidates": len(shared["tracks"]),
+                "candidate_cache": status,
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.entries.stats()
+        stats.update({
+            "computed": self.computed,
+            "not_cached": self.not_cached,
+            "singleflight": self._flights.stats(),
+        })
+        return stats
+
+
+_candidate_cache: Optional[CandidateSetCache] = None
+
+
+def get_candidate_set_cache() -> CandidateSetCache:
+    global _candidate_cache
+    if _candidate_cache is None:
+        _candidate_cache = CandidateSetCache(
+            maxsize=settings.RECOMMEND_CACHE_SIZE,
+            ttl=settings.RECOMMEND_CACHE_TTL_S,
+            candidate_factor=settings.RECOMMEND_CANDIDATE_FACTOR,
+        )
+    return _candidate_cache
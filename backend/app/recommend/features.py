@@ -0,0 +1,61 @@
+"""
+Audio-feature vectors shared by the catalog index and candidate re-ranking
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# aggregate_targets가 계산하는 target의 순서와 같음
+FEATURE_KEYS = ("valence", "energy", "danceability")
+
+# valence가 감정과 가장 직접적으로 연결되므로 가중치를 조금 더 줌
+DEFAULT_FEATURE_WEIGHTS = {"valence": 1.5, "energy": 1.0, "danceability": 0.75}
+
+
+def feature_vector(features: Mapping[str, float], keys: Sequence[str] = FEATURE_KEYS) -> np.ndarray:
+    """dict -> (len(keys),) float32; 없는 항목은 중간값 0.5"""
+    values = [features.get(k) for k in keys]
+    return np.array([0.5 if v is None else float(v) for v in values], dtype=np.float32)
+
+
+def weight_vector(weights: Optional[Mapping[str, float]] = None, keys: Sequence[str] = FEATURE_KEYS) -> np.ndarray:
+    weights = DEFAULT_FEATURE_WEIGHTS if weights is None else weights
+    return np.array([float(weights.get(k, 1.0)) for k in keys], dtype=np.float32)
+
+
+def weighted_distances(
+    matrix: np.ndarray, target: np.ndarray, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """(N, F) feature 행렬의 각 행과 target 사이의 가중 유클리드 거리 제곱 (N,)"""
+    diff = matrix - target
+    if weights is None:
+        weights = weight_vector()
+    return (diff * diff) @ weights
+
+
+def target_distances(
+    rows: Sequence[Mapping[str, float]], target: Dict[str, float],
+    weights: Optional[Mapping[str, float]] = None,
+) -> np.ndarray:
+    """audio feature dict 목록과 aggregate_targets의 target 사이 거리"""
+    if not rows:
+        return np.zeros(0, dtype=np.float32)
+    matrix = np.stack([feature_vector(r) for r in rows])
+    return weighted_distances(matrix, feature_vector(target), weight_vector(weights))
+
+
+def rerank_by_target(
+    tracks: List[Dict[str, Any]],
+    features_by_id: Mapping[str, Optional[Mapping[str, float]]],
+    target: Dict[str, float],
+) -> List[Dict[str, Any]]:
+    """
+    target에 가까운 순서로 트랙 정렬
+
+    target에 없는 feature는 가중치 0으로 두고, audio features가 없는 트랙은 원래 순서대로 뒤에 둡니다.
+    """
+    weights = {k: (DEFAULT_FEATURE_WEIGHTS[k] if target.get(k) is not None else 0.0) for k in FEATURE_KEYS}
+    scored = [t for t in tracks if features_by_id.get(t["id"])]
+    unscored = [t for t in tracks if not features_by_id.get(t["id"])]
+    distances = target_distances([features_by_id[t["id"]] for t in scored], target, weights)
+    return [scored[i] for i in np.argsort(distances, kind="stable")] + unscored
@@ -0,0 +1,423 @@
+"""
+Per-emotion candidate pools warmed by a background job
+
+EMOTION_TO_SPOTIFY의 라벨은 28개뿐이고 seed도 고정되어 있으므로, /recommend마다 Spotify를 검색하는 대신
+라벨별(그리고 자주 요청되는 상위 2개 라벨 쌍별)로 수백 곡의 후보(audio features 포함)를 미리 모아 둡니다.
+
+- 백그라운드 warmer가 CANDIDATE_POOL_REFRESH_S마다 pool을 갱신 (rate limit 백그라운드 우선순위)
+  새로 검색한 트랙을 앞에 두고 기존 트랙으로 채워서 CANDIDATE_POOL_SIZE개를 유지 (rotating)
+- /recommend는 요청의 감정 확률에 비례하여 각 pool에서 후보를 뽑고 target 거리로 정렬 (Spotify 호출 없음)
+- pool이 아직 없거나 확률 질량의 절반 이상을 덮지 못하면 기존 live 검색으로 fallback
+- audio features를 받지 못한 트랙도 pool에 두고 정렬할 때 뒤로 보냄; 갱신이 실패하거나 빈 결과면
+  그 pool은 지수 backoff 후에 다시 시도 (장애 중에 매 주기마다 모든 검색을 반복하지 않도록)
+- CANDIDATE_POOL_DB가 설정되면 pool을 SQLite에 저장: 재시작 후에도 바로 사용하고, 같은 파일을 쓰는
+  다른 worker가 최근에 갱신한 pool은 다시 검색하지 않고 가져옴 (warmer 주기마다 thread에서 읽음;
+  /recommend는 메모리의 pool만 사용)
+
+Spotify 트래픽은 사용자 트래픽과 무관하게 (라벨 수 + 쌍 수) x 갱신 주기로 정해집니다.
+"""
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.cache import SQLiteStore
+from app.core.config import settings
+from app.core.readiness import DISABLED, FAILED, READY, WARMING, readiness
+from app.recommend.emotion_map import EMOTION_TO_SPOTIFY
+from app.recommend.features import FEATURE_KEYS, rerank_by_target
+from app.recommend.recent import RotatingBloomFilter, exclude_recent
+from app.recommend.targets import LABEL_INDEX, LABEL_SEEDS, aggregate_selected
+
+logger = logging.getLogger(__name__)
+
+# pool이 덮는 확률 질량이 이보다 작으면 live 검색 사용
+MIN_COVERAGE = 0.5
+# 쌍 pool은 두 라벨의 seed를 앞에서부터 이만큼씩 사용
+PAIR_SEEDS_PER_LABEL = 2
+# 검색마다 offset을 무작위로 골라 갱신할 때마다 다른 트랙이 들어오도록
+SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_OFFSET = 500
+# 이미 있는 pool은 갱신마다 이 비율만큼만 새 트랙으로 교체 (나머지는 기존 트랙 중 최근 것)
+ROTATE_FRACTION = 0.5
+# warmer가 만료된 pool이 있는지 확인하는 주기
+WARMER_CHECK_INTERVAL_S = 60.0
+# 갱신 실패 후 재시도 간격: 주기의 2배부터 두 배씩 늘려 최대 CANDIDATE_POOL_REFRESH_S
+FAILURE_BACKOFF_INITIAL_S = 2 * WARMER_CHECK_INTERVAL_S
+
+
+def pair_key(first: str, second: str) -> str:
+    return "+".join(sorted((first, second)))
+
+
+def pool_labels(key: str) -> List[str]:
+    return key.split("+")
+
+
+def has_features(track: Dict[str, Any]) -> bool:
+    return all(track.get(k) is not None for k in FEATURE_KEYS)
+
+
+def features_by_id(tracks: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """rerank_by_target용: audio features가 있는 트랙만 (없는 트랙은 뒤로)"""
+    return {t["id"]: t for t in tracks if has_features(t)}
+
+
+class CandidatePools:
+    def __init__(self, size: int, refresh_interval: float, max_pairs: int, min_pair_requests: int, db_path: str = ""):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.max_pairs = max_pairs
+        self.min_pair_requests = min_pair_requests
+        self._pools: Dict[str, Tuple[List[Dict[str, Any]], float]] = {}
+        self._lock = threading.Lock()
+        self.pair_requests: Counter = Counter()
+        self.disk: Optional[SQLiteStore] = None
+        if db_path:
+            try:
+                self.disk = SQLiteStore(db_path, table="candidate_pools")
+            except Exception as e:
+                logger.warning(f"Candidate pool DB disabled ({db_path}): {e}")
+        self.served = 0
+        self.fallbacks = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        # key -> (연속 실패 횟수, 다음 시도 가능 시각)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+
+    # --- storage ---------------------------------------------------------
+
+    def _load_disk(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        if self.disk is None:
+            return None
+        try:
+            blob = self.disk.get(key)
+        except Exception as e:
+            logger.warning(f"Candidate pool DB read failed: {e}")
+            return None
+        if blob is None:
+            return None
+        payload = json.loads(blob)
+        return payload["tracks"], payload["refreshed_at"]
+
+    def _entry(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """메모리 항목만 (요청 경로에서 디스크를 읽지 않음; 공유 DB는 warmer가 load_shared로 반영)"""
+        with self._lock:
+            return self._pools.get(key)
+
+    def load_shared(self, keys: Sequence[str]) -> int:
+        """
+        없거나 갱신 시점이 지난 pool은 다른 worker가 DB에 저장한 더 새 것으로 교체 (blocking, warmer에서
+        to_thread로 호출); 가져온 개수를 반환
+        """
+        if self.disk is None:
+            return 0
+        loaded = 0
+        for key in keys:
+            entry = self._entry(key)
+            if entry is not None and time.time() - entry[1] < self.refresh_interval:
+                continue
+            stored = self._load_disk(key)
+            if stored is not None and (entry is None or stored[1] > entry[1]):
+                with self._lock:
+                    self._pools[key] = stored
+                loaded += 1
+        return loaded
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entry(key)
+        return entry[0] if entry else None
+
+    def is_due(self, key: str) -> bool:
+        failure = self._failures.get(key)
+        if failure is not None and time.time() < failure[1]:
+            return False
+        entry = self._entry(key)
+        return entry is None or time.time() - entry[1] >= self.refresh_interval
+
+    def record_failure(self, key: str) -> float:
+        """갱신 실패(예외 또는 빈 결과): 다음 시도까지의 대기 시간(초)을 반환"""
+        failures = self._failures[key][0] + 1 if key in self._failures else 1
+        delay = min(FAILURE_BACKOFF_INITIAL_S * 2 ** (failures - 1), max(self.refresh_interval, FAILURE_BACKOFF_INITIAL_S))
+        self._failures[key] = (failures, time.time() + delay)
+        self.refresh_errors += 1
+        return delay
+
+    def put(self, key: str, fresh: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """새 트랙을 앞에, 기존 트랙을 뒤에 두고 size개로 자름 (오래된 트랙부터 빠짐)"""
+        previous = self.get(key) or []
+        fresh_ids = {t["id"] for t in fresh}
+        tracks = (fresh + [t for t in previous if t["id"] not in fresh_ids])[:self.size]
+        refreshed_at = time.time()
+        with self._lock:
+            self._pools[key] = (tracks, refreshed_at)
+        self._failures.pop(key, None)
+        if self.disk is not None:
+            try:
+                payload = {"tracks": tracks, "refreshed_at": refreshed_at}
+                self.disk.set(key, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+            except Exception as e:
+                logger.warning(f"Candidate pool DB write failed: {e}")
+        return tracks
+
+    # --- request side ----------------------------------------------------
+
+    def record_request(self, selected: Sequence[Tuple[str, float]]) -> None:
+        ranked = sorted((pair for pair in selected if pair[0] in EMOTION_TO_SPOTIFY), key=lambda x: x[1], reverse=True)
+        labels = [label for label, _ in ranked]
+        if len(labels) >= 2:
+            self.pair_requests[pair_key(labels[0], labels[1])] += 1
+
+    def dominant_pairs(self) -> List[str]:
+        return [
+            key for key, count in self.pair_requests.most_common(self.max_pairs)
+            if count >= self.min_pair_requests
+        ]
+
+    def sources(self, selected: Sequence[Tuple[str, float]]) -> Tuple[List[Tuple[str, List[Dict[str, Any]], float]], float]:
+        """
+        ([(pool key, tracks, weight)], coverage)
+
+        상위 두 라벨의 쌍 pool이 있으면 두 라벨 대신 그 pool을 (두 확률의 합으로) 사용합니다.
+        """
+        selected = sorted(
+            ((label, float(prob)) for label, prob in selected if label in EMOTION_TO_SPOTIFY),
+            key=lambda x: x[1], reverse=True,
+        )
+        total = sum(prob for _, prob in selected)
+        if not selected or total <= 0:
+            return [], 0.0
+        sources = []
+        rest = selected
+        if len(selected) >= 2:
+            key = pair_key(selected[0][0], selected[1][0])
+            tracks = self.get(key)
+            if tracks:
+                sources.append((key, tracks, selected[0][1] + selected[1][1]))
+                rest = selected[2:]
+        for label, prob in rest:
+            tracks = self.get(label)
+            if tracks and prob > 0:
+                sources.append((label, tracks, prob))
+        return sources, sum(weight for _, _, weight in sources) / total
+
+    def recommend(
+        self,
+        selected: Sequence[Tuple[str, float]],
+        target: Dict[str, float],
+        limit: int,
+        seed_genres: Optional[List[str]] = None,
+        sample_factor: Optional[int] = None,
+        recent: Optional[RotatingBloomFilter] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        get_recommendations()와 같은 형태의 결과, pool이 부족하면 None
+
+        limit * sample_factor개를 각 pool에서 확률에 비례하여 무작위로 뽑고 target에 가까운 limit개를 반환
+        (recent에 있는 트랙은 가능하면 제외)
+        """
+        self.record_request(selected)
+        sources, coverage = self.sources(selected)
+        if coverage < MIN_COVERAGE:
+            self.fallbacks += 1
+            return None
+
+        sample_factor = settings.CANDIDATE_POOL_SAMPLE_FACTOR if sample_factor is None else sample_factor
+        wanted = limit * max(1, sample_factor)
+        weight_sum = sum(weight for _, _, weight in sources)
+        candidates: Dict[str, Dict[str, Any]] = {}
+        for _, tracks, weight in sources:
+            count = min(len(tracks), max(1, round(wanted * weight / weight_sum)))
+            for track in random.sample(tracks, count):
+                candidates.setdefault(track["id"], track)
+        if len(candidates) < limit:
+            self.fallbacks += 1
+            return None
+
+        ranked = rerank_by_target(
+            exclude_recent(list(candidates.values()), recent, limit), features_by_id(candidates.values()), target
+        )[:limit]
+        self.served += 1
+        return {
+            "tracks": [dict(track) for track in ranked],
+            "total": len(ranked),
+            "seeds": {"genres": seed_genres or [], "queries": []},
+            "parameters": {
+                "source": "pool",
+                "pools": [key for key, _, _ in sources],
+                "coverage": round(coverage, 3),
+                "limit": limit,
+                **{f"target_{k}": target.get(k) for k in FEATURE_KEYS},
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = {key: {"size": len(tracks), "age_s": round(time.time() - at, 1)} for key, (tracks, at) in self._pools.items()}
+        return {
+            "labels_ready": sum(1 for label in EMOTION_TO_SPOTIFY if label in pools),
+            "labels_total": len(EMOTION_TO_SPOTIFY),
+            "pairs": [key for key in pools if "+" in key],
+            "pools": pools,
+            "served": self.served,
+            "fallbacks": self.fallbacks,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "backing_off": sorted(key for key, (_, retry_at) in self._failures.items() if retry_at > time.time()),
+            "dominant_pairs": self.dominant_pairs(),
+            "shared": self.disk is not None,
+        }
+
+
+_pools: Optional[CandidatePools] = None
+
+
+def get_candidate_pools() -> CandidatePools:
+    global _pools
+    if _pools is None:
+        _pools = CandidatePools(
+            size=settings.CANDIDATE_POOL_SIZE,
+            refresh_interval=settings.CANDIDATE_POOL_REFRESH_S,
+            max_pairs=settings.CANDIDATE_POOL_MAX_PAIRS,
+            min_pair_requests=settings.CANDIDATE_POOL_MIN_PAIR_REQUESTS,
+            db_path=settings.CANDIDATE_POOL_DB,
+        )
+    return _pools
+
+
+# --- warmer ------------------------------------------------------------------
+
+def pool_queries(key: str) -> Tuple[List[str], Dict[str, float]]:
+    """pool 하나를 채울 검색어와 target (live 경로와 같은 _build_search_queries 사용)"""
+    from app.services.spotify import _build_search_queries
+
+    labels = pool_labels(key)
+    per_label = PAIR_SEEDS_PER_LABEL if len(labels) > 1 else None
+    seeds = list(dict.fromkeys(
+        seed for label in labels for seed in LABEL_SEEDS[LABEL_INDEX[label]][:per_label]
+    ))
+    target, _ = aggregate_selected([(label, 1.0) for label in labels])
+    queries = list(dict.fromkeys(seeds + _build_search_queries(seeds, target["valence"], target["energy"])))
+    return queries, target
+
+
+async def fetch_pool(key: str, size: int) -> List[Dict[str, Any]]:
+    """
+    검색어마다 무작위 offset의 한 페이지를 받아 target에 가까운 순서로 size개
+
+    audio features를 받지 못한 트랙(403/rate limit/장애)은 검색 순서대로 뒤에 둡니다.
+    """
+    from app.services.spotify import _track_to_dict, get_async_spotify
+
+    client = get_async_spotify()
+    queries, target = pool_queries(key)
+    tracks: Dict[str, Dict[str, Any]] = {}
+    for query in queries:
+        if len(tracks) >= size:
+            break
+        offset = random.randrange(0, MAX_SEARCH_OFFSET, SEARCH_PAGE_SIZE)
+        try:
+            # 무작위 offset이라 다시 쓰이지 않으므로 SearchCache를 거치지 않음 (사용자 검색 항목을 밀어내지 않도록)
+            results = await client.search(q=query, type="track", limit=SEARCH_PAGE_SIZE, offset=offset, cache=False)
+        except Exception as e:
+            logger.warning(f"Candidate pool search failed for '{query}': {e}")
+            continue
+        for item in results["tracks"]["items"]:
+            if item.get("id") and item["id"] not in tracks:
+                tracks[item["id"]] = _track_to_dict(item)
+
+    try:
+        features = await client.audio_features_map(list(tracks))
+    except Exception as e:
+        logger.warning(f"Candidate pool audio features failed for {key}: {e}")
+        features = {}
+    merged = []
+    for track_id, track in tracks.items():
+        item = features.get(track_id)
+        if item and has_features(item):
+            track = {**track, **{k: float(item[k]) for k in FEATURE_KEYS}}
+        merged.append(track)
+    return rerank_by_target(merged, features_by_id(merged), target)[:size]
+
+
+async def refresh_due_pools(pools: CandidatePools) -> int:
+    """갱신 시점이 된 라벨/쌍 pool을 하나씩 갱신하고 갱신한 개수를 반환"""
+    refreshed = 0
+    keys = list(EMOTION_TO_SPOTIFY) + pools.dominant_pairs()
+    # 다른 worker가 최근에 갱신한 pool은 DB에서 가져옴 (검색하지 않음)
+    await asyncio.to_thread(pools.load_shared, keys)
+    for key in keys:
+        if not pools.is_due(key):
+            continue
+        size = pools.size if pools.get(key) is None else max(1, int(pools.size * ROTATE_FRACTION))
+        try:
+            fresh = await fetch_pool(key, size)
+        except Exception as e:
+            delay = pools.record_failure(key)
+            logger.warning(f"Candidate pool refresh failed for {key}, retrying in {delay:.0f}s: {e}")
+            continue
+        if not fresh:
+            delay = pools.record_failure(key)
+            logger.warning(f"Candidate pool refresh for {key} found no tracks, retrying in {delay:.0f}s")
+            continue
+        pools.put(key, fresh)
+        pools.refreshes += 1
+        refreshed += 1
+    return refreshed
+
+
+async def run_pool_warmer() -> None:
+    from app.services.spotify_ratelimit import background_priority
+
+    pools = get_candidate_pools()
+    readiness.mark("candidate_pools", WARMING)
+    with background_priority():
+        while True:
+            try:
+                refreshed = await refresh_due_pools(pools)
+                if refreshed:
+                    logger.info(f"Refreshed {refreshed} candidate pools")
+                ready = sum(1 for label in EMOTION_TO_SPOTIFY if pools.get(label))
+                if ready == len(EMOTION_TO_SPOTIFY):
+                    readiness.mark("candidate_pools", READY)
+                else:
+                    readiness.mark("candidate_pools", WARMING, f"{ready}/{len(EMOTION_TO_SPOTIFY)} labels")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                readiness.mark("candidate_pools", FAILED, str(e))
+                logger.error(f"Candidate pool warmer error: {e}")
+            await asyncio.sleep(WARMER_CHECK_INTERVAL_S)
+
+
+_warmer: Optional[asyncio.Task] = None
+
+
+def start_pool_warmer() -> None:
+    from app.services.spotify_client import spotify_credentials
+
+    global _warmer
+    if not settings.CANDIDATE_POOLS_ENABLED:
+        readiness.mark("candidate_pools", DISABLED)
+        return
+    creds = spotify_credentials()
+    if not creds["client_id"] or not creds["client_secret"]:
+        readiness.mark("candidate_pools", DISABLED, "Spotify credentials not configured")
+        return
+    if _warmer is None or _warmer.done():
+        _warmer = asyncio.get_running_loop().create_task(run_pool_warmer())
+
+
+async def stop_pool_warmer() -> None:
+    global _warmer
+    if _warmer is not None:
+        _warmer.cancel()
+        try:
+            await _warmer
+        except (asyncio.CancelledError, Exception):
+            pass
+        _warmer = None
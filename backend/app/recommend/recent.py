@@ -0,0 +1,163 @@
+"""
+Per-user recently-recommended track filter
+
+사용자에게 최근 추천한 트랙 id를 rotating Bloom filter에 기록하여 다음 추천에서 같은 곡을 피합니다.
+Diary.music JSON을 훑지 않고 후보 하나당 hash k개의 bit 확인(O(1))으로 판단합니다.
+
+- RECENT_TRACKS_GENERATIONS개의 generation, 각 RECENT_TRACKS_FILTER_BITS bit
+  (기본 4 x 8192 bit = 4 KB / 사용자), DB의 recent_track_filters 테이블에 저장
+- 새 id는 최신 generation에 추가, generation 하나가 window / generations 기간을 넘으면 가장 오래된
+  generation을 버리고 빈 generation을 추가 -> 대략 RECENT_TRACKS_WINDOW_DAYS일 동안 기억
+- 조회는 모든 generation의 OR (Bloom filter 특성상 드물게 오탐이 있어 새 곡을 "최근"으로 볼 수 있지만
+  최근 곡을 놓치지는 않음)
+"""
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 같은 사용자의 동시 기록과 충돌했을 때 다시 읽어서 시도하는 횟수
+RECORD_ATTEMPTS = 5
+
+
+class RotatingBloomFilter:
+    def __init__(
+        self,
+        generations: int,
+        bits: int,
+        hashes: int,
+        span_s: float,
+        data: Optional[bytes] = None,
+        started_at: Optional[float] = None,
+    ):
+        self.generations = max(1, generations)
+        self.bits = max(8, bits - bits % 8)
+        self.hashes = max(1, hashes)
+        self.span_s = span_s
+        shape = (self.generations, self.bits // 8)
+        self.array = np.zeros(shape, dtype=np.uint8)
+        if data is not None and len(data) == self.array.size:
+            # 설정(크기)이 바뀌었으면 기존 값은 버리고 새로 시작
+            self.array = np.frombuffer(data, dtype=np.uint8).reshape(shape).copy()
+        self.started_at = time.time() if started_at is None else started_at
+        self._union: Optional[bytes] = None
+
+    def _positions(self, track_id: str) -> List[int]:
+        # double hashing: h1 + i * h2 (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(track_id.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def rotate(self, now: Optional[float] = None) -> int:
+        """지난 generation 기간만큼 오래된 generation을 버림 (버린 개수 반환)"""
+        now = time.time() if now is None else now
+        elapsed = int((now - self.started_at) // self.span_s) if self.span_s > 0 else 0
+        if elapsed <= 0:
+            return 0
+        shift = min(elapsed, self.generations)
+        self.array[shift:] = self.array[:-shift].copy() if shift < self.generations else 0
+        self.array[:shift] = 0
+        self.started_at += elapsed * self.span_s
+        self._union = None
+        return shift
+
+    def add(self, track_id: str) -> None:
+        newest = self.array[0]
+        for position in self._positions(track_id):
+            newest[position >> 3] |= 1 << (position & 7)
+        self._union = None
+
+    def update(self, track_ids: Iterable[str]) -> None:
+        for track_id in track_ids:
+            if track_id:
+                self.add(track_id)
+
+    def __contains__(self, track_id: str) -> bool:
+        if self._union is None:
+            # generation들의 OR를 한 번만 계산해 두고 후보마다 bit hashes개만 확인
+            self._union = np.bitwise_or.reduce(self.array, axis=0).tobytes()
+        union = self._union
+        return all(union[p >> 3] >> (p & 7) & 1 for p in self._positions(track_id))
+
+    def to_bytes(self) -> bytes:
+        return self.array.tobytes()
+
+
+def new_filter(data: Optional[bytes] = None, started_at: Optional[float] = None) -> RotatingBloomFilter:
+    generations = settings.RECENT_TRACKS_GENERATIONS
+    return RotatingBloomFilter(
+        generations=generations,
+        bits=settings.RECENT_TRACKS_FILTER_BITS,
+        hashes=settings.RECENT_TRACKS_HASHES,
+        span_s=settings.RECENT_TRACKS_WINDOW_DAYS * 86400 / max(1, generations),
+        data=data,
+        started_at=started_at,
+    )
+
+
+def load_recent(user_id: int) -> Optional[RotatingBloomFilter]:
+    """사용자의 filter (기록이 없으면 None); blocking DB 호출이므로 async 경로에서는 to_thread로"""
+    from app.db import crud
+    from app.db.base import SessionLocal
+
+    try:
+        with SessionLocal() as db:
+            row = crud.get_recent_track_filter(db, user_id)
+            if row is None:
+                return None
+            recent = new_filter(row.bits, row.started_at)
+    except Exception as e:
+        logger.warning(f"Failed to load recent tracks for user {user_id}: {e}")
+        return None
+    recent.rotate()
+    return recent
+
+
+def record_recent(user_id: int, track_ids: List[str]) -> None:
+    """
+    추천한 트랙을 기록
+
+    DB의 최신 값에 추가한 뒤 그 값이 그대로일 때만 저장(compare-and-swap)하고, 같은 사용자의 다른
+    요청이 먼저 저장했으면 다시 읽어서 재시도하므로 동시에 들어온 기록을 덮어쓰지 않습니다.
+    """
+    from app.db import crud
+    from app.db.base import SessionLocal
+
+    if not track_ids:
+        return
+    try:
+        with SessionLocal() as db:
+            for _ in range(RECORD_ATTEMPTS):
+                row = crud.get_recent_track_filter(db, user_id)
+                recent = new_filter(row.bits, row.started_at) if row is not None else new_filter()
+                recent.rotate()
+                recent.update(track_ids)
+                if crud.save_recent_track_filter(db, user_id, recent.to_bytes(), recent.started_at, expected=row):
+                    return
+                db.expire_all()
+        logger.warning(f"Gave up recording recent tracks for user {user_id} after {RECORD_ATTEMPTS} conflicts")
+    except Exception as e:
+        logger.warning(f"Failed to record recent tracks for user {user_id}: {e}")
+
+
+def exclude_recent(tracks: List[Dict[str, Any]], recent: Optional[RotatingBloomFilter], limit: int) -> List[Dict[str, Any]]:
+    """
+    최근 추천한 트랙을 뺀 목록 (순서 유지)
+
+    남은 트랙이 limit개보다 적으면 최근 트랙으로 채웁니다 (아무것도 추천하지 않는 것보다는 나음).
+    """
+    if recent is None:
+        return tracks
+    fresh, seen = [], []
+    for track in tracks:
+        (seen if track["id"] in recent else fresh).append(track)
+    if len(fresh) >= limit:
+        return fresh
+    return fresh + seen[:limit - len(fresh)]
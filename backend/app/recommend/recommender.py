@@ -1,57 +1,15 @@
 from typing import List, Tuple, Dict
-import numpy as np
-from app.recommend.emotion_map import EMOTION_TO_SPOTIFY
+from app.recommend.targets import aggregate_selected, aggregate_targets_batch
 from app.services.spotify import get_spotify
 
 def aggregate_targets(selected: List[Tuple[str, float]]) -> Tuple[Dict, List[str]]:
     """
     Aggregate emotion predictions into target audio features and seeds
-    """
-    vals, enes, dans, weights = [], [], [], []
-    seeds_pool: List[str] = []
-
-    for label, prob in selected:
-        if label not in EMOTION_TO_SPOTIFY:
-            continue
-        
-        emotion_data = EMOTION_TO_SPOTIFY[label]
-        v_low, v_high = emotion_data["valence"]
-        e_low, e_high = emotion_data["energy"]
-        d_low, d_high = emotion_data["danceability"]
-
-        vals.append((v_low + v_high) / 2)
-        enes.append((e_low + e_high) / 2)
-        dans.append((d_low + d_high) / 2)
-        weights.append(prob)
-        seeds_pool.extend(emotion_data["seeds"])
-
-    if not vals:
-        # Fallback if no emotions found
-        return {
-            "valence": 0.5, 
-            "energy": 0.5, 
-            "danceability": 0.5
-        }, ["pop", "indie-pop", "edm"]
 
-    # Weighted average
-    w = np.array(weights, dtype=np.float32)
-    w = w / (w.sum() + 1e-8)
-
-    target = {
-        "valence": float(np.dot(vals, w)),
-        "energy": float(np.dot(enes, w)),
-        "danceability": float(np.dot(dans, w)),
-    }
-
-    # Remove duplicates while preserving order
-    unique_seeds = []
-    for seed in seeds_pool:
-        if seed not in unique_seeds:
-            unique_seeds.append(seed)
-    
-    # Ensure we have at least 3 seeds, max 5 for Spotify API
-    seeds = unique_seeds[:5] if len(unique_seeds) >= 3 else (unique_seeds + ["pop", "indie-pop", "edm"])[:3]
-    return target, seeds
+    EMOTION_TO_SPOTIFY는 app/recommend/targets.py에서 미리 numpy 배열로 변환되어 있습니다.
+    (N, 28) 확률 행렬을 한 번에 처리하려면 aggregate_targets_batch()를 사용하세요.
+    """
+    return aggregate_selected(selected)
 
 def recommend_tracks(target: Dict, seeds: List[str], limit: int = 12) -> List[Dict]:
     """
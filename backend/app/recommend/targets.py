@@ -0,0 +1,159 @@
+"""
+Precompiled emotion map: 28-label probabilities -> audio-feature targets and genre seeds
+
+EMOTION_TO_SPOTIFY를 import 시점에 한 번만 numpy 배열로 변환합니다.
+
+- MIDPOINTS: (28, 3) 라벨별 valence/energy/danceability 구간의 중간값 (행 순서 = GOEMOTIONS_LABELS)
+- SEED_WEIGHTS: (28, G) 라벨별 장르 seed 가중치 (seed 목록 앞쪽일수록 큼), 열 순서 = SEED_VOCAB
+
+aggregate_targets_batch()는 (N, 28) 확률 행렬을 matmul 두 번으로 N개의 target과 seed 순위로 바꿉니다.
+일기 일괄 재분석, 주간 플레이리스트처럼 행마다 Python loop를 돌던 작업용입니다.
+
+    probs = predict_probs_batch(texts)            # (N, 28)
+    targets, seeds = aggregate_targets_batch(probs)
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.nlp.labels import GOEMOTIONS_LABELS
+from app.recommend.emotion_map import EMOTION_TO_SPOTIFY
+from app.recommend.features import FEATURE_KEYS
+
+FALLBACK_TARGET = {"valence": 0.5, "energy": 0.5, "danceability": 0.5}
+FALLBACK_SEEDS = ["pop", "indie-pop", "edm"]
+MIN_SEEDS = 3
+MAX_SEEDS = 5  # Spotify seed 최대 개수
+
+# 같은 감정 안에서 seed 목록의 뒤쪽 장르일수록 조금씩 낮은 가중치
+SEED_POSITION_DECAY = 0.9
+
+LABEL_INDEX: Dict[str, int] = {label: i for i, label in enumerate(GOEMOTIONS_LABELS)}
+
+
+def _compile() -> Tuple[np.ndarray, np.ndarray, List[str], np.ndarray, List[Tuple[str, ...]]]:
+    midpoints = np.zeros((len(GOEMOTIONS_LABELS), len(FEATURE_KEYS)), dtype=np.float64)
+    known = np.zeros(len(GOEMOTIONS_LABELS), dtype=bool)
+    label_seeds: List[Tuple[str, ...]] = [()] * len(GOEMOTIONS_LABELS)
+    vocab: Dict[str, int] = {}
+    for label, i in LABEL_INDEX.items():
+        data = EMOTION_TO_SPOTIFY.get(label)
+        if data is None:
+            continue
+        known[i] = True
+        midpoints[i] = [(data[k][0] + data[k][1]) / 2 for k in FEATURE_KEYS]
+        label_seeds[i] = tuple(data["seeds"])
+        for seed in data["seeds"]:
+            vocab.setdefault(seed, len(vocab))
+
+    seed_weights = np.zeros((len(GOEMOTIONS_LABELS), len(vocab)), dtype=np.float32)
+    for i, seeds in enumerate(label_seeds):
+        for position, seed in enumerate(seeds):
+            seed_weights[i, vocab[seed]] = max(seed_weights[i, vocab[seed]], SEED_POSITION_DECAY ** position)
+    return midpoints, known, list(vocab), seed_weights, label_seeds
+
+
+MIDPOINTS, KNOWN_LABELS, SEED_VOCAB, SEED_WEIGHTS, LABEL_SEEDS = _compile()
+MIDPOINT_ROWS: List[Tuple[float, ...]] = [tuple(row) for row in MIDPOINTS.tolist()]
+
+
+def _finish_seeds(unique_seeds: Sequence[str]) -> List[str]:
+    # Ensure we have at least 3 seeds, max 5 for Spotify API
+    if len(unique_seeds) >= MIN_SEEDS:
+        return list(unique_seeds[:MAX_SEEDS])
+    return (list(unique_seeds) + FALLBACK_SEEDS)[:MIN_SEEDS]
+
+
+def aggregate_selected(selected: Sequence[Tuple[str, float]]) -> Tuple[Dict[str, float], List[str]]:
+    """
+    선택된 (label, prob) 목록 하나 -> (target, seeds)
+
+    target은 확률 가중 평균, seeds는 selected 순서대로 각 감정의 seed를 중복 없이 이어 붙임.
+    요청 하나에 감정은 몇 개뿐이라 numpy 배열을 만드는 비용이 계산보다 커서 Python float로 계산합니다.
+    """
+    idx: List[int] = []
+    weights: List[float] = []
+    for label, prob in selected:
+        i = LABEL_INDEX.get(label)
+        if i is not None and label in EMOTION_TO_SPOTIFY:
+            idx.append(i)
+            weights.append(float(prob))
+    if not idx:
+        # Fallback if no emotions found
+        return dict(FALLBACK_TARGET), list(FALLBACK_SEEDS)
+
+    # Weighted average
+    total = sum(weights) + 1e-8
+    target = {
+        key: sum(MIDPOINT_ROWS[i][j] * w for i, w in zip(idx, weights)) / total
+        for j, key in enumerate(FEATURE_KEYS)
+    }
+
+    # Remove duplicates while preserving order
+    unique_seeds = list(dict.fromkeys(seed for i in idx for seed in LABEL_SEEDS[i]))
+    return target, _finish_seeds(unique_seeds)
+
+
+def selection_mask(
+    probs: np.ndarray, threshold: Optional[float] = None, topk: Optional[int] = None
+) -> np.ndarray:
+    """
+    select_emotions()와 같은 규칙의 (N, 28) bool mask
+
+    None인 인자는 각각 settings의 THRESHOLD/TOPK로 (select_emotions와 동일), topk가 있으면
+    topk 우선, 아니면 threshold 이상 (없으면 argmax 하나)
+    """
+    from app.core.config import settings
+
+    threshold = settings.THRESHOLD if threshold is None else threshold
+    topk = settings.TOPK if topk is None else topk
+    probs = np.atleast_2d(probs)
+    mask = np.zeros(probs.shape, dtype=bool)
+    rows = np.arange(len(probs))
+    if topk is not None:
+        k = min(max(int(topk), 0), probs.shape[1])
+        if k > 0:
+            top = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+            mask[rows[:, None], top] = True
+        return mask
+    mask = probs >= threshold
+    empty = ~mask.any(axis=1)
+    mask[rows[empty], probs[empty].argmax(axis=1)] = True
+    return mask
+
+
+def aggregate_targets_batch(
+    probs: np.ndarray,
+    threshold: Optional[float] = None,
+    topk: Optional[int] = None,
+) -> Tuple[np.ndarray, List[List[str]]]:
+    """
+    (N, 28) 확률 행렬 -> ((N, 3) target 행렬 [FEATURE_KEYS 순서], N개의 seed 목록)
+
+    감정 선택은 select_emotions()와 같습니다 (None인 threshold/topk는 각각 settings 값).
+    seed는 선택된 감정들의 확률 x SEED_WEIGHTS 합이 큰 순서 (여러 감정에 걸친 장르가 앞으로)라서
+    aggregate_selected()의 "등장 순서"와는 순위가 다를 수 있습니다.
+    """
+    probs = np.atleast_2d(np.asarray(probs, dtype=np.float32))
+    weights = np.where(selection_mask(probs, threshold, topk) & KNOWN_LABELS, probs, 0.0).astype(np.float32)
+    totals = weights.sum(axis=1, keepdims=True)
+
+    targets = (weights / (totals + 1e-8)) @ MIDPOINTS
+    empty = totals[:, 0] <= 0
+    targets[empty] = [FALLBACK_TARGET[k] for k in FEATURE_KEYS]
+
+    seed_scores = weights @ SEED_WEIGHTS  # (N, G)
+    ranked = np.argsort(-seed_scores, axis=1, kind="stable")[:, :MAX_SEEDS]
+    positive = np.take_along_axis(seed_scores, ranked, axis=1) > 0
+    # 행마다 numpy 원소에 접근하지 않도록 Python list로 한 번에 변환
+    seeds = [
+        list(FALLBACK_SEEDS) if is_empty
+        else _finish_seeds([SEED_VOCAB[g] for g, ok in zip(row, ok_row) if ok])
+        for row, ok_row, is_empty in zip(ranked.tolist(), positive.tolist(), empty.tolist())
+    ]
+    return targets, seeds
+
+
+def targets_to_dicts(targets: np.ndarray) -> List[Dict[str, float]]:
+    """aggregate_targets_batch의 target 행렬 -> aggregate_targets와 같은 dict 목록"""
+    return [{k: float(v) for k, v in zip(FEATURE_KEYS, row)} for row in np.atleast_2d(targets)]
@@ -0,0 +1,232 @@
+"""
+Incrementally maintained per-user taste profile
+
+일기 전체를 매번 다시 읽지 않도록 crud.upsert_diary()에서 일기 하나가 바뀔 때마다 프로필을 갱신합니다.
+갱신은 바뀐 일기 하나(이전 값 제거 + 새 값 추가)만 보므로 이력 길이와 무관하고, 추천 요청은
+프로필 한 행만 읽습니다.
+
+프로필 (user_taste_profiles.profile JSON, 수 KB 이하):
+- diaries / emotion_mean: 감정 확률 벡터(28)의 running mean -> 사용자의 평소 감정 조합
+- artists / genres: 일기에 저장된 추천곡의 아티스트, 감정 seed 장르의 감쇠 가중치
+  (새 일기가 추가될 때마다 TASTE_DECAY를 곱하고 상위 TASTE_MAX_ARTISTS / TASTE_MAX_GENRES개만 유지)
+
+추천 경로에서의 사용:
+- personalize_target: 프로필의 평소 target 쪽으로 TASTE_TARGET_BLEND만큼 이동
+- personalize_seeds: 가장 선호하는 장르가 seed에 없으면 추가
+- rerank_by_taste: 후보 순서(target 거리 순)에 선호 아티스트 가산점을 더해 다시 정렬
+"""
+import logging
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.nlp.labels import GOEMOTIONS_LABELS
+from app.recommend.features import FEATURE_KEYS
+from app.recommend.targets import LABEL_INDEX, MIDPOINTS, aggregate_selected
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VERSION = 1
+# 이 값보다 작아진 가중치는 삭제
+MIN_WEIGHT = 1e-3
+# personalize_seeds가 장르를 추가하는 최소 가중치
+MIN_GENRE_WEIGHT = 1.0
+
+
+def empty_profile() -> Dict[str, Any]:
+    return {
+        "version": PROFILE_VERSION,
+        "diaries": 0,
+        "emotion_mean": [0.0] * len(GOEMOTIONS_LABELS),
+        "artists": {},
+        "genres": {},
+    }
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+def diary_emotions(emotion: Optional[str], music: Optional[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """
+    일기의 감정: 추천 시 저장한 music.emotions가 있으면 그것을, 없으면 대표 감정 하나
+
+    music은 프론트엔드가 보낸 임의의 JSON이므로 형식이 맞지 않는 항목은 건너뜁니다.
+    """
+    selected = []
+    for item in _as_list(_as_dict(music).get("emotions")):
+        item = _as_dict(item)
+        label = item.get("label")
+        if not isinstance(label, str) or label not in LABEL_INDEX:
+            continue
+        try:
+            prob = float(item.get("probability") or 0.0)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(prob):
+            selected.append((label, prob))
+    if not selected and isinstance(emotion, str) and emotion in LABEL_INDEX:
+        selected = [(emotion, 1.0)]
+    return selected
+
+
+def diary_artists(music: Optional[Dict[str, Any]]) -> List[str]:
+    """저장된 추천곡의 아티스트 이름 (문자열 목록, 쉼표로 이은 문자열, {"name": ...} 모두 허용)"""
+    artists = []
+    for track in _as_list(_as_dict(music).get("tracks")):
+        names = _as_dict(track).get("artists")
+        if isinstance(names, str):
+            names = names.split(",")
+        for name in _as_list(names):
+            if isinstance(name, dict):
+                name = name.get("name")
+            if isinstance(name, str) and name.strip():
+                artists.append(name.strip())
+    return artists
+
+
+def _emotion_vector(selected: Sequence[Tuple[str, float]]) -> Optional[np.ndarray]:
+    vector = np.zeros(len(GOEMOTIONS_LABELS), dtype=np.float64)
+    for label, prob in selected:
+        vector[LABEL_INDEX[label]] += max(prob, 0.0)
+    total = vector.sum()
+    return vector / total if total > 0 else None
+
+
+def _top(weights: Dict[str, float], limit: int) -> Dict[str, float]:
+    kept = sorted(((k, v) for k, v in weights.items() if v >= MIN_WEIGHT), key=lambda kv: kv[1], reverse=True)
+    return {k: round(v, 4) for k, v in kept[:limit]}
+
+
+def _contribution(emotion: Optional[str], music: Optional[Dict[str, Any]]):
+    selected = diary_emotions(emotion, music)
+    vector = _emotion_vector(selected)
+    genres = aggregate_selected(selected)[1] if selected else []
+    return vector, diary_artists(music), genres
+
+
+def apply_diary_change(
+    profile: Optional[Dict[str, Any]],
+    old: Optional[Tuple[Optional[str], Optional[Dict[str, Any]]]],
+    new: Optional[Tuple[Optional[str], Optional[Dict[str, Any]]]],
+) -> Dict[str, Any]:
+    """
+    일기 하나의 변경을 반영한 새 프로필 (old/new는 (emotion, music), 새 일기면 old=None)
+
+    같은 날 일기를 다시 저장하면 이전 기여분을 빼고 새 기여분을 더하며 (감쇠는 새 일기일 때만),
+    따라서 에디터가 감정과 음악을 따로 저장해도 하루가 한 번만 집계됩니다.
+    감쇠된 가중치에서 빼는 값은 근사치이며 0 아래로는 내려가지 않습니다.
+    """
+    profile = dict(profile) if profile and profile.get("version") == PROFILE_VERSION else empty_profile()
+    count = int(profile["diaries"])
+    mean = np.asarray(profile["emotion_mean"], dtype=np.float64)
+    artists = dict(profile["artists"])
+    genres = dict(profile["genres"])
+
+    if old is not None:
+        vector, old_artists, old_genres = _contribution(*old)
+        if vector is not None and count > 0:
+            mean = (mean * count - vector) / (count - 1) if count > 1 else np.zeros_like(mean)
+            count -= 1
+        for name in old_artists:
+            artists[name] = max(0.0, artists.get(name, 0.0) - 1.0)
+        for genre in old_genres:
+            genres[genre] = max(0.0, genres.get(genre, 0.0) - 1.0)
+
+    if new is not None:
+        vector, new_artists, new_genres = _contribution(*new)
+        if vector is not None:
+            count += 1
+            mean += (vector - mean) / count
+        if old is None:
+            # 감쇠는 새 일기(하루)마다 한 번만; 같은 날 감정 -> 음악 순으로 다시 저장해도 감쇠하지 않음
+            decay = settings.TASTE_DECAY
+            artists = {k: v * decay for k, v in artists.items()}
+            genres = {k: v * decay for k, v in genres.items()}
+        for name in new_artists:
+            artists[name] = artists.get(name, 0.0) + 1.0
+        for genre in new_genres:
+            genres[genre] = genres.get(genre, 0.0) + 1.0
+
+    profile.update({
+        "diaries": count,
+        "emotion_mean": [round(float(v), 5) for v in np.clip(mean, 0.0, None)],
+        "artists": _top(artists, settings.TASTE_MAX_ARTISTS),
+        "genres": _top(genres, settings.TASTE_MAX_GENRES),
+    })
+    return profile
+
+
+def load_profile(user_id: int) -> Optional[Dict[str, Any]]:
+    """사용자 프로필 한 행 (없으면 None); blocking DB 호출이므로 async 경로에서는 to_thread로"""
+    from app.db import crud
+    from app.db.base import SessionLocal
+
+    try:
+        with SessionLocal() as db:
+            row = crud.get_taste_profile(db, user_id)
+            return dict(row.profile) if row is not None else None
+    except Exception as e:
+        logger.warning(f"Failed to load taste profile for user {user_id}: {e}")
+        return None
+
+
+def _is_established(profile: Optional[Dict[str, Any]]) -> bool:
+    return bool(profile) and profile.get("diaries", 0) >= settings.TASTE_MIN_DIARIES
+
+
+def typical_target(profile: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """평소 감정 조합(emotion_mean)에 해당하는 target"""
+    mean = np.asarray(profile.get("emotion_mean") or [], dtype=np.float64)
+    if mean.shape != (len(GOEMOTIONS_LABELS),) or mean.sum() <= 0:
+        return None
+    values = (mean / mean.sum()) @ MIDPOINTS
+    return {k: float(v) for k, v in zip(FEATURE_KEYS, values)}
+
+
+def personalize_target(target: Dict[str, float], profile: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    if not _is_established(profile):
+        return target
+    typical = typical_target(profile)
+    if typical is None:
+        return target
+    blend = settings.TASTE_TARGET_BLEND
+    return {k: (1 - blend) * v + blend * typical.get(k, v) for k, v in target.items()}
+
+
+def personalize_seeds(seeds: List[str], profile: Optional[Dict[str, Any]], max_seeds: int = 5) -> List[str]:
+    if not _is_established(profile) or not profile.get("genres"):
+        return seeds
+    genre, weight = max(profile["genres"].items(), key=lambda kv: kv[1])
+    if genre in seeds or weight < MIN_GENRE_WEIGHT:
+        return seeds
+    return (seeds[:max_seeds - 1] if len(seeds) >= max_seeds else list(seeds)) + [genre]
+
+
+def rerank_by_taste(
+    tracks: List[Dict[str, Any]], profile: Optional[Dict[str, Any]], limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    후보 순서를 기본 점수(앞일수록 0에 가까움)로 하고 선호 아티스트 가산점(최대 TASTE_ARTIST_WEIGHT)을 빼서 정렬
+    """
+    artists = (profile or {}).get("artists") or {}
+    if not tracks or not artists:
+        return tracks[:limit] if limit is not None else tracks
+    top_weight = max(artists.values())
+    boost = settings.TASTE_ARTIST_WEIGHT
+    scored = []
+    for position, track in enumerate(tracks):
+        names = track.get("artists") or []
+        if isinstance(names, str):
+            names = [names]
+        affinity = max((artists.get(name, 0.0) for name in names), default=0.0) / top_weight
+        scored.append((position / len(tracks) - boost * affinity, position, track))
+    scored.sort(key=lambda item: (item[0], item[1]))
+    ranked = [track for _, _, track in scored]
+    return ranked[:limit] if limit is not None else ranked
@@ -5,6 +5,7 @@ class AnalyzeRequest(BaseModel):
     text: str
     threshold: Optional[float] = None
     topk: Optional[int] = None
+    cascade: Optional[bool] = None  # None: CASCADE_ENABLED 설정을 따름
 
 class EmotionPrediction(BaseModel):
     label: str
@@ -18,3 +19,6 @@ class AnalyzeResponse(BaseModel):
     analyzed_text: str
     detected_language: str
     was_translated: bool
+    translation_degraded: bool = False  # translation failed or timed out; original text was analyzed
+    # Which model answered: "small" (cascade) or "full"
+    tier: str = "full"
@@ -8,6 +8,7 @@ class EmotionInput(BaseModel):
 class RecommendRequest(BaseModel):
     selected: List[EmotionInput]
     limit: int = 4
+    user_id: Optional[int] = None  # 있으면 최근에 추천한 곡을 제외
 
 class TrackInfo(BaseModel):
     id: str
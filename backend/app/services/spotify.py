@@ -1,15 +1,25 @@
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 from spotipy.exceptions import SpotifyException
 from app.core.config import settings
+from app.services.spotify_cache import SearchCache, get_audio_features_cache, get_search_cache
+from app.services.spotify_client import (
+    MAX_ATTEMPTS,
+    SPOTIFY_API_URL,
+    SpotifyClient,
+    get_spotify_client,
+    get_token_manager,
+    spotify_error,
+)
+from app.services.spotify_ratelimit import (
+    SpotifyRateLimited,
+    get_rate_limiter,
+    is_rate_limited,
+    parse_retry_after,
+)
+import asyncio
 import logging
-import time
-import base64
-import requests
-import os
 from dotenv import load_dotenv
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 # .env 파일 직접 로드
 env_path = Path(__file__).resolve().parents[2] / ".env"
@@ -17,88 +27,158 @@ load_dotenv(env_path)
 
 logger = logging.getLogger(__name__)
 
-_sp: spotipy.Spotify = None
-_app_token: Optional[str] = None
-_app_token_expires_at: float = 0.0
+_connection_checked = False
 
-def get_spotify():
+def get_spotify() -> SpotifyClient:
     """
-    Spotify Client Credentials Flow (기본) 또는 Refresh Token (있을 때)로 클라이언트를 생성합니다.
+    Spotify Client Credentials Flow (기본) 또는 Refresh Token (있을 때)로 인증된 공용 클라이언트를 반환합니다.
+    토큰 갱신과 connection pool은 app/services/spotify_client.py가 관리합니다.
     """
-    global _sp
-    if _sp is None:
-        client_id = os.getenv("SPOTIFY_CLIENT_ID") or settings.SPOTIFY_CLIENT_ID
-        client_secret = os.getenv("SPOTIFY_CLIENT_SECRET") or settings.SPOTIFY_CLIENT_SECRET
-        refresh_token = os.getenv("SPOTIFY_REFRESH_TOKEN") or settings.SPOTIFY_REFRESH_TOKEN
-        redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI") or settings.SPOTIFY_REDIRECT_URI
+    global _connection_checked
+    try:
+        sp = get_spotify_client()
+        if not _connection_checked:
+            # 연결 테스트
+            sp.search(q="test", type="track", limit=1)
+            _connection_checked = True
+            logger.info("Spotify API connection established successfully")
+        return sp
+    except SpotifyException as e:
+        logger.error(f"Spotify API error: {e}")
+        raise ValueError(f"Failed to authenticate with Spotify: {e}")
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error initializing Spotify client: {e}")
+        raise ValueError(f"Failed to initialize Spotify client: {e}")
+
+def cached_search(
+    sp: SpotifyClient, q: str, type: str = "track", limit: int = 10, offset: int = 0, market: Optional[str] = None
+) -> Dict[str, Any]:
+    """sp.search + 검색 응답 캐시 (TTL, stale 항목은 백그라운드 갱신)"""
+    return get_search_cache().get_or_fetch_sync(
+        SearchCache.key(q, type, limit, offset, market),
+        lambda: sp.search(q=q, type=type, limit=limit, offset=offset, market=market),
+    )
 
-        if not client_id or not client_secret:
-            raise ValueError("Spotify credentials not configured. Set SPOTIFY_CLIENT_ID/SECRET in .env")
+# 다양성을 위한 추가 검색어 (무작위 선택)
+VARIETY_TERMS = ["indie", "alternative", "folk", "electronic", "rock", "jazz", "soul", "r&b"]
+FALLBACK_QUERY = "popular music"
 
-        try:
-            if refresh_token:
-                # Use OAuth with refresh token if provided
-                auth_manager = spotipy.oauth2.SpotifyOAuth(
-                    client_id=client_id,
-                    client_secret=client_secret,
-                    redirect_uri=redirect_uri,
-                    scope=settings.SPOTIFY_SCOPES,
-                )
-                # Manually set the cached token using the provided refresh token
-                token_info = auth_manager.refresh_access_token(refresh_token)
-                _sp = spotipy.Spotify(auth=token_info["access_token"])
-            else:
-                # Fallback to client credentials
-                auth_manager = SpotifyClientCredentials(
-                    client_id=client_id,
-                    client_secret=client_secret
-                )
-                _sp = spotipy.Spotify(auth_manager=auth_manager)
+def _build_search_queries(
+    seed_genres: Optional[List[str]],
+    target_valence: Optional[float],
+    target_energy: Optional[float],
+) -> List[str]:
+    """장르 seed + 감정 용어 + 무작위 다양성 용어로 검색 쿼리 목록 생성"""
+    import random
 
-            # 연결 테스트
-            _sp.search(q="test", type="track", limit=1)
-            logger.info("Spotify API connection established successfully")
+    search_queries = []
 
-        except SpotifyException as e:
-            logger.error(f"Spotify API error: {e}")
-            raise ValueError(f"Failed to authenticate with Spotify: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error initializing Spotify client: {e}")
-            raise ValueError(f"Failed to initialize Spotify client: {e}")
+    # 기본 장르 기반 검색
+    if seed_genres:
+        for genre in seed_genres[:3]:  # 최대 3개 장르
+            search_queries.append(genre)
 
-    return _sp
+    # 감정 상태에 따른 추가 검색어 조합
+    emotion_terms = []
+    if target_valence is not None:
+        if target_valence > 0.7:
+            emotion_terms.extend(["happy", "uplifting", "cheerful", "joyful"])
+        elif target_valence < 0.3:
+            emotion_terms.extend(["sad", "melancholy", "emotional", "mellow"])
+        else:
+            emotion_terms.extend(["calm", "peaceful", "relaxed"])
 
-def _basic_auth_header() -> Dict[str, str]:
-    client_id = os.getenv("SPOTIFY_CLIENT_ID") or settings.SPOTIFY_CLIENT_ID
-    client_secret = os.getenv("SPOTIFY_CLIENT_SECRET") or settings.SPOTIFY_CLIENT_SECRET
-    creds = f"{client_id}:{client_secret}".encode("utf-8")
+    if target_energy is not None:
+        if target_energy > 0.7:
+            emotion_terms.extend(["upbeat", "energetic", "dance", "party"])
+        elif target_energy < 0.3:
+            emotion_terms.extend(["slow", "acoustic", "ambient", "chill"])
+
+    # 감정 기반 검색 쿼리 추가
+    for term in emotion_terms[:4]:  # 최대 4개 감정 용어
+        search_queries.append(term)
+
+    search_queries.extend(random.sample(VARIETY_TERMS, min(3, len(VARIETY_TERMS))))
+
+    # 검색어가 없으면 기본값 사용
+    if not search_queries:
+        search_queries = ["pop", "music", "indie", "alternative"]
+
+    # 무작위로 섞어서 다양성 증가
+    random.shuffle(search_queries)
+    return search_queries
+
+def _track_to_dict(track: Dict[str, Any]) -> Dict[str, Any]:
     return {
-        "Authorization": "Basic " + base64.b64encode(creds).decode("utf-8"),
-        "Content-Type": "application/x-www-form-urlencoded",
+        "id": track.get("id"),
+        "name": track.get("name"),
+        "artists": [a.get("name") for a in track.get("artists", [])],
+        "album": track.get("album", {}).get("name"),
+        "preview_url": track.get("preview_url"),
+        "external_urls": track.get("external_urls", {}),
+        "duration_ms": track.get("duration_ms"),
+        "popularity": track.get("popularity"),
+        "explicit": track.get("explicit", False),
+        "image_url": (track.get("album", {}).get("images", [{}])[0].get("url") if track.get("album", {}).get("images") else None),
     }
 
-def _ensure_app_token() -> str:
-    global _app_token, _app_token_expires_at
-    client_id = os.getenv("SPOTIFY_CLIENT_ID") or settings.SPOTIFY_CLIENT_ID
-    client_secret = os.getenv("SPOTIFY_CLIENT_SECRET") or settings.SPOTIFY_CLIENT_SECRET
-    if not client_id or not client_secret:
-        raise ValueError("Spotify credentials not configured. Please set SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in .env file")
-    now = time.time()
-    if _app_token and now < (_app_token_expires_at - 30):
-        return _app_token
-    resp = requests.post(
-        "https://accounts.spotify.com/api/token",
-        headers=_basic_auth_header(),
-        data={"grant_type": "client_credentials"},
-        timeout=15,
-    )
-    if resp.status_code != 200:
-        raise ValueError(f"Failed to obtain Spotify token: {resp.status_code} {resp.text}")
-    payload = resp.json()
-    _app_token = payload.get("access_token")
-    expires_in = int(payload.get("expires_in", 3600))
-    _app_token_expires_at = now + expires_in
-    return _app_token
+def _recommendation_result(
+    tracks: List[Dict[str, Any]],
+    seed_genres: Optional[List[str]],
+    search_queries: List[str],
+    limit: int,
+    target_valence: Optional[float],
+    target_energy: Optional[float],
+    target_danceability: Optional[float],
+    target_acousticness: Optional[float],
+    rate_limited: bool = False,
+) -> Dict[str, Any]:
+    return {
+        "tracks": tracks,
+        "total": len(tracks),
+        "seeds": {"genres": seed_genres or [], "queries": search_queries[:5]},
+        "parameters": {
+            "total_queries": len(search_queries),
+            "limit": limit,
+            "target_valence": target_valence,
+            "target_energy": target_energy,
+            "target_danceability": target_danceability,
+            "target_acousticness": target_acousticness,
+            "rate_limited": rate_limited,
+        },
+    }
+
+def _target_dict(
+    target_valence: Optional[float], target_energy: Optional[float], target_danceability: Optional[float]
+) -> Dict[str, float]:
+    target = {"valence": target_valence, "energy": target_energy, "danceability": target_danceability}
+    return {k: v for k, v in target.items() if v is not None}
+
+def _candidate_pool_size(limit: int, target: Dict[str, float]) -> int:
+    """target이 있으면 limit보다 많이 모아서 가까운 트랙을 고름"""
+    return limit * max(1, settings.SPOTIFY_RERANK_POOL_FACTOR) if target else limit
+
+def _rank_candidates(
+    tracks: List[Dict[str, Any]],
+    target: Dict[str, float],
+    features_by_id: Optional[Dict[str, Optional[Dict[str, float]]]],
+) -> List[Dict[str, Any]]:
+    """audio features가 있으면 target 거리 순, 없으면 기존처럼 무작위로 섞음"""
+    import random
+    from app.recommend.features import rerank_by_target
+
+    if target and features_by_id and any(features_by_id.values()):
+        return rerank_by_target(tracks, features_by_id, target)
+    tracks = list(tracks)
+    random.shuffle(tracks)
+    return tracks
+
+def get_audio_features_map(track_ids: List[str]) -> Dict[str, Optional[Dict[str, float]]]:
+    """캐시된 audio features; 없는 id만 100개씩 묶어 sp.audio_features로 조회"""
+    sp = get_spotify()
+    return get_audio_features_cache().get_many_sync(track_ids, sp.audio_features)
 
 def get_recommendations(
     seed_genres: List[str] = None,
@@ -115,136 +195,261 @@ def get_recommendations(
     검색 기반 음악 추천 (Client Credentials Flow 호환)
     다양성을 위해 여러 검색 쿼리를 사용하고 요청된 개수만큼 반환
     """
-    import random
-    
     try:
         all_tracks = []
         used_track_ids = set()
+        target = _target_dict(target_valence, target_energy, target_danceability)
+        pool_size = _candidate_pool_size(limit, target)
         
         # 다양한 검색 쿼리 생성
-        search_queries = []
-        
-        # 기본 장르 기반 검색
-        if seed_genres:
-            for genre in seed_genres[:3]:  # 최대 3개 장르
-                search_queries.append(genre)
-        
-        # 감정 상태에 따른 추가 검색어 조합
-        emotion_terms = []
-        if target_valence is not None:
-            if target_valence > 0.7:
-                emotion_terms.extend(["happy", "uplifting", "cheerful", "joyful"])
-            elif target_valence < 0.3:
-                emotion_terms.extend(["sad", "melancholy", "emotional", "mellow"])
-            else:
-                emotion_terms.extend(["calm", "peaceful", "relaxed"])
-                
-        if target_energy is not None:
-            if target_energy > 0.7:
-                emotion_terms.extend(["upbeat", "energetic", "dance", "party"])
-            elif target_energy < 0.3:
-                emotion_terms.extend(["slow", "acoustic", "ambient", "chill"])
-        
-        # 감정 기반 검색 쿼리 추가
-        for term in emotion_terms[:4]:  # 최대 4개 감정 용어
-            search_queries.append(term)
-        
-        # 다양성을 위한 추가 검색어 (무작위 선택)
-        variety_terms = ["indie", "alternative", "folk", "electronic", "rock", "jazz", "soul", "r&b"]
-        search_queries.extend(random.sample(variety_terms, min(3, len(variety_terms))))
-        
-        # 검색어가 없으면 기본값 사용
-        if not search_queries:
-            search_queries = ["pop", "music", "indie", "alternative"]
-        
-        # 무작위로 섞어서 다양성 증가
-        random.shuffle(search_queries)
+        search_queries = _build_search_queries(seed_genres, target_valence, target_energy)
         
         sp = get_spotify()
+        rate_limited = False
         
-        # 여러 검색 쿼리로 트랙 수집
+        # 여러 검색 쿼리로 후보 트랙 수집
         for query in search_queries:
-            if len(all_tracks) >= limit:
+            if len(all_tracks) >= pool_size:
                 break
                 
             try:
                 # 각 검색마다 적은 수의 결과를 가져와서 다양성 증가
-                search_limit = min(10, limit - len(all_tracks) + 5)
-                results = sp.search(q=query, type="track", limit=search_limit)
+                search_limit = min(10, pool_size - len(all_tracks) + 5)
+                results = cached_search(sp, query, type="track", limit=search_limit)
                 
                 for track in results["tracks"]["items"]:
                     if track.get("id") and track["id"] not in used_track_ids:
                         used_track_ids.add(track["id"])
-                        all_tracks.append({
-                            "id": track.get("id"),
-                            "name": track.get("name"),
-                            "artists": [a.get("name") for a in track.get("artists", [])],
-                            "album": track.get("album", {}).get("name"),
-                            "preview_url": track.get("preview_url"),
-                            "external_urls": track.get("external_urls", {}),
-                            "duration_ms": track.get("duration_ms"),
-                            "popularity": track.get("popularity"),
-                            "explicit": track.get("explicit", False),
-                            "image_url": (track.get("album", {}).get("images", [{}])[0].get("url") if track.get("album", {}).get("images") else None),
-                        })
+                        all_tracks.append(_track_to_dict(track))
                         
-                        if len(all_tracks) >= limit:
+                        if len(all_tracks) >= pool_size:
                             break
             except Exception as search_error:
+                if is_rate_limited(search_error):
+                    # 남은 쿼리도 같은 예산을 쓰므로 더 보내지 않음
+                    logger.warning(f"Spotify rate limited; stopping after {len(all_tracks)} candidates")
+                    rate_limited = True
+                    break
                 logger.warning(f"Search failed for query '{query}': {search_error}")
                 continue
         
-        # 무작위로 섞고 요청된 개수만큼 반환
-        random.shuffle(all_tracks)
-        final_tracks = all_tracks[:limit]
+        # target과 가까운 순서로 정렬하고 요청된 개수만큼 반환
+        features_by_id = (
+            get_audio_features_map([t["id"] for t in all_tracks]) if target and all_tracks and not rate_limited else None
+        )
+        final_tracks = _rank_candidates(all_tracks, target, features_by_id)[:limit]
         
-        # 부족한 경우를 대비한 폴백 검색
-        if len(final_tracks) < limit:
+        # 부족한 경우를 대비한 폴백 검색 (rate limit 중에는 quota를 더 쓰지 않도록 생략)
+        if len(final_tracks) < limit and not rate_limited:
             try:
-                fallback_results = sp.search(q="popular music", type="track", limit=limit * 2)
+                fallback_results = cached_search(sp, FALLBACK_QUERY, type="track", limit=limit * 2)
                 for track in fallback_results["tracks"]["items"]:
                     if len(final_tracks) >= limit:
                         break
                     if track.get("id") and track["id"] not in used_track_ids:
-                        final_tracks.append({
-                            "id": track.get("id"),
-                            "name": track.get("name"),
-                            "artists": [a.get("name") for a in track.get("artists", [])],
-                            "album": track.get("album", {}).get("name"),
-                            "preview_url": track.get("preview_url"),
-                            "external_urls": track.get("external_urls", {}),
-                            "duration_ms": track.get("duration_ms"),
-                            "popularity": track.get("popularity"),
-                            "explicit": track.get("explicit", False),
-                            "image_url": (track.get("album", {}).get("images", [{}])[0].get("url") if track.get("album", {}).get("images") else None),
-                        })
+                        final_tracks.append(_track_to_dict(track))
             except Exception as fallback_error:
                 logger.warning(f"Fallback search failed: {fallback_error}")
         
-        return {
-            "tracks": final_tracks,
-            "total": len(final_tracks),
-            "seeds": {"genres": seed_genres or [], "queries": search_queries[:5]},
-            "parameters": {
-                "total_queries": len(search_queries),
-                "limit": limit,
-                "target_valence": target_valence,
-                "target_energy": target_energy,
-                "target_danceability": target_danceability,
-                "target_acousticness": target_acousticness
-            },
-        }
+        return _recommendation_result(
+            final_tracks, seed_genres, search_queries, limit,
+            target_valence, target_energy, target_danceability, target_acousticness,
+            rate_limited=rate_limited,
+        )
     except Exception as e:
         logger.error(f"Unexpected error in get_recommendations: {e}")
         raise ValueError(f"Failed to get recommendations: {e}")
 
+class AsyncSpotifyClient:
+    """
+    Keep-alive connection pool로 Web API를 호출하는 비동기 클라이언트
+
+    토큰은 동기 클라이언트와 같은 TokenManager에서 받습니다.
+    """
+
+    def __init__(self, timeout: float, max_connections: int):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            base_url=SPOTIFY_API_URL,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+        )
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        tokens = get_token_manager()
+        limiter = get_rate_limiter()
+        auth_retried = False
+        for attempt in range(MAX_ATTEMPTS):
+            await limiter.acquire_async()
+            token = await tokens.get_token_async()
+            response = await self.client.get(
+                path, params=params, headers={"Authorization": f"Bearer {token}"}
+            )
+            if response.status_code == 401 and not auth_retried:
+                auth_retried = True
+                tokens.invalidate(token)  # 만료/폐기된 토큰: 새로 받아서 한 번 더 시도
+                continue
+            if response.status_code == 429:
+                retry_after = parse_retry_after(response.headers)
+                await limiter.backoff_async(retry_after)
+                if attempt + 1 < MAX_ATTEMPTS:
+                    continue
+                raise SpotifyRateLimited(retry_after, f"{path}: rate limited")
+            if response.status_code >= 400:
+                raise spotify_error(response, path)
+            return response.json()
+
+    async def search(
+        self,
+        q: str,
+        type: str = "track",
+        limit: int = 10,
+        offset: int = 0,
+        market: Optional[str] = None,
+        cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        TTL + stale-while-revalidate 캐시를 거치는 검색 (app/services/spotify_cache.py)
+
+        cache=False는 다시 쓰이지 않을 검색(무작위 offset의 pool warming 등)이 캐시를 채우지 않도록 직접 호출
+        """
+        params = {"q": q, "type": type, "limit": limit, "offset": offset}
+        if market:
+            params["market"] = market
+        if not cache:
+            return await self._get("/search", params)
+        return await get_search_cache().get_or_fetch(
+            SearchCache.key(q, type, limit, offset, market),
+            lambda: self._get("/search", params),
+        )
+
+    async def audio_features(self, track_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return (await self._get("/audio-features", {"ids": ",".join(track_ids)}))["audio_features"]
+
+    async def audio_features_map(self, track_ids: List[str]) -> Dict[str, Optional[Dict[str, float]]]:
+        """캐시된 audio features; 없는 id만 100개씩 묶어 동시에 조회"""
+        return await get_audio_features_cache().get_many(track_ids, self.audio_features)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+_async_client: Optional[AsyncSpotifyClient] = None
+
+def get_async_spotify() -> AsyncSpotifyClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncSpotifyClient(settings.SPOTIFY_TIMEOUT_S, settings.SPOTIFY_MAX_CONNECTIONS)
+    return _async_client
+
+async def close_async_spotify() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+async def get_recommendations_async(
+    seed_genres: List[str] = None,
+    seed_artists: List[str] = None,
+    seed_tracks: List[str] = None,
+    limit: int = 20,
+    target_valence: Optional[float] = None,
+    target_energy: Optional[float] = None,
+    target_danceability: Optional[float] = None,
+    target_acousticness: Optional[float] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    get_recommendations의 비동기 버전
+
+    검색 쿼리들을 SPOTIFY_CONCURRENCY개까지 동시에 실행하고, 후보가 충분히 모이면
+    남은 검색은 취소합니다. 지연 시간은 호출들의 합이 아니라 가장 느린 호출 정도가 됩니다.
+    후보는 audio features의 target 거리로 다시 정렬합니다.
+    """
+    try:
+        client = get_async_spotify()
+        target = _target_dict(target_valence, target_energy, target_danceability)
+        pool_size = _candidate_pool_size(limit, target)
+        search_queries = _build_search_queries(seed_genres, target_valence, target_energy)
+        semaphore = asyncio.Semaphore(max(1, settings.SPOTIFY_CONCURRENCY))
+        # 동시에 실행하므로 쿼리별로 남은 개수를 알 수 없음: 순차 버전의 첫 검색과 같은 크기
+        search_limit = min(10, pool_size + 5)
+
+        async def search(query: str) -> Tuple[str, List[Dict[str, Any]]]:
+            async with semaphore:
+                results = await client.search(q=query, type="track", limit=search_limit)
+            return query, results["tracks"]["items"]
+
+        all_tracks = []
+        used_track_ids = set()
+        rate_limited = False
+        search_errors = []
+        tasks = [asyncio.ensure_future(search(query)) for query in search_queries]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    _, items = await next_done
+                except Exception as search_error:
+                    if is_rate_limited(search_error):
+                        # 남은 검색은 취소: 같은 예산을 두고 재시도 폭주가 되지 않도록
+                        logger.warning(f"Spotify rate limited; stopping after {len(all_tracks)} candidates")
+                        rate_limited = True
+                        break
+                    logger.warning(f"Search failed: {search_error}")
+                    search_errors.append(search_error)
+                    continue
+                for track in items:
+                    if track.get("id") and track["id"] not in used_track_ids:
+                        used_track_ids.add(track["id"])
+                        all_tracks.append(_track_to_dict(track))
+                if len(all_tracks) >= pool_size:
+                    break
+        finally:
+            # 충분히 모였으면 아직 대기/진행 중인 검색은 취소
+            for task in tasks:
+                task.cancel()
+
+        if not all_tracks and not rate_limited and search_errors and len(search_errors) == len(search_queries):
+            # 인증 실패 등으로 모든 검색이 실패: 빈 결과(200) 대신 endpoint의 400 경로로
+            raise ValueError(f"All Spotify searches failed: {search_errors[0]}")
+
+        features_by_id = (
+            await client.audio_features_map([t["id"] for t in all_tracks])
+            if target and all_tracks and not rate_limited else None
+        )
+        final_tracks = _rank_candidates(all_tracks, target, features_by_id)[:limit]
+
+        # 부족한 경우를 대비한 폴백 검색 (rate limit 중에는 quota를 더 쓰지 않도록 생략)
+        if len(final_tracks) < limit and not rate_limited:
+            try:
+                fallback_results = await client.search(q=FALLBACK_QUERY, type="track", limit=min(50, limit * 2))
+                for track in fallback_results["tracks"]["items"]:
+                    if len(final_tracks) >= limit:
+                        break
+                    if track.get("id") and track["id"] not in used_track_ids:
+                        used_track_ids.add(track["id"])
+                        final_tracks.append(_track_to_dict(track))
+            except Exception as fallback_error:
+                logger.warning(f"Fallback search failed: {fallback_error}")
+
+        return _recommendation_result(
+            final_tracks, seed_genres, search_queries, limit,
+            target_valence, target_energy, target_danceability, target_acousticness,
+            rate_limited=rate_limited,
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in get_recommendations_async: {e}")
+        raise ValueError(f"Failed to get recommendations: {e}")
+
 def search_tracks(query: str, limit: int = 20) -> Dict[str, Any]:
     """
     트랙 검색
     """
     try:
         sp = get_spotify()
-        results = sp.search(q=query, type="track", limit=min(limit, 50))
+        results = cached_search(sp, query, type="track", limit=min(limit, 50))
         
         tracks = []
         for track in results["tracks"]["items"]:
@@ -276,30 +481,24 @@ def search_tracks(query: str, limit: int = 20) -> Dict[str, Any]:
 
 def get_audio_features(track_ids: List[str]) -> Dict[str, Any]:
     """
-    트랙의 오디오 특성 정보 가져오기
+    트랙의 오디오 특성 정보 가져오기 (per-track 캐시, 100개 단위 batch 조회)
     """
     try:
-        sp = get_spotify()
-        features = sp.audio_features(track_ids)
-        return {"audio_features": features}
+        features = get_audio_features_map(track_ids)
+        return {
+            "audio_features": [
+                {"id": track_id, **features[track_id]} if features.get(track_id) else None
+                for track_id in track_ids
+            ]
+        }
     except SpotifyException as e:
         logger.error(f"Failed to get audio features: {e}")
         raise ValueError(f"Audio features request failed: {e}")
 
 def get_available_genres() -> List[str]:
-    """사용 가능한 장르 리스트 반환 (Client Credentials 토큰 자동 갱신 포함)"""
+    """사용 가능한 장르 리스트 반환 (토큰 갱신/401 재시도는 공용 클라이언트가 처리)"""
     try:
-        token = _ensure_app_token()
-        headers = {"Authorization": f"Bearer {token}"}
-        url = "https://api.spotify.com/v1/recommendations/available-genre-seeds"
-        res = requests.get(url, headers=headers, timeout=15)
-        if res.status_code == 401:
-            token = _ensure_app_token()
-            headers = {"Authorization": f"Bearer {token}"}
-            res = requests.get(url, headers=headers, timeout=15)
-        if res.status_code != 200:
-            raise ValueError(f"Genre seeds failed: {res.status_code} {res.text}")
-        return res.json().get("genres", [])
+        return get_spotify_client().recommendation_genre_seeds().get("genres", [])
     except Exception as e:
         logger.error(f"Failed to get available genres: {e}")
         raise ValueError(f"Genre list request failed: {e}")
@@ -0,0 +1,271 @@
+"""
+Spotify response caches: search (TTL + stale-while-revalidate) and per-track audio features
+
+추천 검색어는 장르 seed와 몇십 개의 감정/다양성 용어뿐이라 같은 검색이 계속 반복됩니다.
+(q, type, limit, offset, market) 키로 응답을 저장하고,
+
+- TTL 이내: 캐시에서 바로 응답 (fresh hit)
+- TTL 초과 ~ TTL + STALE 이내: 오래된 응답을 바로 돌려주고 백그라운드에서 갱신 (stale hit)
+- 그 이후: 새로 요청 (miss)
+
+동시에 같은 키를 요청하면 single-flight로 한 번만 Spotify를 호출합니다. stale 항목의 갱신은
+rate limit scheduler에서 백그라운드 우선순위로 실행되어 사용자 요청의 예산을 먼저 보장합니다.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.cache import LRUCache, stable_digest
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.services.spotify_ratelimit import background_priority, is_rate_limited
+
+logger = logging.getLogger(__name__)
+
+
+class SearchCache:
+    def __init__(self, maxsize: int, ttl: float, stale: float):
+        # 만료는 직접 판단 (stale 구간의 항목도 꺼내야 하므로 LRU 자체 TTL은 사용하지 않음)
+        self.entries = LRUCache(maxsize)
+        self.ttl = ttl
+        self.stale = stale
+        self._flights = SingleFlight()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    @staticmethod
+    def key(q: str, type: str, limit: int, offset: int = 0, market: Optional[str] = None) -> str:
+        return stable_digest(q, type, str(limit), str(offset), market or "")
+
+    def _lookup(self, key: str):
+        """(value, is_fresh) 또는 (None, False)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None, False
+        value, fetched_at = entry
+        age = time.time() - fetched_at
+        if age < self.ttl:
+            return value, True
+        if age < self.ttl + self.stale:
+            return value, False
+        self.entries.delete(key)
+        return None, False
+
+    def _store(self, key: str, value: Any) -> Any:
+        self.entries.set(key, (value, time.time()))
+        return value
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value, fresh = self._lookup(key)
+        if value is not None:
+            if fresh:
+                self.fresh_hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh_async(key, fetch)
+            return value
+        self.misses += 1
+        return await self._flights.do(key, lambda: self._fetch_and_store(key, fetch))
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        return self._store(key, await fetch())
+
+    def _refresh_async(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._flights:
+            return
+
+        async def refresh() -> None:
+            self.refreshes += 1
+            try:
+                with background_priority():
+                    await self._flights.do(key, lambda: self._fetch_and_store(key, fetch))
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Background search refresh failed: {e}")
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def get_or_fetch_sync(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """동기 호출 경로 (spotipy): stale 항목은 백그라운드 스레드에서 갱신"""
+        value, fresh = self._lookup(key)
+        if value is not None:
+            if fresh:
+                self.fresh_hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh_sync(key, fetch)
+            return value
+        self.misses += 1
+        return self._store(key, fetch())
+
+    def _refresh_sync(self, key: str, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            self.refreshes += 1
+            try:
+                with background_priority():
+                    self._store(key, fetch())
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Background search refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.entries.maxsize,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": ((self.fresh_hits + self.stale_hits) / lookups) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "singleflight": self._flights.stats(),
+        }
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache(
+            maxsize=settings.SPOTIFY_SEARCH_CACHE_SIZE,
+            ttl=settings.SPOTIFY_SEARCH_TTL_S,
+            stale=settings.SPOTIFY_SEARCH_STALE_S,
+        )
+    return _search_cache
+
+
+# Spotify /audio-features 한 번에 조회할 수 있는 최대 id 수
+AUDIO_FEATURES_BATCH = 100
+AUDIO_FEATURE_KEYS = ("valence", "energy", "danceability", "acousticness", "tempo")
+
+
+class AudioFeaturesCache:
+    """
+    Per-track audio features cache + batcher
+
+    캐시에 없는 id만 AUDIO_FEATURES_BATCH개씩 묶어 조회합니다. Spotify가 features를 주지
+    않는 트랙과 조회에 실패한 묶음은 빈 dict로 negative_ttl 동안 기억하여 매 요청마다
+    다시 묻지 않습니다.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float], negative_ttl: float):
+        self.entries = LRUCache(maxsize, ttl=ttl)
+        self.negative_ttl = negative_ttl
+        self._flights = SingleFlight()
+        self.fetches = 0
+        self.failures = 0
+
+    def _split(self, track_ids: List[str]):
+        found: Dict[str, Optional[Dict[str, float]]] = {}
+        missing: List[str] = []
+        for track_id in dict.fromkeys(t for t in track_ids if t):
+            features = self.entries.get(track_id)
+            if features is None:
+                missing.append(track_id)
+            else:
+                found[track_id] = features or None
+        return found, missing
+
+    def _store(self, chunk: List[str], items: List[Optional[Dict[str, Any]]]) -> Dict[str, Optional[Dict[str, float]]]:
+        by_id = {item["id"]: item for item in items if item and item.get("id")}
+        result = {}
+        for track_id in chunk:
+            item = by_id.get(track_id)
+            if item is None:
+                self.entries.set(track_id, {}, ttl=self.negative_ttl)
+                result[track_id] = None
+            else:
+                features = {k: item.get(k) for k in AUDIO_FEATURE_KEYS}
+                self.entries.set(track_id, features)
+                result[track_id] = features
+        return result
+
+    def _failed(self, chunk: List[str], error: Exception) -> Dict[str, None]:
+        self.failures += 1
+        logger.warning(f"Audio features request failed for {len(chunk)} tracks: {error}")
+        if is_rate_limited(error):
+            # features가 없는 것이 아니라 예산이 없었던 것이므로 다음 요청에서 다시 조회
+            return {track_id: None for track_id in chunk}
+        for track_id in chunk:
+            self.entries.set(track_id, {}, ttl=self.negative_ttl)
+        return {track_id: None for track_id in chunk}
+
+    @staticmethod
+    def _chunks(track_ids: List[str]) -> List[List[str]]:
+        return [track_ids[i:i + AUDIO_FEATURES_BATCH] for i in range(0, len(track_ids), AUDIO_FEATURES_BATCH)]
+
+    def get_many_sync(
+        self, track_ids: List[str], fetch: Callable[[List[str]], List[Optional[Dict[str, Any]]]]
+    ) -> Dict[str, Optional[Dict[str, float]]]:
+        """id -> audio features (없으면 None); fetch(chunk)는 Spotify 응답 순서의 리스트"""
+        found, missing = self._split(track_ids)
+        for chunk in self._chunks(missing):
+            self.fetches += 1
+            try:
+                found.update(self._store(chunk, fetch(chunk)))
+            except Exception as e:
+                found.update(self._failed(chunk, e))
+        return found
+
+    async def get_many(
+        self, track_ids: List[str], fetch: Callable[[List[str]], Awaitable[List[Optional[Dict[str, Any]]]]]
+    ) -> Dict[str, Optional[Dict[str, float]]]:
+        found, missing = self._split(track_ids)
+
+        async def run(chunk: List[str]) -> Dict[str, Optional[Dict[str, float]]]:
+            self.fetches += 1
+            try:
+                return self._store(chunk, await fetch(chunk))
+            except Exception as e:
+                return self._failed(chunk, e)
+
+        results = await asyncio.gather(*(
+            self._flights.do(stable_digest(*chunk), lambda chunk=chunk: run(chunk))
+            for chunk in self._chunks(missing)
+        ))
+        for result in results:
+            found.update(result)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.entries.stats()
+        stats["fetches"] = self.fetches
+        stats["failures"] = self.failures
+        return stats
+
+
+_audio_features_cache: Optional[AudioFeaturesCache] = None
+
+
+def get_audio_features_cache() -> AudioFeaturesCache:
+    global _audio_features_cache
+    if _audio_features_cache is None:
+        _audio_features_cache = AudioFeaturesCache(
+            maxsize=settings.SPOTIFY_AUDIO_FEATURES_CACHE_SIZE,
+            ttl=settings.SPOTIFY_AUDIO_FEATURES_TTL_S or None,
+            negative_ttl=settings.SPOTIFY_AUDIO_FEATURES_NEGATIVE_TTL_S,
+        )
+    return _audio_features_cache
@@ -0,0 +1,226 @@
+"""
+Central Spotify Web API access: pooled HTTP session + token manager
+
+모든 Spotify 호출(spotify.py의 동기/비동기 경로, 추천, 카탈로그 ingest)은 이 모듈을 거칩니다.
+
+- 하나의 requests.Session (keep-alive connection pool)으로 TLS handshake를 재사용
+- TokenManager: Client Credentials 또는 Refresh Token 모드, 만료 SPOTIFY_TOKEN_REFRESH_MARGIN_S초
+  전에 미리 갱신하며 동시에 여러 스레드가 갱신하지 않도록 single-flight(lock + 재확인)
+- 401 응답 시 토큰을 무효화하고 한 번 다시 시도
+- 모든 API 요청은 rate limit scheduler(app/services/spotify_ratelimit.py)의 토큰을 얻은 뒤 전송하고,
+  429 응답은 Retry-After만큼 모든 worker를 멈춘 뒤 다시 시도
+- SpotifyClient는 이 앱이 쓰는 spotipy.Spotify 메서드와 같은 시그니처/응답을 제공
+"""
+import asyncio
+import base64
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from spotipy.exceptions import SpotifyException
+
+from app.core.config import settings
+from app.services.spotify_ratelimit import SpotifyRateLimited, get_rate_limiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+SPOTIFY_API_URL = "https://api.spotify.com/v1"
+SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+# 401 재인증 1회 + 429 재시도 1회
+MAX_ATTEMPTS = 3
+
+
+def spotify_credentials() -> Dict[str, Optional[str]]:
+    return {
+        "client_id": os.getenv("SPOTIFY_CLIENT_ID") or settings.SPOTIFY_CLIENT_ID,
+        "client_secret": os.getenv("SPOTIFY_CLIENT_SECRET") or settings.SPOTIFY_CLIENT_SECRET,
+        "refresh_token": os.getenv("SPOTIFY_REFRESH_TOKEN") or settings.SPOTIFY_REFRESH_TOKEN,
+    }
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Spotify API/accounts 호출에 공용으로 쓰는 keep-alive session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=2,  # api.spotify.com, accounts.spotify.com
+                pool_maxsize=settings.SPOTIFY_MAX_CONNECTIONS,
+            )
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class TokenManager:
+    """
+    Thread-safe access token cache
+
+    mode는 refresh token이 있으면 "refresh_token", 없으면 "client_credentials".
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        refresh_token: Optional[str] = None,
+        refresh_margin: float = 300.0,
+    ):
+        if not client_id or not client_secret:
+            raise ValueError("Spotify credentials not configured. Set SPOTIFY_CLIENT_ID/SECRET in .env")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.mode = "refresh_token" if refresh_token else "client_credentials"
+        self.refresh_margin = refresh_margin
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def _valid(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self.refresh_margin
+
+    def get_token(self) -> str:
+        if self._valid():
+            return self._token
+        with self._lock:
+            # lock을 기다리는 동안 다른 스레드가 이미 갱신했으면 그대로 사용
+            if not self._valid():
+                self._refresh()
+            return self._token
+
+    async def get_token_async(self) -> str:
+        """이벤트 루프용: 유효하면 바로 반환, 갱신이 필요할 때만 스레드에서 blocking 요청"""
+        if self._valid():
+            return self._token
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """401을 받은 토큰을 버림 (그 사이 이미 새 토큰으로 바뀌었으면 무시)"""
+        with self._lock:
+            if token is None or token == self._token:
+                self._token = None
+                self._expires_at = 0.0
+
+    def _refresh(self) -> None:
+        creds = f"{self.client_id}:{self.client_secret}".encode("utf-8")
+        headers = {
+            "Authorization": "Basic " + base64.b64encode(creds).decode("utf-8"),
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        if self.mode == "refresh_token":
+            data = {"grant_type": "refresh_token", "refresh_token": self.refresh_token}
+        else:
+            data = {"grant_type": "client_credentials"}
+        resp = get_session().post(SPOTIFY_TOKEN_URL, headers=headers, data=data, timeout=settings.SPOTIFY_TIMEOUT_S)
+        if resp.status_code != 200:
+            raise ValueError(f"Failed to obtain Spotify token: {resp.status_code} {resp.text}")
+        payload = resp.json()
+        self._token = payload["access_token"]
+        self._expires_at = time.time() + int(payload.get("expires_in", 3600))
+        # refresh token이 교체되어 오는 경우도 있음
+        if payload.get("refresh_token"):
+            self.refresh_token = payload["refresh_token"]
+        self.refreshes += 1
+        logger.info(f"Spotify {self.mode} token refreshed")
+
+
+_token_manager: Optional[TokenManager] = None
+_token_manager_lock = threading.Lock()
+
+
+def get_token_manager() -> TokenManager:
+    global _token_manager
+    with _token_manager_lock:
+        if _token_manager is None:
+            creds = spotify_credentials()
+            _token_manager = TokenManager(
+                creds["client_id"],
+                creds["client_secret"],
+                creds["refresh_token"],
+                refresh_margin=settings.SPOTIFY_TOKEN_REFRESH_MARGIN_S,
+            )
+        return _token_manager
+
+
+def spotify_error(resp, url: str) -> SpotifyException:
+    """4xx/5xx 응답 (requests / httpx Response 모두) -> SpotifyException"""
+    try:
+        message = resp.json().get("error", {}).get("message", resp.text)
+    except (ValueError, AttributeError):
+        message = resp.text
+    return SpotifyException(resp.status_code, -1, f"{url}: {message}", headers=dict(resp.headers))
+
+
+class SpotifyClient:
+    """spotipy.Spotify 중 이 앱이 사용하는 메서드만 구현한 얇은 클라이언트"""
+
+    def __init__(self, tokens: TokenManager, session: Optional[requests.Session] = None):
+        self.tokens = tokens
+        self.session = session or get_session()
+
+    def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        url = path if path.startswith("http") else f"{SPOTIFY_API_URL}{path}"
+        limiter = get_rate_limiter()
+        auth_retried = False
+        for attempt in range(MAX_ATTEMPTS):
+            limiter.acquire()
+            token = self.tokens.get_token()
+            resp = self.session.request(
+                method, url, params=params,
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=settings.SPOTIFY_TIMEOUT_S,
+            )
+            if resp.status_code == 401 and not auth_retried:
+                # 만료/폐기된 토큰: 새로 받아서 한 번 더 시도
+                auth_retried = True
+                self.tokens.invalidate(token)
+                continue
+            if resp.status_code == 429:
+                retry_after = parse_retry_after(resp.headers)
+                limiter.backoff(retry_after)
+                if attempt + 1 < MAX_ATTEMPTS:
+                    continue  # 다음 acquire()가 Retry-After를 기다리거나 최대 대기를 넘으면 포기
+                raise SpotifyRateLimited(retry_after, f"{url}: rate limited")
+            if resp.status_code >= 400:
+                raise spotify_error(resp, url)
+            return resp.json() if resp.content else {}
+
+    def search(self, q: str, limit: int = 10, offset: int = 0, type: str = "track", market: Optional[str] = None):
+        params = {"q": q, "limit": limit, "offset": offset, "type": type}
+        if market:
+            params["market"] = market
+        return self._request("GET", "/search", params)
+
+    def audio_features(self, tracks: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return self._request("GET", "/audio-features", {"ids": ",".join(tracks)}).get("audio_features", [])
+
+    def recommendations(self, seed_genres: Optional[List[str]] = None, limit: int = 20, **kwargs) -> Dict[str, Any]:
+        params = {"limit": limit, **kwargs}
+        if seed_genres:
+            params["seed_genres"] = ",".join(seed_genres)
+        return self._request("GET", "/recommendations", params)
+
+    def recommendation_genre_seeds(self) -> Dict[str, Any]:
+        return self._request("GET", "/recommendations/available-genre-seeds")
+
+
+_client: Optional[SpotifyClient] = None
+
+
+def get_spotify_client() -> SpotifyClient:
+    global _client
+    if _client is None:
+        _client = SpotifyClient(get_token_manager())
+    return _client
@@ -0,0 +1,260 @@
+"""
+Rate-limit-aware scheduler in front of every Spotify Web API call
+
+- Token bucket (SPOTIFY_RATE_LIMIT_PER_S, burst SPOTIFY_RATE_LIMIT_BURST)을 SQLite 한 행에 저장하여
+  같은 SPOTIFY_RATE_LIMIT_DB를 쓰는 모든 uvicorn worker / 스크립트가 하나의 예산을 나눠 씀
+  (비어 있으면 프로세스 내부 in-memory bucket)
+- 429 응답의 Retry-After 동안은 모든 프로세스가 요청을 멈추고, 이후 bucket을 비운 상태에서 다시 시작
+- 우선순위: 사용자 요청(PRIORITY_USER)은 토큰 1개만 있으면 진행하지만, 백그라운드 작업
+  (캐시 갱신, 카탈로그 ingest, 후보 warming)은 burst의 SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE
+  비율만큼을 사용자 몫으로 남겨 둬야 진행
+- 기다려야 하는 시간이 최대 대기(사용자 SPOTIFY_RATE_LIMIT_MAX_WAIT_S)를 넘으면 재시도 폭주 대신
+  바로 SpotifyRateLimited를 발생
+- 공유 DB의 트랜잭션은 async 경로에서 to_thread로 실행 (event loop를 막지 않음); 다른 worker가
+  잠그고 있어 "database is locked"이면 잠시 뒤 다시 시도하고, 최대 대기를 넘으면 SpotifyRateLimited
+
+우선순위는 contextvar로 전달되므로 호출 경로의 함수 시그니처를 바꿀 필요가 없습니다:
+
+    with background_priority():
+        sp.search(...)
+"""
+import asyncio
+import contextlib
+import contextvars
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from spotipy.exceptions import SpotifyException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_USER = "user"
+PRIORITY_BACKGROUND = "background"
+
+# Retry-After 헤더가 없거나 읽을 수 없는 429
+DEFAULT_RETRY_AFTER_S = 5.0
+# 공유 DB의 write lock을 기다리는 최대 시간과, 얻지 못했을 때 다시 시도하기까지의 대기
+LOCK_TIMEOUT_S = 0.5
+LOCKED_RETRY_S = 0.05
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("spotify_priority", default=PRIORITY_USER)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextlib.contextmanager
+def background_priority() -> Iterator[None]:
+    """이 블록 안의 Spotify 호출(같은 context의 task / to_thread 포함)을 백그라운드 우선순위로"""
+    token = _priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class SpotifyRateLimited(SpotifyException):
+    """요청 예산이 부족하거나 Retry-After가 최대 대기보다 길어서 보내지 않은 요청"""
+
+    def __init__(self, retry_after: float, msg: str = "Spotify rate limit budget exhausted"):
+        super().__init__(429, -1, f"{msg} (retry after {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return isinstance(error, SpotifyRateLimited) or getattr(error, "http_status", None) == 429
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> float:
+    try:
+        return max(0.0, float((headers or {}).get("Retry-After")))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_S
+
+
+class RateLimitScheduler:
+    BUCKET = "spotify"
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        background_reserve: float = 0.5,
+        max_wait: float = 3.0,
+        background_max_wait: float = 120.0,
+        db_path: str = "",
+    ):
+        self.rate = max(rate, 1e-6)
+        self.burst = max(1, burst)
+        self.background_reserve = min(max(background_reserve, 0.0), 1.0)
+        self.max_wait = {PRIORITY_USER: max_wait, PRIORITY_BACKGROUND: background_max_wait}
+        self.db_path = db_path
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # 트랜잭션이 짧으므로 프로세스당 연결 하나를 lock으로 보호
+        self._conn = sqlite3.connect(
+            db_path or ":memory:", timeout=LOCK_TIMEOUT_S, isolation_level=None, check_same_thread=False
+        )
+        if db_path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_bucket ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "blocked_until REAL NOT NULL DEFAULT 0)"
+        )
+        self._lock = threading.Lock()
+        self.acquired = {PRIORITY_USER: 0, PRIORITY_BACKGROUND: 0}
+        self.rejected = {PRIORITY_USER: 0, PRIORITY_BACKGROUND: 0}
+        self.waited_s = 0.0
+        self.throttled = 0
+        self.lock_contention = 0
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _load(self, conn: sqlite3.Connection, now: float):
+        row = conn.execute(
+            "SELECT tokens, updated_at, blocked_until FROM rate_limit_bucket WHERE name = ?", (self.BUCKET,)
+        ).fetchone()
+        if row is None:
+            return float(self.burst), 0.0
+        tokens, updated_at, blocked_until = row
+        # Retry-After 동안은 채우지 않음 (updated_at이 blocked_until로 설정됨)
+        tokens = min(float(self.burst), tokens + max(0.0, now - updated_at) * self.rate)
+        return tokens, blocked_until
+
+    def _save(self, conn: sqlite3.Connection, tokens: float, updated_at: float, blocked_until: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO rate_limit_bucket (name, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+            (self.BUCKET, tokens, updated_at, blocked_until),
+        )
+
+    def _try_acquire(self, priority: str) -> float:
+        """토큰을 얻었으면 0, 아니면 다시 시도하기까지 기다릴 시간(초)"""
+        try:
+            return self._take_token(priority)
+        except sqlite3.OperationalError as e:
+            # 다른 worker가 bucket을 잠그고 있음: 토큰이 없는 것처럼 잠시 뒤 다시 시도
+            self.lock_contention += 1
+            logger.debug(f"Rate limit bucket busy: {e}")
+            return LOCKED_RETRY_S
+
+    def _take_token(self, priority: str) -> float:
+        now = time.time()
+        with self._transaction() as conn:
+            tokens, blocked_until = self._load(conn, now)
+            if blocked_until > now:
+                return blocked_until - now
+            needed = 1.0
+            if priority == PRIORITY_BACKGROUND:
+                needed = min(float(self.burst), needed + self.background_reserve * self.burst)
+            if tokens >= needed:
+                self._save(conn, tokens - 1.0, now, blocked_until)
+                return 0.0
+            return (needed - tokens) / self.rate
+
+    def _check_wait(self, priority: str, wait: float, deadline: float) -> None:
+        if time.monotonic() + wait > deadline:
+            self.rejected[priority] += 1
+            raise SpotifyRateLimited(wait)
+
+    def acquire(self, priority: Optional[str] = None) -> None:
+        """요청 하나를 보낼 토큰을 얻을 때까지 대기 (최대 대기를 넘으면 SpotifyRateLimited)"""
+        priority = priority or current_priority()
+        deadline = time.monotonic() + self.max_wait[priority]
+        while True:
+            wait = self._try_acquire(priority)
+            if wait <= 0:
+                self.acquired[priority] += 1
+                return
+            self._check_wait(priority, wait, deadline)
+            self.waited_s += wait
+            time.sleep(wait)
+
+    async def acquire_async(self, priority: Optional[str] = None) -> None:
+        priority = priority or current_priority()
+        deadline = time.monotonic() + self.max_wait[priority]
+        while True:
+            # 공유 DB는 BEGIN IMMEDIATE가 다른 worker를 기다릴 수 있으므로 thread에서
+            wait = await asyncio.to_thread(self._try_acquire, priority) if self.db_path else self._try_acquire(priority)
+            if wait <= 0:
+                self.acquired[priority] += 1
+                return
+            self._check_wait(priority, wait, deadline)
+            self.waited_s += wait
+            await asyncio.sleep(wait)
+
+    def backoff(self, retry_after: float) -> None:
+        """429 응답: 모든 프로세스가 retry_after 동안 멈추고 빈 bucket에서 다시 시작"""
+        self.throttled += 1
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                _, blocked_until = self._load(conn, now)
+                blocked_until = max(blocked_until, now + retry_after)
+                self._save(conn, 0.0, blocked_until, blocked_until)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Failed to record Spotify 429 backoff in the shared bucket: {e}")
+
+    async def backoff_async(self, retry_after: float) -> None:
+        if self.db_path:
+            await asyncio.to_thread(self.backoff, retry_after)
+        else:
+            self.backoff(retry_after)
+        logger.warning(f"Spotify returned 429; pausing requests for {retry_after:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 bucket 상태 (읽기 전용: write lock을 잡지 않음, 공유 DB는 async 경로에서 to_thread로)"""
+        now = time.time()
+        try:
+            with self._lock:
+                tokens, blocked_until = self._load(self._conn, now)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Rate limit bucket unreadable: {e}")
+            tokens, blocked_until = None, 0.0
+        return {
+            "shared": bool(self.db_path),
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "tokens": round(tokens, 3) if tokens is not None else None,
+            "blocked_for_s": round(max(0.0, blocked_until - now), 3),
+            "acquired": dict(self.acquired),
+            "rejected": dict(self.rejected),
+            "waited_s": round(self.waited_s, 3),
+            "throttled": self.throttled,
+            "lock_contention": self.lock_contention,
+        }
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimitScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler(
+                rate=settings.SPOTIFY_RATE_LIMIT_PER_S,
+                burst=settings.SPOTIFY_RATE_LIMIT_BURST,
+                background_reserve=settings.SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE,
+                max_wait=settings.SPOTIFY_RATE_LIMIT_MAX_WAIT_S,
+                background_max_wait=settings.SPOTIFY_RATE_LIMIT_BACKGROUND_MAX_WAIT_S,
+                db_path=settings.SPOTIFY_RATE_LIMIT_DB,
+            )
+        return _scheduler
@@ -2,65 +2,438 @@
 Translation service for Korean-English text processing
 """
 from deep_translator import GoogleTranslator
-from langdetect import detect, LangDetectException
-from typing import Tuple
+from langdetect import DetectorFactory, detect, LangDetectException
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import html
+import json
 import logging
+import re
+
+from app.core.cache import LRUCache, SQLiteStore, stable_digest
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+TranslationResult = Tuple[str, str, bool]
+
+# langdetect는 기본적으로 호출마다 난수를 쓰므로 seed를 고정해 같은 입력에 같은 결과를 보장
+DetectorFactory.seed = 0
+
+# Script 비율 판정과 langdetect는 앞부분만 보면 충분함
+DETECT_PREFIX_CHARS = 1000
+SCRIPT_DOMINANT_RATIO = 0.6  # 글자 중 한글/가나 비율이 이 이상이면 바로 결정
+LATIN_ONLY_RATIO = 0.95
+_ENGLISH_HINTS = frozenset(
+    "i me my we you he she it they the a an and but or to of in on at for with is am are was were "
+    "be been have has had do did not so this that today".split()
+)
+_WORD = re.compile(r"[A-Za-z']+")
+
+
+def detect_by_script(text: str) -> Optional[str]:
+    """
+    Unicode script ratios로 명확한 경우만 판정 ('ko' | 'ja' | 'en' | 'unknown'), 애매하면 None
+
+    - 글자가 하나도 없음 -> 'unknown'
+    - 한글 비율 >= SCRIPT_DOMINANT_RATIO -> 'ko'
+    - 가나 비율 >= SCRIPT_DOMINANT_RATIO (한자 포함) -> 'ja'
+    - 거의 ASCII 라틴 문자이고 흔한 영어 기능어가 있음 -> 'en'
+    """
+    hangul = kana = han = ascii_latin = other = 0
+    for ch in text[:DETECT_PREFIX_CHARS]:
+        if not ch.isalpha():
+            continue
+        code = ord(ch)
+        if 0xAC00 <= code <= 0xD7A3 or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+            hangul += 1
+        elif 0x3040 <= code <= 0x30FF:
+            kana += 1
+        elif 0x4E00 <= code <= 0x9FFF:
+            han += 1
+        elif code < 0x80:
+            ascii_latin += 1
+        else:
+            other += 1
+    letters = hangul + kana + han + ascii_latin + other
+    if letters == 0:
+        return 'unknown'
+    if hangul / letters >= SCRIPT_DOMINANT_RATIO:
+        return 'ko'
+    if kana and (kana + han) / letters >= SCRIPT_DOMINANT_RATIO:
+        return 'ja'
+    if ascii_latin / letters >= LATIN_ONLY_RATIO and not other:
+        words = _WORD.findall(text[:DETECT_PREFIX_CHARS].lower())
+        if any(w in _ENGLISH_HINTS for w in words):
+            return 'en'
+    return None
+
+# 문장 부호 뒤의 공백 또는 줄바꿈에서 문장을 나눔 (구분자는 재조립을 위해 캡처)
+_SENTENCE_BOUNDARY = re.compile(r"((?<=[.!?。！？…])[ \t]+|[ \t]*\n\s*)")
+# Google 번역 단일 요청 한도(5000자)보다 여유 있게
+TRANSLATE_CHUNK_CHARS = 4500
+
+
+def split_sentences(text: str) -> Tuple[List[str], List[str]]:
+    """Returns (sentences, separators); len(separators) == len(sentences) - 1"""
+    pieces = _SENTENCE_BOUNDARY.split(text.strip())
+    return pieces[0::2], pieces[1::2]
+
+
+def join_sentences(sentences: List[str], separators: List[str]) -> str:
+    """split_sentences의 역: 줄바꿈은 유지하고 나머지 구분자는 공백 하나로"""
+    parts = [sentences[0]]
+    for sep, sentence in zip(separators, sentences[1:]):
+        parts.append("\n" * sep.count("\n") if "\n" in sep else " ")
+        parts.append(sentence)
+    return "".join(parts)
+
+
+def chunk_sentences(sentences: List[str], limit: int = TRANSLATE_CHUNK_CHARS) -> List[List[int]]:
+    """'\n'으로 이어 붙였을 때 limit 이하가 되도록 문장 인덱스를 묶음"""
+    chunks: List[List[int]] = []
+    size = 0
+    for i, sentence in enumerate(sentences):
+        if chunks and size + 1 + len(sentence) <= limit:
+            chunks[-1].append(i)
+            size += 1 + len(sentence)
+        else:
+            chunks.append([i])
+            size = len(sentence)
+    return chunks
+
+
+class TranslationCache:
+    """
+    Bounded translation cache keyed by a stable content digest
+
+    - memory tier: 프로세스별 LRU (TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL)
+    - disk tier: TRANSLATION_CACHE_DB가 설정되면 SQLite 파일 (워커 간 공유, 재시작 후에도 유지)
+
+    번역 실패 결과는 TRANSLATION_NEGATIVE_TTL 동안만 캐시하여 일시적인 장애가
+    캐시에 고정되지 않도록 합니다.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        negative_ttl: float = 60.0,
+        db_path: Optional[str] = None,
+    ):
+        self.memory = LRUCache(maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.disk: Optional[SQLiteStore] = None
+        if db_path:
+            try:
+                self.disk = SQLiteStore(db_path, table="translations")
+            except Exception as e:
+                logger.warning(f"Translation cache disk tier disabled ({db_path}): {e}")
+        self.disk_hits = 0
+        self.negative_stores = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        # backend별로 분리: stub(원문 그대로) 결과가 실제 번역 항목을 덮어쓰지 않도록
+        return stable_digest("translate:en", settings.TRANSLATION_BACKEND, text.strip())
+
+    def get(self, text: str) -> Optional[TranslationResult]:
+        key = self.key(text)
+        result = self.memory.get(key)
+        if result is not None or self.disk is None:
+            return result
+        try:
+            blob = self.disk.get(key)
+        except Exception as e:
+            logger.warning(f"Translation cache disk read failed: {e}")
+            return None
+        if blob is None:
+            return None
+        payload = json.loads(blob)
+        result = tuple(payload["result"])
+        self.disk_hits += 1
+        # 실패 결과는 memory tier에서도 짧은 TTL 유지
+        self.memory.set(key, result, ttl=self.negative_ttl if payload.get("negative") else None)
+        return result
+
+    def set(self, text: str, result: TranslationResult, negative: bool = False) -> None:
+        key = self.key(text)
+        ttl = self.negative_ttl if negative else self.ttl
+        if negative:
+            self.negative_stores += 1
+        self.memory.set(key, result, ttl=ttl)
+        if self.disk is not None:
+            try:
+                payload = {"result": list(result), "negative": negative}
+                self.disk.set(key, json.dumps(payload).encode("utf-8"), ttl=ttl)
+            except Exception as e:
+                logger.warning(f"Translation cache disk write failed: {e}")
+
+    def stats(self) -> Dict:
+        stats = self.memory.stats()
+        stats["disk_enabled"] = self.disk is not None
+        stats["disk_hits"] = self.disk_hits
+        stats["negative_stores"] = self.negative_stores
+        return stats
+
+
+GOOGLE_MOBILE_URL = "https://translate.google.com/m"
+_RESULT_CONTAINER = re.compile(r'<div class="result-container">(.*?)</div>', re.S)
+
+
+class AsyncGoogleTranslator:
+    """deep-translator와 같은 Google 모바일 번역 페이지를 pooled httpx client로 호출"""
+
+    def __init__(self, timeout: float, max_connections: int):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+            headers={"User-Agent": "Mozilla/5.0"},
+        )
+
+    async def translate(self, text: str, source: str) -> str:
+        response = await self.client.get(GOOGLE_MOBILE_URL, params={"sl": source, "tl": "en", "q": text})
+        response.raise_for_status()
+        match = _RESULT_CONTAINER.search(response.text)
+        if match is None:
+            raise ValueError("No translation found in Google response")
+        return html.unescape(match.group(1))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class StubTranslator:
+    """TRANSLATION_BACKEND=stub: 네트워크 없이 원문을 그대로 돌려줌 (오프라인 테스트용)"""
+
+    async def translate(self, text: str, source: str) -> str:
+        return text
+
+    async def aclose(self) -> None:
+        pass
+
+
+def create_async_translator():
+    if settings.TRANSLATION_BACKEND == "stub":
+        return StubTranslator()
+    if settings.TRANSLATION_BACKEND == "google":
+        return AsyncGoogleTranslator(settings.TRANSLATION_TIMEOUT_S, settings.TRANSLATION_MAX_CONNECTIONS)
+    raise ValueError(f"Unknown TRANSLATION_BACKEND '{settings.TRANSLATION_BACKEND}', expected google | stub")
+
+
+def is_degraded(result: TranslationResult) -> bool:
+    """번역이 필요한 언어였지만 원문 그대로 반환된 결과 (실패/deadline 초과)"""
+    _, detected_lang, was_translated = result
+    return not was_translated and detected_lang not in ('en', 'unknown')
+
+
 class TranslationService:
-    def __init__(self):
-        self._cache = {}  # Simple in-memory cache
-    
+    def __init__(self, cache: Optional[TranslationCache] = None):
+        self._cache = cache or TranslationCache(
+            maxsize=settings.TRANSLATION_CACHE_SIZE,
+            ttl=settings.TRANSLATION_CACHE_TTL or None,
+            negative_ttl=settings.TRANSLATION_NEGATIVE_TTL,
+            db_path=settings.TRANSLATION_CACHE_DB or None,
+        )
+        self.provider_calls = 0
+        self.sentences_translated = 0
+        self.deadline_exceeded = 0
+        self._flights = SingleFlight()
+        self._async_translator = None
+
     def detect_language(self, text: str) -> str:
-        """Detect language, return 'ko' or 'en' or 'unknown'"""
-        try:
-            detected = detect(text)
+        """
+        Detect language, return 'ko' or 'en' or 'unknown' (or another langdetect code)
+
+        Script 비율로 명확한 경우는 바로 결정하고, 섞여 있거나 애매한 텍스트만
+        앞부분 DETECT_PREFIX_CHARS 글자에 대해 (seed 고정) langdetect를 실행합니다.
+        """
+        detected = detect_by_script(text)
+        if detected is not None:
             return detected
+        try:
+            return detect(text[:DETECT_PREFIX_CHARS])
         except LangDetectException:
             return 'unknown'
-    
-    def translate_to_english(self, text: str) -> Tuple[str, str, bool]:
+
+    def translate_to_english(self, text: str) -> TranslationResult:
         """
         Returns (translated_text, detected_language, was_translated)
+
+        문장 단위로 나누어 캐시에 없는 문장만 번역하므로, 수정 후 다시 저장한 일기는
+        바뀐 문장만 번역 요청을 보냅니다.
         """
-        # Cache key
-        cache_key = hash(text.strip())
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-        
-        try:
-            detected_lang = self.detect_language(text)
-            
-            # If already English or unknown, return as-is
-            if detected_lang in ['en', 'unknown']:
-                result = (text, detected_lang, False)
-                self._cache[cache_key] = result
-                return result
-            
-            # Translate Korean to English
-            if detected_lang == 'ko':
-                translator = GoogleTranslator(source='ko', target='en')
-                translated_text = translator.translate(text)
-                result = (translated_text, detected_lang, True)
-                self._cache[cache_key] = result
-                logger.info(f"Translated KO->EN: {text[:30]}... -> {translated_text[:30]}...")
-                return result
-            
-            # Other languages - translate to English anyway
-            translator = GoogleTranslator(source='auto', target='en')
-            translated_text = translator.translate(text)
-            result = (translated_text, detected_lang, True)
-            self._cache[cache_key] = result
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+
+        detected_lang = self.detect_language(text)
+        # If already English or unknown, return as-is
+        if detected_lang in ['en', 'unknown']:
+            result = (text, detected_lang, False)
+            self._cache.set(text, result)
             return result
-            
+
+        # Korean -> English (other languages are translated with source='auto')
+        source = 'ko' if detected_lang == 'ko' else 'auto'
+        sentences, separators = split_sentences(text)
+        try:
+            translated = self._translate_sentences(sentences, source, detected_lang)
         except Exception as e:
-            logger.error(f"Translation failed: {e}")
-            # Fallback: return original text
-            result = (text, 'unknown', False)
-            self._cache[cache_key] = result
+            return self._failed(text, detected_lang, e)
+        return self._finish(text, detected_lang, join_sentences(translated, separators))
+
+    async def translate_to_english_async(
+        self, text: str, timeout: Optional[float] = None
+    ) -> TranslationResult:
+        """
+        translate_to_english의 비동기 버전 (pooled HTTP client, single-flight, deadline)
+
+        timeout(기본 TRANSLATION_TIMEOUT_S) 안에 끝나지 않으면 원문을 그대로 반환합니다
+        (is_degraded()가 True). 진행 중인 번역은 백그라운드에서 계속되어 문장 캐시를 채우므로
+        다음 요청은 캐시에서 응답합니다.
+        """
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+
+        detected_lang = self.detect_language(text)
+        if detected_lang in ['en', 'unknown']:
+            result = (text, detected_lang, False)
+            self._cache.set(text, result)
             return result
 
+        source = 'ko' if detected_lang == 'ko' else 'auto'
+        sentences, separators = split_sentences(text)
+        timeout = settings.TRANSLATION_TIMEOUT_S if timeout is None else timeout
+        try:
+            translated = await asyncio.wait_for(
+                self._translate_sentences_async(sentences, source, detected_lang), timeout
+            )
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            logger.warning(f"Translation deadline ({timeout}s) exceeded, using original text")
+            return (text, detected_lang, False)
+        except Exception as e:
+            return self._failed(text, detected_lang, e)
+        return self._finish(text, detected_lang, join_sentences(translated, separators))
+
+    def _finish(self, text: str, detected_lang: str, translated_text: str) -> TranslationResult:
+        result = (translated_text, detected_lang, True)
+        self._cache.set(text, result)
+        logger.info(f"Translated {detected_lang.upper()}->EN: {text[:30]}... -> {translated_text[:30]}...")
+        return result
+
+    def _failed(self, text: str, detected_lang: str, error: Exception) -> TranslationResult:
+        logger.error(f"Translation failed: {error}")
+        # Fallback: return original text (짧은 TTL로만 캐시하여 장애 복구 후 다시 시도)
+        result = (text, detected_lang, False)
+        self._cache.set(text, result, negative=True)
+        return result
+
+    def _plan_sentences(self, sentences: List[str]) -> Tuple[List[Optional[str]], List[int]]:
+        """캐시된 문장과 글자가 없는 문장은 바로 채우고, 번역이 필요한 인덱스를 반환"""
+        results: List[Optional[str]] = [None] * len(sentences)
+        misses = []
+        for i, sentence in enumerate(sentences):
+            if not any(c.isalpha() for c in sentence):
+                results[i] = sentence
+                continue
+            cached = self._cache.get(sentence)
+            # was_translated=False인 항목(실패 결과, 영어 원문)은 번역으로 쓰지 않음
+            if cached is not None and cached[2]:
+                results[i] = cached[0]
+            else:
+                misses.append(i)
+        return results, misses
+
+    def _cache_sentences(self, texts: List[str], translated: List[str], detected_lang: str) -> None:
+        for text, english in zip(texts, translated):
+            self._cache.set(text, (english, detected_lang, True))
+        self.sentences_translated += len(texts)
+
+    def _translate_sentences(self, sentences: List[str], source: str, detected_lang: str) -> List[str]:
+        results, misses = self._plan_sentences(sentences)
+        for chunk in chunk_sentences([sentences[i] for i in misses]):
+            idxs = [misses[j] for j in chunk]
+            texts = [sentences[i] for i in idxs]
+            translated = self._translate_chunk(texts, source)
+            self._cache_sentences(texts, translated, detected_lang)
+            for i, english in zip(idxs, translated):
+                results[i] = english
+        return results
+
+    async def _translate_sentences_async(
+        self, sentences: List[str], source: str, detected_lang: str
+    ) -> List[str]:
+        results, misses = self._plan_sentences(sentences)
+
+        async def run(idxs: List[int]) -> None:
+            texts = [sentences[i] for i in idxs]
+            # 동시에 들어온 같은 문장 묶음(중복 제출, 재시도)은 한 번만 요청
+            translated = await self._flights.do(
+                stable_digest(source, *texts),
+                lambda: self._translate_chunk_async(texts, source, detected_lang),
+            )
+            for i, english in zip(idxs, translated):
+                results[i] = english
+
+        chunks = chunk_sentences([sentences[i] for i in misses])
+        await asyncio.gather(*(run([misses[j] for j in chunk]) for chunk in chunks))
+        return results
+
+    def _translate_chunk(self, texts: List[str], source: str) -> List[str]:
+        """여러 문장을 줄바꿈으로 이어 한 번에 번역; 줄 수가 어긋나면 문장별로 다시 번역"""
+        if settings.TRANSLATION_BACKEND == "stub":
+            return list(texts)
+        translator = GoogleTranslator(source=source, target='en')
+        self.provider_calls += 1
+        lines = (translator.translate("\n".join(texts)) or "").split("\n")
+        if len(lines) == len(texts):
+            return [line.strip() for line in lines]
+        logger.warning(f"Batched translation returned {len(lines)} lines for {len(texts)} sentences")
+        self.provider_calls += len(texts)
+        return [translator.translate(t) for t in texts]
+
+    async def _translate_chunk_async(self, texts: List[str], source: str, detected_lang: str) -> List[str]:
+        """single-flight task 안에서 실행: 호출자가 deadline으로 떠나도 결과는 캐시에 저장"""
+        translator = self._get_async_translator()
+        self.provider_calls += 1
+        lines = (await translator.translate("\n".join(texts), source) or "").split("\n")
+        if len(lines) != len(texts):
+            logger.warning(f"Batched translation returned {len(lines)} lines for {len(texts)} sentences")
+            self.provider_calls += len(texts)
+            lines = await asyncio.gather(*(translator.translate(t, source) for t in texts))
+        translated = [line.strip() for line in lines]
+        self._cache_sentences(texts, translated, detected_lang)
+        return translated
+
+    def _get_async_translator(self):
+        if self._async_translator is None:
+            self._async_translator = create_async_translator()
+        return self._async_translator
+
+    async def aclose(self) -> None:
+        if self._async_translator is not None:
+            await self._async_translator.aclose()
+            self._async_translator = None
+
+    def stats(self) -> Dict:
+        return {
+            "backend": settings.TRANSLATION_BACKEND,
+            "cache": self._cache.stats(),
+            "provider_calls": self.provider_calls,
+            "sentences_translated": self.sentences_translated,
+            "deadline_exceeded": self.deadline_exceeded,
+            "singleflight": self._flights.stats(),
+        }
+
 # Global instance
 translation_service = TranslationService()
 
@@ -70,3 +443,10 @@ def translate_if_needed(text: str) -> Tuple[str, str, bool]:
     Returns: (translated_text, detected_language, was_translated)
     """
     return translation_service.translate_to_english(text)
+
+async def translate_if_needed_async(text: str) -> Tuple[str, str, bool]:
+    """
+    Async convenience function (deadline 초과/실패 시 원문 반환, is_degraded()로 확인)
+    Returns: (translated_text, detected_language, was_translated)
+    """
+    return await translation_service.translate_to_english_async(text)
@@ -0,0 +1,18 @@
+"""
+gunicorn settings for multi-worker deployments on Linux
+
+    MODEL_PRELOAD=true gunicorn app.main:app -c gunicorn.conf.py
+
+preload_app=True imports app.main once in the master; with MODEL_PRELOAD the
+model weights are loaded there and shared copy-on-write by every worker.
+Check per-worker unique memory with:
+
+    python -m app.model.sharing memory --children-of <master pid>
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# backend/ 디렉토리를 기준으로 app 모듈 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
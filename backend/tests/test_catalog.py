@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from app.recommend.catalog import TrackCatalog
+from app.schemas.recommend import TrackInfo
+
+TARGET = {"valence": 0.5, "energy": 0.5, "danceability": 0.5}
+
+
+def _write_sparse(tmp_path, fmt):
+    """id와 audio feature만 있는 레코드 (README의 손으로 만든 카탈로그 형태)"""
+    if fmt == "json":
+        path = tmp_path / "catalog.json"
+        path.write_text(json.dumps({"tracks": [
+            {"id": "a", "valence": 0.4, "energy": 0.6, "danceability": 0.5},
+            {"id": "b", "name": "Song", "valence": 0.7, "energy": 0.3, "danceability": 0.2},
+        ]}), encoding="utf-8")
+    else:
+        path = tmp_path / "catalog.csv"
+        path.write_text(
+            "id,name,valence,energy,danceability\n"
+            "a,,0.4,0.6,0.5\n"
+            "b,Song,0.7,0.3,0.2\n",
+            encoding="utf-8",
+        )
+    return path
+
+
+@pytest.mark.parametrize("fmt", ["json", "csv"])
+def test_sparse_records_validate_as_track_info(tmp_path, fmt):
+    catalog = TrackCatalog.load(str(_write_sparse(tmp_path, fmt)))
+    assert len(catalog) == 2
+
+    result = catalog.recommend(TARGET, limit=2, pool_factor=1)
+
+    tracks = [TrackInfo(**track) for track in result["tracks"]]
+    assert {t.id for t in tracks} == {"a", "b"}
+    assert all(t.album == "" for t in tracks)
+    assert {t.name for t in tracks} == {"", "Song"}
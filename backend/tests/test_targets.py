@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from app.model.emotion_model import select_emotions
+from app.recommend.features import FEATURE_KEYS
+from app.recommend.recommender import aggregate_targets
+from app.recommend.targets import FALLBACK_SEEDS, LABEL_INDEX, LABEL_SEEDS, aggregate_targets_batch
+
+
+@pytest.mark.parametrize(
+    "threshold, topk",
+    [(0.55, None), (None, 2), (0.2, 4), (None, None), (0.9, 1)],
+)
+def test_batch_matches_single_for_mixed_threshold_topk(threshold, topk):
+    """None인 인자를 각각 settings 값으로 채우는 select_emotions와 같은 감정을 선택해야 함"""
+    rng = np.random.default_rng(0)
+    probs = rng.random((200, 28)).astype(np.float32)
+
+    targets, seeds = aggregate_targets_batch(probs, threshold=threshold, topk=topk)
+
+    for row, target_row, seed_row in zip(probs, targets, seeds):
+        selected = select_emotions(row, threshold=threshold, topk=topk)
+        target, _ = aggregate_targets(selected)
+        np.testing.assert_allclose(target_row, [target[k] for k in FEATURE_KEYS], atol=1e-5)
+        # seed 순위는 다를 수 있지만 선택된 감정의 seed에서만 나와야 함
+        allowed = {seed for label, _ in selected for seed in LABEL_SEEDS[LABEL_INDEX[label]]}
+        assert set(seed_row) <= allowed | set(FALLBACK_SEEDS)
@@ -21,6 +21,7 @@ export interface TrackInfo {
 export interface RecommendRequest {
   selected: EmotionInput[]
   limit?: number
+  user_id?: number  // 있으면 최근에 추천받은 곡을 제외
 }
 
 export interface RecommendResponse {
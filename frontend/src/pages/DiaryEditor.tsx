@@ -195,14 +195,15 @@ export default function DiaryEditor() {
     setError(null)
     
     try {
+      const userId = localStorage.getItem('user_id')
       const result = await getRecommendations({
         selected: emotions.slice(0, 3), // 상위 3개 감정 사용
-        limit: 4
+        limit: 4,
+        user_id: userId ? parseInt(userId) : undefined
       })
       setRecommendations(result.tracks)
       
       // 음악 추천 결과를 일기에 저장
-      const userId = localStorage.getItem('user_id')
       if (userId && date) {
         const musicData = {
           tracks: result.tracks,